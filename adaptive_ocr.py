@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cv2
+import fitz
+import numpy as np
+
+from ocr_image_utils import render_page_array, render_page_clip, prepare_ocr_input, PAGE_PREPROCESS_CHAIN
+from ocr_cache import page_cache_key, predict_with_cache
+from ocr_result import OCRPageResult, apply_preprocess_info, scale_transform
+from text_layer_probe import rect_image_scale
+
+
+class AdaptiveDPI:
+    """
+    自适应DPI识别
+
+    页面先以较低DPI整页识别；置信度低于 min_score 或文字高度小于 min_text_height 像素的文本框
+    所在区域再以较高DPI局部渲染并重新识别，替换原有结果。干净的页面只需处理低DPI的像素量。
+
+    返回结果的坐标统一换算到 reference_dpi 渲染的整页图像坐标，与固定DPI模式一致
+    """
+
+    def __init__(self, low_dpi=120, high_dpi=300, reference_dpi=200, max_size=2000,
+                 min_score=0.85, min_text_height=12, padding=6, max_regions=8):
+        self.low_dpi = low_dpi
+        self.high_dpi = high_dpi
+        self.reference_dpi = reference_dpi
+        self.max_size = max_size
+        self.min_score = min_score
+        self.min_text_height = min_text_height
+        self.padding = padding
+        self.max_regions = max_regions
+
+    def low_scale(self, page_rect):
+        return rect_image_scale(page_rect, dpi=self.low_dpi, max_size=self.max_size)
+
+    def render_low(self, page):
+        """
+        以低DPI渲染整页
+        """
+        return render_page_array(page, dpi=self.low_dpi, max_size=self.max_size)
+
+    def find_refine_regions(self, page_result, image_shape):
+        """
+        找出需要高DPI重新识别的区域，返回低DPI图像坐标下的矩形列表 [(x0, y0, x1, y1), ...]
+
+        低置信度/小字号文本框按行合并为横向条带，条带之间重叠时再合并。
+        纠正过方向/倾斜的页面在识别图像坐标下判断文字高度，区域则换算回渲染图像（原始页面）坐标
+        """
+        if not len(page_result) or not page_result.has_polys:
+            return []
+
+        boxes = page_result.bounding_boxes()[:len(page_result)].astype(np.float64)
+        heights = boxes[:, 3] - boxes[:, 1]
+        weak = (page_result.scores[:len(boxes)] < self.min_score) | (heights < self.min_text_height)
+        if not weak.any():
+            return []
+        if 'transform' in page_result.meta:
+            boxes = page_result.to_source_coordinates().bounding_boxes()[:len(boxes)].astype(np.float64)
+
+        height, width = image_shape[:2]
+        weak_boxes = boxes[weak]
+        weak_boxes = weak_boxes[np.argsort(weak_boxes[:, 1], kind='stable')]
+
+        regions = []
+        for x0, y0, x1, y1 in weak_boxes.tolist():
+            x0 = max(0.0, x0 - self.padding)
+            y0 = max(0.0, y0 - self.padding)
+            x1 = min(float(width), x1 + self.padding)
+            y1 = min(float(height), y1 + self.padding)
+            if regions and y0 <= regions[-1][3]:
+                last = regions[-1]
+                regions[-1] = (min(last[0], x0), last[1], max(last[2], x1), max(last[3], y1))
+            else:
+                regions.append((x0, y0, x1, y1))
+
+        # 区域过多时说明整页质量普遍较差，直接整页高DPI重新识别
+        if len(regions) > self.max_regions:
+            return [(0.0, 0.0, float(width), float(height))]
+        return regions
+
+    def render_regions(self, page, regions, transform=None):
+        """
+        以高DPI渲染各区域，返回 [(区域图像, 区域图像坐标到低DPI图像坐标的3x3变换矩阵), ...]
+
+        区域图像长边不超过 max_size（超出时降低该区域的DPI，避免预处理时再缩放）；
+        传入整页预处理的 transform 时，区域图像按整页相同的方向和倾斜角度转正后再识别
+        """
+        scale = self.low_scale(page.rect)
+        rendered = []
+        for x0, y0, x1, y1 in regions:
+            clip = fitz.Rect(page.rect.x0 + x0 / scale, page.rect.y0 + y0 / scale,
+                             page.rect.x0 + x1 / scale, page.rect.y0 + y1 / scale)
+            dpi = min(self.high_dpi, self.max_size * 72 / max(clip.width, clip.height, 1.0))
+            image = render_page_clip(page, clip, dpi=dpi)
+            region_scale = scale * 72 / dpi
+            placement = np.array([[region_scale, 0.0, x0], [0.0, region_scale, y0], [0.0, 0.0, 1.0]])
+            if transform is not None:
+                image, matrix = straighten_region(image, transform)
+                placement = placement @ np.linalg.inv(matrix)
+            rendered.append((image, placement))
+        return rendered
+
+    def merge_refined(self, page_result, regions, region_results, placements):
+        """
+        用区域识别结果替换低DPI结果中中心落在这些区域内的文本框
+
+        新结果插入到被替换的第一个文本框的位置，保持原有的阅读顺序。
+        regions 与 placements 为低DPI渲染图像坐标；页面纠正过方向/倾斜时，按 transform 换算到识别图像坐标后合并
+        """
+        transform = page_result.meta.get('transform')
+        transform = np.asarray(transform, dtype=np.float64) if transform is not None else None
+        count = len(page_result)
+        boxes = page_result.bounding_boxes()[:count].astype(np.float64) if page_result.has_polys else np.zeros((count, 4))
+        centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+        if transform is not None:
+            centers = _apply_matrix(np.linalg.inv(transform), centers)
+        cx = centers[:, 0]
+        cy = centers[:, 1]
+
+        owner = np.full(count, -1, dtype=np.int64)
+        for region_idx, (x0, y0, x1, y1) in enumerate(regions):
+            inside = (owner < 0) & (x0 <= cx) & (cx <= x1) & (y0 <= cy) & (cy <= y1)
+            owner[inside] = region_idx
+
+        # 每个区域的新结果（与 page_result 相同的坐标系）
+        replacements = []
+        for region_result, placement in zip(region_results, placements):
+            region_count = len(region_result)
+            matrix = np.asarray(placement, dtype=np.float64)
+            if transform is not None:
+                matrix = transform @ matrix
+            polys = region_result.polys[:region_count].astype(np.float64).reshape(-1, 2)
+            polys = _apply_matrix(matrix, polys).reshape(-1, 4, 2)
+            replacements.append((region_result.texts[:region_count], region_result.scores[:region_count], polys))
+
+        texts = []
+        scores = []
+        polys = []
+        inserted = set()
+        old_polys = page_result.polys[:count].astype(np.float64)
+        for i in range(count):
+            region_idx = owner[i]
+            if region_idx < 0:
+                texts.append(page_result.texts[i])
+                scores.append(page_result.scores[i:i + 1])
+                polys.append(old_polys[i:i + 1])
+            elif region_idx not in inserted:
+                inserted.add(region_idx)
+                new_texts, new_scores, new_polys = replacements[region_idx]
+                texts.extend(new_texts)
+                scores.append(new_scores)
+                polys.append(new_polys)
+        # 区域内原本没有文本框时（理论上不会出现），追加到末尾
+        for region_idx, (new_texts, new_scores, new_polys) in enumerate(replacements):
+            if region_idx not in inserted:
+                texts.extend(new_texts)
+                scores.append(new_scores)
+                polys.append(new_polys)
+
+        if not texts:
+            return OCRPageResult(meta=page_result.meta)
+        return OCRPageResult(texts, np.concatenate(scores), np.concatenate(polys).round().astype(np.int32),
+                             meta=page_result.meta)
+
+    def finalize(self, page_rect, page_result, refined_count=0):
+        """
+        将低DPI图像坐标换算为参考DPI图像坐标，并记录自适应识别信息
+        """
+        factor = rect_image_scale(page_rect, dpi=self.reference_dpi, max_size=self.max_size) / self.low_scale(page_rect)
+        polys = None
+        if page_result.has_polys:
+            polys = np.round(page_result.polys[:len(page_result)].astype(np.float64) * factor).astype(np.int32)
+        meta = dict(page_result.meta, dpi=self.low_dpi, refined_regions=refined_count)
+        if 'transform' in meta:
+            meta['transform'] = scale_transform(meta['transform'], factor)
+        if refined_count:
+            meta['refine_dpi'] = self.high_dpi
+        return OCRPageResult(page_result.texts, page_result.scores[:len(page_result)], polys, meta=meta)
+
+    def recognize_page(self, ocr, page, cache=None):
+        """
+        同步完成一页的自适应识别（渲染和识别在同一线程/进程中进行），返回 OCRPageResult
+        """
+        low_image = self.render_low(page)
+        key = page_cache_key(low_image, dpi=self.low_dpi, max_size=self.max_size) if cache is not None else None
+        info = {}
+        results, _ = predict_with_cache(ocr, [prepare_ocr_input(low_image, PAGE_PREPROCESS_CHAIN, info)], [key], cache)
+        page_result = apply_preprocess_info(OCRPageResult.from_predict(results[0]), info)
+
+        regions = self.find_refine_regions(page_result, low_image.shape)
+        if regions:
+            page_result = self.refine(ocr, page, page_result, regions, cache)
+        return self.finalize(page.rect, page_result, len(regions))
+
+    def refine(self, ocr, page, page_result, regions, cache=None):
+        """
+        高DPI重新识别指定区域并合并结果（坐标仍为低DPI图像坐标）
+        """
+        rendered = self.render_regions(page, regions, page_result.meta.get('transform'))
+        images = [prepare_ocr_input(image) for image, _ in rendered]
+        keys = [page_cache_key(image, dpi=self.high_dpi, region='adaptive') if cache is not None else None
+                for image, _ in rendered]
+        outputs, _ = predict_with_cache(ocr, images, keys, cache, batch_size=len(images))
+        region_results = [OCRPageResult.from_predict(output) for output in outputs]
+        return self.merge_refined(page_result, regions, region_results, [placement for _, placement in rendered])
+
+
+def _apply_matrix(matrix, points):
+    """
+    对 (N, 2) 坐标数组应用3x3仿射变换矩阵
+    """
+    return points @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def straighten_region(image, transform):
+    """
+    将局部区域图像按整页预处理的方向/倾斜纠正（transform 的旋转部分，不含缩放）转正
+
+    返回 (转正后的图像, 区域图像坐标到转正后图像坐标的3x3变换矩阵)；画布扩大到能容纳整个旋转后的区域
+    """
+    linear = np.asarray(transform, dtype=np.float64)[:2, :2]
+    linear = linear / np.sqrt(abs(np.linalg.det(linear)))
+    height, width = image.shape[:2]
+    corners = _apply_matrix(np.vstack([np.hstack([linear, [[0.0], [0.0]]]), [0.0, 0.0, 1.0]]),
+                            np.array([[0, 0], [width - 1, 0], [0, height - 1], [width - 1, height - 1]], dtype=np.float64))
+    offset = -corners.min(axis=0)
+    size = np.ceil(corners.max(axis=0) + offset).astype(int) + 1
+    matrix = np.vstack([np.hstack([linear, offset[:, None]]), [0.0, 0.0, 1.0]])
+    straightened = cv2.warpAffine(image, matrix[:2], (int(size[0]), int(size[1])),
+                                  flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return straightened, matrix
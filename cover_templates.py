@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+
+import numpy as np
+
+from ocr_result import OCRPageResult
+from page_thumbnail import text_components
+
+# 用户自定义模板文件（JSON列表，格式同 DEFAULT_COVER_TEMPLATES，同名模板覆盖内置模板）
+DEFAULT_TEMPLATE_FILE = os.path.expanduser("~/.pdf_processor_cover_templates.json")
+
+# 整页识别结果中至少有该比例的文本框落在模板区域内，才认为模板适用
+MIN_REGION_COVERAGE = 0.9
+# 区域识别后，封面缩略图上至少有该比例的文字墨迹（见 page_thumbnail.text_components）落在识别出的文本框内，
+# 否则说明模板区域外有内容或区域内有漏识别的文字，退回整页识别
+MIN_TEXT_INK_COVERAGE = 0.95
+# 文本框向外扩展的边距（相对页面宽高的比例），容纳缩略图膨胀后的墨迹区域
+TEXT_BOX_PADDING = 0.01
+
+# 内置封面版式模板
+#   anchors         - 用于识别版式的关键词（应为该版式特有的多字词，避免"卷"等在正文中常见的单字）
+#   min_anchor_hits - 至少命中的关键词数量
+#   regions         - 需要识别的区域，坐标为相对页面宽高的比例 (x0, y0, x1, y1)，按从上到下排列
+DEFAULT_COVER_TEMPLATES = [
+    {
+        'name': '档案卷皮',
+        'anchors': ['全宗号', '归档号', '保管期限', '卷号'],
+        'min_anchor_hits': 2,
+        'regions': [
+            ('档号栏', (0.0, 0.0, 1.0, 0.2)),
+            ('案卷题名', (0.08, 0.25, 0.92, 0.55)),
+            ('卷号栏', (0.45, 0.75, 1.0, 0.97)),
+        ]
+    },
+    {
+        'name': '案件卷宗封面',
+        'anchors': ['监察委员会', '审查调查室', '卷宗', '立卷单位'],
+        'min_anchor_hits': 2,
+        'regions': [
+            ('案件标题', (0.05, 0.08, 0.95, 0.55)),
+            ('机构与时间', (0.05, 0.55, 0.95, 0.92)),
+        ]
+    },
+]
+
+
+def load_cover_templates(template_file=DEFAULT_TEMPLATE_FILE):
+    """
+    读取封面模板：内置模板 + 用户模板文件（同名覆盖）
+    """
+    templates = {template['name']: template for template in DEFAULT_COVER_TEMPLATES}
+    if template_file and os.path.exists(template_file):
+        try:
+            with open(template_file, 'r', encoding='utf-8') as f:
+                for template in json.load(f):
+                    templates[template['name']] = template
+        except Exception as e:
+            print(f"读取封面模板文件失败: {str(e)}")
+    return list(templates.values())
+
+
+def count_anchor_hits(template, texts):
+    """
+    统计模板关键词在识别文本中的命中数量
+    """
+    joined = "".join(texts)
+    return sum(1 for anchor in template['anchors'] if anchor in joined)
+
+
+def template_matches(template, page_result, image_size):
+    """
+    判断整页识别结果是否符合模板：关键词命中数量足够，包含关键词的文本框都落在模板区域内，
+    且绝大部分文本框（MIN_REGION_COVERAGE）落在模板区域内
+
+    image_size 为整页识别图像的 (宽, 高)
+    """
+    if count_anchor_hits(template, page_result.texts) < template.get('min_anchor_hits', 1):
+        return False
+    if not page_result.has_polys:
+        return False
+
+    # 所有文本框中心（相对页面比例）与各区域的包含关系
+    width, height = image_size
+    boxes = page_result.bounding_boxes() / np.array([width, height, width, height], dtype=np.float64)
+    cx = (boxes[:, 0] + boxes[:, 2])[:, None] / 2
+    cy = (boxes[:, 1] + boxes[:, 3])[:, None] / 2
+    regions = np.array([region for _, region in template['regions']], dtype=np.float64)
+    inside = ((regions[:, 0] <= cx) & (cx <= regions[:, 2]) & (regions[:, 1] <= cy) & (cy <= regions[:, 3])).any(axis=1)
+
+    has_anchor = np.array([any(anchor in text for anchor in template['anchors']) for text in page_result.texts], dtype=bool)
+    if not inside[has_anchor].all():
+        return False
+    return inside.mean() >= MIN_REGION_COVERAGE
+
+
+def text_ink_coverage(page_result, image_size, thumbnail):
+    """
+    计算封面缩略图上文字墨迹区域被识别结果文本框覆盖的比例（区域中心点落在文本框内即为覆盖，按区域面积加权），
+    页面上没有文字墨迹时返回1.0
+
+    image_size 为识别结果坐标对应的整页图像 (宽, 高)
+    """
+    components = text_components(thumbnail)
+    if not len(components):
+        return 1.0
+    if not page_result.has_polys:
+        return 0.0
+
+    width, height = image_size
+    boxes = page_result.bounding_boxes() / np.array([width, height, width, height], dtype=np.float64)
+    boxes += np.array([-TEXT_BOX_PADDING, -TEXT_BOX_PADDING, TEXT_BOX_PADDING, TEXT_BOX_PADDING])
+    thumb_height, thumb_width = thumbnail.shape[:2]
+    cx = (components[:, 0] + components[:, 2])[:, None] / 2 / thumb_width
+    cy = (components[:, 1] + components[:, 3])[:, None] / 2 / thumb_height
+    covered = ((boxes[:, 0] <= cx) & (cx <= boxes[:, 2]) & (boxes[:, 1] <= cy) & (cy <= boxes[:, 3])).any(axis=1)
+    areas = (components[:, 2] - components[:, 0]) * (components[:, 3] - components[:, 1])
+    return float(np.average(covered, weights=areas))
+
+
+def region_rects(page_rect, template):
+    """
+    将模板区域换算为PDF坐标系下的矩形 (x0, y0, x1, y1) 列表
+    """
+    rects = []
+    for _, (x0, y0, x1, y1) in template['regions']:
+        rects.append((page_rect.x0 + page_rect.width * x0, page_rect.y0 + page_rect.height * y0,
+                      page_rect.x0 + page_rect.width * x1, page_rect.y0 + page_rect.height * y1))
+    return rects
+
+
+def merge_region_results(region_results, offsets, region_scale=1.0):
+    """
+    合并各区域的识别结果为一个整页 OCRPageResult
+
+    offsets 为各区域左上角在整页图像坐标中的位置，region_scale 为区域图像到整页图像坐标的缩放系数
+    """
+    texts = []
+    scores = []
+    polys = []
+    for page_result, (offset_x, offset_y) in zip(region_results, offsets):
+        if not len(page_result):
+            continue
+        texts.extend(page_result.texts)
+        scores.append(page_result.scores[:len(page_result)])
+        region_polys = page_result.polys[:len(page_result)].astype(np.float64) * region_scale
+        region_polys += np.array([offset_x, offset_y], dtype=np.float64)
+        polys.append(np.round(region_polys).astype(np.int32))
+
+    if not texts:
+        return OCRPageResult(meta={'source': 'cover_template'})
+    return OCRPageResult(texts, np.concatenate(scores), np.concatenate(polys), meta={'source': 'cover_template'})
+
+
+class CoverTemplateMatcher:
+    """
+    封面版式自动匹配
+
+    前几份PDF的封面按整页识别，并用结果匹配模板；同一模板连续匹配 confirm_pages 次后启用，
+    之后的封面只识别模板区域。区域识别结果中关键词不足，或封面上的文字墨迹有较多没有被识别结果覆盖时，
+    退回整页识别并重新匹配
+    """
+
+    def __init__(self, templates=None, confirm_pages=2):
+        self.templates = templates if templates is not None else load_cover_templates()
+        self.confirm_pages = confirm_pages
+        self.active = None
+        self._candidate = None
+        self._candidate_hits = 0
+
+    def observe(self, page_result, image_size):
+        """
+        记录一次整页识别结果，模板被确认时返回该模板，否则返回None
+        """
+        matched = None
+        for template in self.templates:
+            if template_matches(template, page_result, image_size):
+                matched = template
+                break
+
+        if matched is None:
+            self._candidate = None
+            self._candidate_hits = 0
+            return None
+
+        if self._candidate is matched:
+            self._candidate_hits += 1
+        else:
+            self._candidate = matched
+            self._candidate_hits = 1
+
+        if self._candidate_hits >= self.confirm_pages:
+            self.active = matched
+            return matched
+        return None
+
+    def verify(self, page_result, image_size, thumbnail):
+        """
+        检查区域识别结果是否仍符合当前模板：关键词命中数量足够，且封面缩略图上的文字墨迹
+        至少有 MIN_TEXT_INK_COVERAGE 落在识别出的文本框内
+
+        image_size 为识别结果坐标对应的整页图像 (宽, 高)，thumbnail 为封面的灰度缩略图
+        """
+        if self.active is None:
+            return False
+        if count_anchor_hits(self.active, page_result.texts) < self.active.get('min_anchor_hits', 1):
+            return False
+        return text_ink_coverage(page_result, image_size, thumbnail) >= MIN_TEXT_INK_COVERAGE
+
+    def reset(self):
+        self.active = None
+        self._candidate = None
+        self._candidate_hits = 0
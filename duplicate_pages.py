@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+import threading
+
+import cv2
+import fitz
+import numpy as np
+
+from ocr_result import OCRPageResult
+from ocr_result_store import append_page_result, load_page_results
+from page_thumbnail import render_page_thumbnail, THUMBNAIL_DPI
+
+# 跨卷重复页索引的默认目录（与OCR结果缓存放在一起）
+DEFAULT_INDEX_DIR = os.path.expanduser("~/.pdf_processor_cache/page_index")
+INDEX_FILENAME = "pages.jsonl"
+# 每次运行发现的重复页报告文件名（写入输出目录）
+DUPLICATE_REPORT_FILENAME = "重复页面报告.md"
+
+# 只有页面内容（内容流、引用的图像和表单对象、文本）完全相同时才复用识别结果（见 page_content_digest）。
+# 外观相似的页面只用于重复页报告：感知哈希、缩略图和 VERIFY_DPI 图像的相关系数都达到阈值后，
+# 该页仍正常识别，识别文本与相似页面一致时才记入报告。
+# 只改了姓名、日期等几个字的表格页面，相关系数可达0.99，图像比较无法区分，不能据此复用识别结果
+
+# 感知哈希汉明距离不超过该值的页面作为候选（64位DCT哈希）
+MAX_HASH_DISTANCE = 14
+# 候选页面缩略图的归一化互相关系数低于该值时直接排除（版式相同、正文不同的页面也能达到0.7以上）
+MIN_THUMBNAIL_CORRELATION = 0.7
+# 通过初筛的候选页面以该DPI重新渲染两页比较，相关系数不低于该值才作为外观相似的页面
+VERIFY_DPI = 100
+MIN_VERIFY_CORRELATION = 0.98
+# 每页最多验证的候选数量（按哈希距离从近到远）
+MAX_CANDIDATES = 3
+# 互相关比较时裁掉的边缘比例，即允许的最大平移量
+CORRELATION_MARGIN = 0.03
+
+# 重复页报告中的判定说明
+MATCH_LABELS = {
+    'reused': "内容完全相同，复用识别结果",
+    'identical': "内容完全相同，已重新识别",
+    'same_text': "外观相似，识别文本一致",
+}
+
+# 每个字节中1的个数，用于向量化计算汉明距离
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def perceptual_hash(thumbnail):
+    """
+    计算缩略图的64位感知哈希（32x32灰度图DCT的低频8x8系数与中位数比较）
+    """
+    small = cv2.resize(thumbnail, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    coefficients = cv2.dct(small)[:8, :8].ravel()
+    bits = coefficients > np.median(coefficients[1:])
+    bits[0] = False  # 直流分量只反映整体亮度，不参与比较
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def page_content_digest(page):
+    """
+    计算页面内容的摘要：页面尺寸与旋转、内容流、引用的图像和表单对象的数据以及页面文本，
+    只有从同一来源复制的页面才会完全相同
+    """
+    doc = page.parent
+    digest = hashlib.sha1()
+    digest.update(f"{tuple(page.rect)}|{page.rotation}".encode('utf-8'))
+    for xref in page.get_contents():
+        digest.update(doc.xref_stream(xref) or b"")
+    for item in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(item[0]) or b"")
+    for item in page.get_xobjects():
+        digest.update(doc.xref_stream(item[0]) or b"")
+    # 内容流相同、字体子集不同的页面文本不同
+    digest.update(page.get_text().encode('utf-8'))
+    return digest.hexdigest()
+
+
+def hamming_distances(hashes, page_hash):
+    """
+    计算一组64位哈希 (uint64数组) 与指定哈希的汉明距离
+    """
+    if len(hashes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    diff = np.bitwise_xor(hashes, np.uint64(page_hash))
+    return _POPCOUNT[diff.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+def thumbnail_correlation(thumbnail, other):
+    """
+    两张缩略图的最大归一化互相关系数（裁掉边缘后在另一张图上滑动匹配，容忍少量平移）
+    """
+    height, width = thumbnail.shape[:2]
+    if other.shape[:2] != (height, width):
+        other = cv2.resize(other, (width, height), interpolation=cv2.INTER_AREA)
+    margin_y = int(height * CORRELATION_MARGIN)
+    margin_x = int(width * CORRELATION_MARGIN)
+    template = thumbnail[margin_y:height - margin_y, margin_x:width - margin_x]
+    return float(cv2.matchTemplate(other, template, cv2.TM_CCOEFF_NORMED).max())
+
+
+class DuplicatePageIndex:
+    """
+    跨卷重复页索引
+
+    每个识别过的页面记录其内容摘要、缩略图感知哈希、来源PDF与页码，并保存一份识别结果。
+    新页面的内容摘要与索引中的页面完全相同时为重复页，reuse 为True时直接复用之前的识别结果；
+    内容不同但外观相似的页面（见 MIN_VERIFY_CORRELATION）仍正常识别，识别完成后比较两页文本，
+    文本一致时记入重复页报告。是否复用不影响报告的生成
+
+    lookup 会打开其他PDF，只能在负责渲染的线程中调用；add 可在任意线程调用
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, reuse=False):
+        self.index_dir = index_dir
+        self.reuse = reuse
+        self._lock = threading.Lock()
+        self._docs = {}
+        self.entries = []
+        self._keys = set()
+        self._contents = {}
+        self.duplicates = []
+        os.makedirs(os.path.join(self.index_dir, 'results'), exist_ok=True)
+        self._load()
+
+    def _index_path(self):
+        return os.path.join(self.index_dir, INDEX_FILENAME)
+
+    def _result_path(self, entry_id):
+        return os.path.join(self.index_dir, 'results', f"{entry_id // 1000:04d}", f"{entry_id}.bin")
+
+    def _load(self):
+        hashes = []
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 写了一半的最后一行
+                    self.entries.append(entry)
+                    self._keys.add((entry['pdf'], entry['page'], entry['hash']))
+                    if entry.get('content'):
+                        self._contents.setdefault(entry['content'], entry)
+                    hashes.append(int(entry['hash'], 16))
+        except OSError:
+            pass
+        self._hashes = np.array(hashes, dtype=np.uint64)
+        self._next_id = max((entry['id'] for entry in self.entries), default=-1) + 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _get_page(self, pdf_path, page_num):
+        """
+        打开指定PDF页面，PDF不存在或无法打开时返回None
+        """
+        doc = self._docs.get(pdf_path)
+        if doc is None:
+            if not os.path.exists(pdf_path):
+                return None
+            if len(self._docs) >= 4:
+                self._docs.pop(next(iter(self._docs))).close()
+            try:
+                doc = fitz.open(pdf_path)
+            except Exception:
+                return None
+            self._docs[pdf_path] = doc
+        if page_num >= len(doc):
+            return None
+        return doc[page_num]
+
+    def _render_page(self, pdf_path, page_num, dpi):
+        """
+        渲染指定PDF页面的灰度图，PDF不存在或无法打开时返回None
+        """
+        page = self._get_page(pdf_path, page_num)
+        if page is None:
+            return None
+        return render_page_thumbnail(page, dpi=dpi)
+
+    def _load_result(self, entry):
+        """
+        读取索引中页面保存的识别结果，文件缺失或损坏时返回None
+        """
+        try:
+            results = load_page_results(self._result_path(entry['id']))
+        except (OSError, ValueError):
+            return None
+        return results.get(0)
+
+    def _find_similar(self, pdf_path, page_num, thumbnail, distances):
+        """
+        查找外观相似的已识别页面，返回 [(索引项, 哈希距离, 相关系数)]
+        """
+        candidates = np.nonzero(distances <= MAX_HASH_DISTANCE)[0]
+        height, width = thumbnail.shape[:2]
+        page_image = None
+        similar = []
+        for position in candidates[np.argsort(distances[candidates], kind='stable')][:MAX_CANDIDATES].tolist():
+            entry = self.entries[position]
+            if entry['pdf'] == pdf_path and entry['page'] == page_num:
+                continue
+            # 页面尺寸不同（缩略图尺寸相差超过2像素）的页面不比较
+            if abs(entry['size'][0] - width) > 2 or abs(entry['size'][1] - height) > 2:
+                continue
+            other = self._render_page(entry['pdf'], entry['page'], THUMBNAIL_DPI)
+            if other is None or thumbnail_correlation(thumbnail, other) < MIN_THUMBNAIL_CORRELATION:
+                continue
+            if page_image is None:
+                page_image = self._render_page(pdf_path, page_num, VERIFY_DPI)
+                if page_image is None:
+                    break
+            other_image = self._render_page(entry['pdf'], entry['page'], VERIFY_DPI)
+            if other_image is None:
+                continue
+            correlation = thumbnail_correlation(page_image, other_image)
+            if correlation >= MIN_VERIFY_CORRELATION:
+                similar.append((entry, int(distances[position]), round(correlation, 3)))
+        return similar
+
+    def _record(self, pdf_path, page_num, entry, match, distance, correlation):
+        with self._lock:
+            self.duplicates.append({'pdf': pdf_path, 'page': page_num, 'duplicate_of': entry['pdf'],
+                                    'duplicate_page': entry['page'], 'match': match, 'distance': distance,
+                                    'correlation': correlation})
+
+    def lookup(self, pdf_path, page_num, thumbnail):
+        """
+        查找与当前页面重复的已识别页面，返回 (复用的 OCRPageResult 或 None, 页面签名)
+
+        只有内容完全相同且启用 reuse 时才返回复用结果；没有复用时，页面识别完成后用返回的签名调用 add
+        加入索引（同时与外观相似的页面比较识别文本）。页面无法打开时签名为None
+        """
+        pdf_path = os.path.abspath(pdf_path)
+        page = self._get_page(pdf_path, page_num)
+        if page is None:
+            return None, None
+        height, width = thumbnail.shape[:2]
+        signature = {'hash': perceptual_hash(thumbnail), 'content': page_content_digest(page),
+                     'size': [int(width), int(height)], 'similar': []}
+
+        with self._lock:
+            entry = self._contents.get(signature['content'])
+            hashes = self._hashes
+        if entry is not None and not (entry['pdf'] == pdf_path and entry['page'] == page_num):
+            stored = self._load_result(entry) if self.reuse else None
+            if stored is not None:
+                self._record(pdf_path, page_num, entry, 'reused', 0, 1.0)
+                meta = dict(stored.meta, source='duplicate', duplicate_of={'pdf': entry['pdf'], 'page': entry['page']})
+                return OCRPageResult(stored.texts, stored.scores, stored.polys if stored.has_polys else None,
+                                     meta=meta), signature
+            signature['identical'] = entry
+            return None, signature
+
+        signature['similar'] = self._find_similar(pdf_path, page_num, thumbnail,
+                                                  hamming_distances(hashes, signature['hash']))
+        return None, signature
+
+    def add(self, pdf_path, page_num, signature, page_result):
+        """
+        将识别完成的页面加入索引（结果先写入，再追加索引行），并与内容相同或外观相似的页面比较识别文本；
+        同一页面内容已在索引中时不重复加入
+        """
+        pdf_path = os.path.abspath(pdf_path)
+        if signature.get('identical') is not None:
+            self._record(pdf_path, page_num, signature['identical'], 'identical', 0, 1.0)
+        for entry, distance, correlation in signature['similar']:
+            stored = self._load_result(entry)
+            if stored is not None and "".join(stored.texts) == "".join(page_result.texts):
+                self._record(pdf_path, page_num, entry, 'same_text', distance, correlation)
+
+        key = (pdf_path, page_num, f"{signature['hash']:016x}")
+        with self._lock:
+            if key in self._keys:
+                return
+            entry_id = self._next_id
+            path = self._result_path(entry_id)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if os.path.exists(path):
+                    os.remove(path)
+                append_page_result(path, 0, page_result)
+                entry = {'id': entry_id, 'pdf': key[0], 'page': page_num, 'hash': key[2],
+                         'content': signature['content'], 'size': signature['size']}
+                with open(self._index_path(), 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"重复页索引写入失败: {str(e)}")
+                return
+            self.entries.append(entry)
+            self._keys.add(key)
+            self._contents.setdefault(entry['content'], entry)
+            self._next_id += 1
+            self._hashes = np.append(self._hashes, np.uint64(signature['hash']))
+
+    def write_report(self, report_path):
+        """
+        将本次运行发现的重复页写入Markdown报告，没有重复页时不生成文件并返回None
+        """
+        with self._lock:
+            duplicates = list(self.duplicates)
+        if not duplicates:
+            return None
+        reused = sum(1 for item in duplicates if item['match'] == 'reused')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("# 重复页面报告\n\n")
+            f.write(f"共发现 {len(duplicates)} 个重复页面，其中 {reused} 页复用了之前的识别结果。\n\n")
+            f.write("| 文件 | 页码 | 重复于 | 页码 | 判定 | 哈希距离 | 相关系数 |\n")
+            f.write("| --- | --- | --- | --- | --- | --- | --- |\n")
+            for item in duplicates:
+                f.write(f"| {item['pdf']} | {item['page'] + 1} | {item['duplicate_of']} | {item['duplicate_page'] + 1} "
+                        f"| {MATCH_LABELS[item['match']]} | {item['distance']} | {item['correlation']:.3f} |\n")
+        return report_path
+
+    def close(self):
+        for doc in self._docs.values():
+            doc.close()
+        self._docs = {}
@@ -6,20 +6,41 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from datetime import datetime
-import subprocess
 import threading
 from pathlib import Path
 import shutil
 import fitz
-from paddleocr import PaddleOCR
-import cv2
-from PIL import Image
 import numpy as np
 import json
 import re
 import ast
+from ocr_image_utils import (render_page_for_ocr, render_page_clip, prepare_ocr_input, save_debug_image,
+                             reset_preprocess_timings, preprocess_timing_report)
+from ocr_worker_pool import OCRWorkerPool
+from ocr_pipeline import OCRPipeline
+from ocr_result import OCRPageResult, normalize_ocr_result, apply_preprocess_info
+from ocr_result_store import OCR_STORE_FILENAME, TOC_STORE_FILENAME, reset_store, append_page_result, load_page_results
+from ocr_engine import get_ocr_engine, get_engine_metrics, is_ocr_engine_loaded
+from ocr_cache import OCRResultCache, page_cache_key, predict_with_cache
+from text_layer_probe import probe_text_layer, page_image_scale
+from page_thumbnail import probe_blank_page, is_blank_result, render_page_thumbnail, BLANK_PAGE_TEXT
+from duplicate_pages import DuplicatePageIndex, DUPLICATE_REPORT_FILENAME
+from ocrmypdf_runner import OCRmyPDFRunner, OCRmyPDFJob, plan_concurrency, DEFAULT_SHARD_PAGES
+from markdown_writer import StreamingMarkdownWriter, markdown_path, page_markdown, NO_TEXT_PLACEHOLDER
+from pdf_text_layer import SearchablePDFWriter, searchable_pdf_path
+from adaptive_ocr import AdaptiveDPI
+from cover_templates import CoverTemplateMatcher, region_rects, merge_region_results
+from job_manifest import JobManifest, MANIFEST_FILENAME
+
+# 目录页预判：以低分辨率只识别页面顶部区域，确认是目录页后再进行完整OCR
+TOC_PROBE_DPI = 100
+TOC_HEADER_RATIO = 0.3
 
 class OCRTableParser:
+    # 向量化计算所用的文本框数值字段
+    BOX_DTYPE = np.dtype([('x', np.float64), ('w', np.float64), ('h', np.float64),
+                          ('cx', np.float64), ('cy', np.float64)])
+
     def __init__(self):
         self.boxes = []
         # 用于判断行聚类的阈值（行高的一半）
@@ -98,68 +119,80 @@ class OCRTableParser:
         
         self.boxes = []
         for i in range(limit):
-            text = rec_texts[i].strip()
-            # 忽略非表格内容的干扰项（如页眉、页码噪音）
-            if text in ['处理的图像:', '原始PDF页面:', '详细结果:', 'array', '卷内文件目录'] or text.startswith('{') or text.startswith('['):
-                continue
-                
-            # 简单的文本清洗，防止OCR识别出的多余引号或空白
-            text = text.strip("'\"") 
-                
             # 解析坐标字符串 "581, 121],\n ..., \n [580, 180"
             # 提取所有数字
             nums = [int(n) for n in re.findall(r'\d+', polys_matches[i])]
             if len(nums) >= 8: # 4个点，每个点2个坐标
-                # 提取四个点坐标 (x1,y1, x2,y2, x3,y3, x4,y4)
-                points = list(zip(nums[0::2], nums[1::2]))
-                
-                # 计算边界框
-                xs = [p[0] for p in points]
-                ys = [p[1] for p in points]
-                min_x, max_x = min(xs), max(xs)
-                min_y, max_y = min(ys), max(ys)
-                center_y = (min_y + max_y) / 2
-                center_x = (min_x + max_x) / 2
-                height = max_y - min_y
-                
-                self.boxes.append({
-                    'text': text,
-                    'x': min_x,
-                    'y': min_y,
-                    'w': max_x - min_x,
-                    'h': height,
-                    'cy': center_y,
-                    'cx': center_x
-                })
+                # 提取各点坐标 (x1,y1, x2,y2, x3,y3, x4,y4)
+                xs = nums[0::2]
+                ys = nums[1::2]
+                self.add_box(rec_texts[i], min(xs), min(ys), max(xs), max(ys))
+
+    def load_page_result(self, page_result):
+        """
+        直接从结构化的OCRPageResult加载文本框，无需字符串转换和正则解析
+        """
+        self.boxes = []
+        if not page_result.has_polys:
+            return
+            
+        # 一次性计算所有文本框的外接矩形
+        bboxes = page_result.bounding_boxes().tolist()
+        for text, (min_x, min_y, max_x, max_y) in zip(page_result.texts, bboxes):
+            self.add_box(text, min_x, min_y, max_x, max_y)
+
+    def add_box(self, text, min_x, min_y, max_x, max_y):
+        """
+        清洗文本并按外接矩形添加一个文本框
+        """
+        text = text.strip()
+        # 忽略非表格内容的干扰项（如页眉、页码噪音）
+        if text in ['处理的图像:', '原始PDF页面:', '详细结果:', 'array', '卷内文件目录'] or text.startswith('{') or text.startswith('['):
+            return
+            
+        # 简单的文本清洗，防止OCR识别出的多余引号或空白
+        text = text.strip("'\"") 
+        
+        self.boxes.append({
+            'text': text,
+            'x': min_x,
+            'y': min_y,
+            'w': max_x - min_x,
+            'h': max_y - min_y,
+            'cy': (min_y + max_y) / 2,
+            'cx': (min_x + max_x) / 2
+        })
+
+    def box_array(self):
+        """
+        将文本框的坐标字段转换为结构化数组，下标与 self.boxes 一一对应
+        """
+        boxes = np.empty(len(self.boxes), dtype=self.BOX_DTYPE)
+        for field in self.BOX_DTYPE.names:
+            boxes[field] = [b[field] for b in self.boxes]
+        return boxes
+
+    def cluster_rows(self, boxes):
+        """
+        按中心Y坐标分行，返回每行文本框下标数组的列表
+
+        按中心Y排序一次后，相邻文本框中心Y的间距不小于前一个框高度的0.6倍处即为行的分界
+        """
+        order = np.argsort(boxes['cy'], kind='stable')
+        cys = boxes['cy'][order]
+        heights = boxes['h'][order]
+        # 间距小于阈值视为同一行（稍微放宽阈值）
+        breaks = np.nonzero(np.diff(cys) >= heights[:-1] * 0.6)[0] + 1
+        return np.split(order, breaks)
 
     def to_markdown(self):
         if not self.boxes:
             return "No data found."
 
-        # 1. 按 Y 坐标排序
-        sorted_boxes = sorted(self.boxes, key=lambda b: b['cy'])
-        
-        # 2. 动态聚类分行
-        rows = []
-        if not sorted_boxes:
-            return ""
-            
-        current_row = [sorted_boxes[0]]
-        current_row_y = sorted_boxes[0]['cy']
-        avg_height = sorted_boxes[0]['h']
-
-        for box in sorted_boxes[1:]:
-            # 如果当前框的中心Y 与 当前行的中心Y 差距小于 阈值，则视为同一行
-            if abs(box['cy'] - current_row_y) < (avg_height * 0.6): # 稍微放宽阈值
-                current_row.append(box)
-                # 更新当前行的加权Y中心
-                current_row_y = sum(b['cy'] for b in current_row) / len(current_row)
-            else:
-                rows.append(current_row)
-                current_row = [box]
-                current_row_y = box['cy']
-                avg_height = box['h'] # 更新参考高度
-        rows.append(current_row)
+        # 1-2. 按 Y 坐标排序并动态聚类分行
+        boxes = self.box_array()
+        row_indices = self.cluster_rows(boxes)
+        rows = [[self.boxes[k] for k in indices.tolist()] for indices in row_indices]
 
         # 3. 寻找表头行 (包含特定关键字的行)
         header_keywords = ['顺序号', '日期', '文号', '责任者', '题名', '备注', '页号']
@@ -214,40 +247,27 @@ class OCRTableParser:
         
         # 5. 构建表格数据
         table_data = []
-        
-        # 从表头下一行开始处理
-        for row in rows[header_row_idx + 1:]:
-            row.sort(key=lambda b: b['cx'])
-            
-            # 创建一个空行，长度与表头一致
-            row_cells = [""] * col_count
-            
-            for box in row:
-                # 找到该box最匹配的列 (最近的X中心)
-                best_col_idx = -1
-                min_dist = float('inf')
-                
-                for col_idx, col in enumerate(columns):
-                    dist = abs(box['cx'] - col['cx'])
-                    if dist < min_dist:
-                        min_dist = dist
-                        best_col_idx = col_idx
-                
-                # 阈值判断：如果距离太远（比如超过了列宽），可能这行格式不对，但这里强制归位
-                # 放宽阈值，允许更大的距离，确保不会遗漏列
-                if best_col_idx != -1 and min_dist < (col['w'] * 2.0):  # 增加阈值到2.0倍列宽
-                    if row_cells[best_col_idx]:
-                        row_cells[best_col_idx] += " " + box['text']
-                    else:
-                        row_cells[best_col_idx] = box['text']
-                # 即使超出阈值，也要确保文本不丢失，添加到最近的列
-                elif best_col_idx != -1:
-                    if row_cells[best_col_idx]:
-                        row_cells[best_col_idx] += " " + box['text']
-                    else:
-                        row_cells[best_col_idx] = box['text']
-            
-            table_data.append(row_cells)
+        body_rows = row_indices[header_row_idx + 1:]
+        if body_rows:
+            # 表头之后的所有文本框按 (行, 中心X) 稳定排序，保证单元格内文本按从左到右拼接
+            body = np.concatenate(body_rows)
+            body_row_ids = np.repeat(np.arange(len(body_rows)), [len(indices) for indices in body_rows])
+            order = np.lexsort((boxes['cx'][body], body_row_ids))
+            body = body[order]
+            body_row_ids = body_row_ids[order]
+
+            # 一次性计算所有文本框到各列中心的距离，取最近的列（距离相同时取靠前的列）
+            # 超出列宽阈值的文本框同样归入最近的列，确保文本不丢失
+            col_cx = np.array([col['cx'] for col in columns], dtype=np.float64)
+            best_cols = np.abs(boxes['cx'][body][:, None] - col_cx[None, :]).argmin(axis=1)
+
+            table_data = [[""] * col_count for _ in body_rows]
+            for k, row_id, col_idx in zip(body.tolist(), body_row_ids.tolist(), best_cols.tolist()):
+                row_cells = table_data[row_id]
+                if row_cells[col_idx]:
+                    row_cells[col_idx] += " " + self.boxes[k]['text']
+                else:
+                    row_cells[col_idx] = self.boxes[k]['text']
 
         # 6. 纵向合并逻辑 (Handling Nested/Wrapped Lines)
         # 如果一行缺少"顺序号"（第一列），且内容主要集中在"题名"列，将其合并到上一行
@@ -349,6 +369,20 @@ class PDFProcessorGUI:
         self.engine_choice = tk.StringVar(value="ocrmypdf")  # 默认使用ocrmypdf
         self.extract_toc_only = tk.BooleanVar(value=False)
         self.reprocess_mode = tk.BooleanVar(value=False)  # 新增：跳过OCR重新处理模式
+        self.save_debug_images = tk.BooleanVar(value=False)  # 调试：保存中间图像到过程文件夹
+        self.worker_count = tk.IntVar(value=1)  # PaddleOCR并行工作进程数，1为单进程
+        self.batch_size = tk.IntVar(value=4)  # 每次提交给PaddleOCR识别的页面数
+        self.use_ocr_cache = tk.BooleanVar(value=True)  # 复用已识别过的相同页面的OCR结果
+        self.resume_jobs = tk.BooleanVar(value=True)  # 断点续跑：跳过已完成的文件和页面
+        self.use_text_layer = tk.BooleanVar(value=True)  # 页面自带文本层时直接使用，不再OCR
+        self.use_cover_templates = tk.BooleanVar(value=True)  # 封面版式匹配后只识别模板区域
+        self.use_adaptive_dpi = tk.BooleanVar(value=False)  # 先低DPI识别，只对低置信度区域提高DPI重新识别
+        self.skip_blank_pages = tk.BooleanVar(value=True)  # 缩略图检查空白页，空白页不再识别
+        self.detect_duplicate_pages = tk.BooleanVar(value=True)  # 跨卷重复页检测，生成重复页报告
+        self.reuse_duplicate_pages = tk.BooleanVar(value=False)  # 内容完全相同的重复页（同一来源的封面、通知书等）复用识别结果
+        self.shard_large_pdfs = tk.BooleanVar(value=True)  # 大文件按页面范围拆分后并行处理，完成后合并
+        self.save_page_files = tk.BooleanVar(value=False)  # 额外保存逐页的文本/表格过程文件（MD文件直接流式写出）
+        self.save_searchable_pdf = tk.BooleanVar(value=False)  # PaddleOCR同一次识别结果同时生成带文本层的可搜索PDF
         
         # 处理控制标志
         self.should_cancel = False
@@ -359,6 +393,18 @@ class PDFProcessorGUI:
         # 存储处理线程
         self.process_thread = None
         
+        # OCR结果缓存（首次使用时创建）
+        self.ocr_cache = None
+        
+        # 当前批处理任务清单（每次处理开始时打开）
+        self.job_manifest = None
+        
+        # 封面版式模板匹配器（每次提取目录页时重新匹配）
+        self.cover_matcher = None
+        
+        # 正在运行的OCRmyPDF调度器（取消时立即终止其子进程）
+        self.ocrmypdf_runner = None
+        
     def create_widgets(self):
         # 主框架
         main_frame = ttk.Frame(self.root, padding="10")
@@ -391,21 +437,46 @@ class PDFProcessorGUI:
         ttk.Radiobutton(engine_frame, text="OCRmyPDF (Tesseract)", variable=self.engine_choice, value="ocrmypdf").pack(side=tk.LEFT)
         ttk.Radiobutton(engine_frame, text="PaddleOCR", variable=self.engine_choice, value="paddleocr").pack(side=tk.LEFT, padx=(20, 0))
         
+        # PaddleOCR并行进程数
+        ttk.Label(engine_frame, text="并行进程数:").pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Spinbox(engine_frame, from_=1, to=max(1, os.cpu_count() or 1), width=4, textvariable=self.worker_count).pack(side=tk.LEFT, padx=(5, 0))
+        
+        # PaddleOCR批量识别大小
+        ttk.Label(engine_frame, text="批大小:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(engine_frame, from_=1, to=32, width=4, textvariable=self.batch_size).pack(side=tk.LEFT, padx=(5, 0))
+        
         # 目录页单独输出选项
-        toc_check = ttk.Checkbutton(main_frame, text="单独输出目录页", variable=self.extract_toc_only)
-        toc_check.grid(row=4, column=1, sticky=tk.W, pady=5, padx=(10, 10))
+        toc_frame = ttk.Frame(main_frame)
+        toc_frame.grid(row=4, column=1, sticky=tk.W, pady=5, padx=(10, 10))
+        ttk.Checkbutton(toc_frame, text="单独输出目录页", variable=self.extract_toc_only).pack(side=tk.LEFT)
+        ttk.Checkbutton(toc_frame, text="封面按版式模板只识别关键区域", variable=self.use_cover_templates).pack(side=tk.LEFT, padx=(20, 0))
         
         # 新增选项：跳过OCR，直接处理过程文件夹
         reprocess_check = ttk.Checkbutton(main_frame, text="跳过OCR，重新处理过程文件夹", variable=self.reprocess_mode)
         reprocess_check.grid(row=5, column=1, sticky=tk.W, pady=5, padx=(10, 10))
         
+        # PaddleOCR附加选项：结果缓存、保存中间图像
+        option_frame = ttk.Frame(main_frame)
+        option_frame.grid(row=6, column=1, sticky=tk.W, pady=5, padx=(10, 10))
+        ttk.Checkbutton(option_frame, text="使用OCR结果缓存", variable=self.use_ocr_cache).pack(side=tk.LEFT)
+        ttk.Checkbutton(option_frame, text="断点续跑", variable=self.resume_jobs).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="优先使用PDF文本层", variable=self.use_text_layer).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="自适应DPI", variable=self.use_adaptive_dpi).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="跳过空白页", variable=self.skip_blank_pages).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="检测重复页", variable=self.detect_duplicate_pages).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="重复页复用识别结果", variable=self.reuse_duplicate_pages).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="大文件分片并行", variable=self.shard_large_pdfs).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="保存逐页过程文件", variable=self.save_page_files).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="同时输出可搜索PDF", variable=self.save_searchable_pdf).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(option_frame, text="保存中间图像（调试用，较慢）", variable=self.save_debug_images).pack(side=tk.LEFT, padx=(20, 0))
+        
         # 文件名规则说明
         rule_label = ttk.Label(main_frame, text="输出文件名规则: 文件末尾增加 '_ocr_YYYYMMDD'", foreground="gray")
-        rule_label.grid(row=6, column=1, sticky=tk.W, pady=5, padx=(10, 10))
+        rule_label.grid(row=7, column=1, sticky=tk.W, pady=5, padx=(10, 10))
         
         # 处理按钮
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=7, column=0, columnspan=3, pady=30)
+        button_frame.grid(row=8, column=0, columnspan=3, pady=30)
         
         self.start_button = ttk.Button(button_frame, text="开始处理", command=self.start_processing)
         self.start_button.pack(side=tk.LEFT, padx=(0, 10))
@@ -415,13 +486,13 @@ class PDFProcessorGUI:
         
         # 进度条
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        self.progress.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
         
         # 日志文本框
-        ttk.Label(main_frame, text="处理日志:").grid(row=9, column=0, sticky=tk.W, pady=(10, 5))
+        ttk.Label(main_frame, text="处理日志:").grid(row=10, column=0, sticky=tk.W, pady=(10, 5))
         
         log_frame = ttk.Frame(main_frame)
-        log_frame.grid(row=10, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        log_frame.grid(row=11, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
@@ -433,7 +504,7 @@ class PDFProcessorGUI:
         log_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         # 配置主框架的行权重
-        main_frame.rowconfigure(10, weight=1)
+        main_frame.rowconfigure(11, weight=1)
         
     def browse_input_folder(self):
         folder = filedialog.askdirectory(initialdir=self.input_folder.get())
@@ -493,66 +564,219 @@ class PDFProcessorGUI:
     def cancel_processing(self):
         self.log_message("正在取消处理...")
         self.should_cancel = True
+        # OCRmyPDF子进程立即终止，不必等待当前文件处理完成
+        if self.ocrmypdf_runner is not None:
+            self.ocrmypdf_runner.cancel()
         
     def finish_processing(self):
         self.progress.stop()
         self.start_button.config(state=tk.NORMAL)
         self.cancel_button.config(state=tk.DISABLED)
         
-    def preprocess_image_for_ocr(self, image_path):
+    def get_int_option(self, variable, default=1):
         """
-        对图像进行预处理以提高OCR识别效果 (与测试代码保持一致)
+        读取界面中的整数选项，非法输入时返回默认值
         """
         try:
-            # 读取图像
-            img = cv2.imread(image_path)
-            
-            # 转换为灰度图
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            return max(1, int(variable.get()))
+        except (tk.TclError, ValueError):
+            return default
             
-            # 应用高斯模糊以减少噪声
-            blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    def load_ocr_engine(self):
+        """
+        获取进程内共享的PaddleOCR实例，首次使用时加载模型并记录耗时
+        """
+        # 与测试代码保持一致的配置
+        if is_ocr_engine_loaded('ch'):
+            self.log_message("复用已加载的PaddleOCR模型")
+            return get_ocr_engine('ch')
             
-            # 应用阈值处理以增强对比度
-            _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        self.log_message("初始化PaddleOCR...")
+        try:
+            ocr = get_ocr_engine('ch')
+            metrics = get_engine_metrics()
+            self.log_message(f"PaddleOCR初始化成功! 模型加载耗时: {metrics['last_load_seconds']:.2f}秒")
+            return ocr
+        except Exception as e:
+            self.log_message(f"PaddleOCR初始化失败: {str(e)}")
+            return None
             
-            # 保存预处理后的图像
-            processed_path = image_path.replace('.png', '_processed.png')
-            cv2.imwrite(processed_path, thresh)
+    def get_ocr_cache(self):
+        """
+        获取OCR结果缓存，未启用缓存时返回None
+        """
+        if not self.use_ocr_cache.get():
+            return None
+        if self.ocr_cache is None:
+            try:
+                self.ocr_cache = OCRResultCache()
+                self.log_message(f"OCR结果缓存目录: {self.ocr_cache.cache_dir}")
+            except Exception as e:
+                self.log_message(f"OCR结果缓存初始化失败，本次不使用缓存: {str(e)}")
+                return None
+        return self.ocr_cache
+        
+    def get_adaptive_dpi(self):
+        """
+        获取自适应DPI设置，未启用时返回None（固定200 DPI）
+        """
+        if not self.use_adaptive_dpi.get():
+            return None
+        adaptive = AdaptiveDPI(reference_dpi=200, max_size=2000)
+        self.log_message(f"自适应DPI: 先以 {adaptive.low_dpi} DPI 识别，低置信度区域以 {adaptive.high_dpi} DPI 重新识别")
+        return adaptive
+        
+    def get_duplicate_index(self):
+        """
+        获取跨卷重复页索引，未启用或初始化失败时返回None
+
+        检测重复页时总会生成重复页报告；只有勾选复用时，内容完全相同的页面才直接使用之前的识别结果
+        """
+        reuse = self.reuse_duplicate_pages.get()
+        if not (reuse or self.detect_duplicate_pages.get()):
+            return None
+        try:
+            index = DuplicatePageIndex(reuse=reuse)
+            self.log_message(f"重复页索引: {index.index_dir}（已记录 {len(index)} 页，{'复用' if reuse else '不复用'}重复页识别结果）")
+            return index
+        except Exception as e:
+            self.log_message(f"重复页索引初始化失败，本次不检测重复页: {str(e)}")
+            return None
             
-            self.log_message(f"  图像预处理完成，保存到: {processed_path}")
-            return processed_path
+    def finish_duplicate_index(self, index, processed_folder):
+        """
+        写出本次运行的重复页报告并关闭索引
+        """
+        if index is None:
+            return
+        try:
+            report_path = index.write_report(os.path.join(processed_folder, DUPLICATE_REPORT_FILENAME))
+            if report_path:
+                self.log_message(f"发现 {len(index.duplicates)} 个重复页面，报告已保存到 {report_path}")
         except Exception as e:
-            self.log_message(f"  图像预处理失败: {str(e)}")
-            return image_path
-
-    def resize_image_if_needed(self, image_path, max_size=2000):
+            self.log_message(f"重复页报告写入失败: {str(e)}")
+        finally:
+            index.close()
+        
+    def prepare_page_image(self, page, pdf_process_folder, image_name, info=None):
         """
-        如果图片尺寸超过指定大小，则调整图片尺寸 (与测试代码保持一致)
+        在内存中渲染并预处理页面图像，返回 (OCR输入数组, 图像标识, 缓存键)
+
+        info 为字典时记录方向和倾斜纠正信息；仅在勾选"保存中间图像"调试选项时才将中间图像写入过程文件夹
         """
+        rendered, ocr_input = render_page_for_ocr(page, dpi=200, max_size=2000, info=info)
+        cache_key = page_cache_key(rendered, dpi=200, max_size=2000) if self.use_ocr_cache.get() else None
+        
+        if not self.save_debug_images.get():
+            return ocr_input, f"{image_name} (内存图像)", cache_key
+            
         try:
-            # 打开图片
-            img = Image.open(image_path)
-            width, height = img.size
+            temp_image_path = os.path.join(pdf_process_folder, f"{image_name}_temp.png")
+            processed_image_path = os.path.join(pdf_process_folder, f"{image_name}_temp_processed.png")
+            save_debug_image(rendered, temp_image_path)
+            save_debug_image(ocr_input, processed_image_path)
+            self.log_message(f"  调试图像已保存到: {processed_image_path}")
+            return ocr_input, os.path.basename(processed_image_path), cache_key
+        except Exception as e:
+            self.log_message(f"  保存调试图像失败: {str(e)}")
+            return ocr_input, f"{image_name} (内存图像)", cache_key
             
-            # 检查是否需要调整尺寸
-            if width > max_size or height > max_size:
-                # 计算缩放比例
-                ratio = min(max_size/width, max_size/height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                
-                # 调整图片尺寸
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    def recognize_pages(self, ocr, doc, page_nums, pdf_process_folder, image_names, batch_size):
+        """
+        识别PDF中的若干页面，返回 [(图像标识, 结果), ...]
+
+        页面自带合格的文本层时直接使用文本层、空白页直接跳过（结果为OCRPageResult），其余页面渲染后批量识别
+        """
+        items = [None] * len(page_nums)
+        pending = []
+        inputs = []
+        cache_keys = []
+        infos = []
+        for i, (page_num, image_name) in enumerate(zip(page_nums, image_names)):
+            native = probe_text_layer(doc[page_num], dpi=200, max_size=2000) if self.use_text_layer.get() else None
+            if native is not None:
+                items[i] = (f"{image_name} (PDF文本层)", native)
+                continue
+            blank = probe_blank_page(doc[page_num]) if self.skip_blank_pages.get() else None
+            if blank is not None:
+                items[i] = (f"{image_name} (空白页)", blank)
+                continue
+            info = {}
+            ocr_input, image_label, cache_key = self.prepare_page_image(doc[page_num], pdf_process_folder, image_name, info)
+            pending.append((i, image_label))
+            inputs.append(ocr_input)
+            cache_keys.append(cache_key)
+            infos.append(info)
+            
+        if len(pending) < len(page_nums):
+            self.log_message(f"  {len(page_nums) - len(pending)}/{len(page_nums)} 页使用PDF自带文本层或为空白页，跳过OCR")
+        if pending:
+            results = self.recognize_images(ocr, inputs, cache_keys, batch_size)
+            for (i, image_label), result, info in zip(pending, results, infos):
+                items[i] = (image_label, apply_preprocess_info(result, info))
+        return items
+        
+    def recognize_cover(self, ocr, doc, pdf_process_folder):
+        """
+        识别封面，返回 (图像标识, 结果)
+
+        封面版式已确认时只渲染并识别模板区域；否则整页识别，并用结果匹配版式模板
+        """
+        page = doc[0]
+        matcher = self.cover_matcher
+        if self.use_text_layer.get():
+            native = probe_text_layer(page, dpi=200, max_size=2000)
+            if native is not None:
+                return "cover (PDF文本层)", native
                 
-                # 保存调整后的图片
-                img.save(image_path)
-                self.log_message(f"  图片尺寸已从 {width}x{height} 调整为 {new_width}x{new_height}")
+        if matcher is not None and matcher.active is not None:
+            template = matcher.active
+            page_result = self.recognize_cover_regions(ocr, page, template)
+            scale = page_image_scale(page, dpi=200, max_size=2000)
+            image_size = (int(page.rect.width * scale), int(page.rect.height * scale))
+            if matcher.verify(page_result, image_size, render_page_thumbnail(page)):
+                return f"cover (版式模板: {template['name']})", page_result
+            self.log_message(f"  封面区域识别结果与版式模板 {template['name']} 不符（关键词不足或有文字未被识别），改为整页识别")
+            matcher.reset()
             
-            return image_path
-        except Exception as e:
-            self.log_message(f"  调整图片尺寸时出错: {str(e)}")
-            return image_path
+        image_label, result = self.recognize_pages(ocr, doc, [0], pdf_process_folder, ["cover"], 1)[0]
+        # 纠正过方向的封面坐标与版式模板不对应，不参与版式匹配
+        if matcher is not None and not (isinstance(result, OCRPageResult) and result.meta.get('orientation')):
+            page_result = normalize_ocr_result(result)
+            scale = page_image_scale(page, dpi=200, max_size=2000)
+            template = matcher.observe(page_result, (int(page.rect.width * scale), int(page.rect.height * scale)))
+            if template is not None:
+                self.log_message(f"  封面版式已确认: {template['name']}，后续封面只识别模板区域")
+        return image_label, result
+        
+    def recognize_cover_regions(self, ocr, page, template):
+        """
+        按模板只渲染并识别封面的关键区域，结果坐标换算回整页图像坐标
+        """
+        scale = page_image_scale(page, dpi=200, max_size=2000)
+        region_dpi = max(1, int(round(scale * 72)))
+        region_scale = scale * 72 / region_dpi
+        
+        inputs = []
+        cache_keys = []
+        offsets = []
+        for x0, y0, x1, y1 in region_rects(page.rect, template):
+            region = render_page_clip(page, fitz.Rect(x0, y0, x1, y1), dpi=region_dpi)
+            inputs.append(prepare_ocr_input(region))
+            cache_keys.append(page_cache_key(region, dpi=region_dpi, region=template['name']) if self.use_ocr_cache.get() else None)
+            offsets.append(((x0 - page.rect.x0) * scale, (y0 - page.rect.y0) * scale))
+            
+        results = self.recognize_images(ocr, inputs, cache_keys, len(inputs))
+        return merge_region_results([OCRPageResult.from_predict(result) for result in results], offsets, region_scale)
+        
+    def recognize_images(self, ocr, images, cache_keys, batch_size):
+        """
+        识别一批页面图像：命中缓存的页面跳过识别，其余页面批量提交给PaddleOCR
+        """
+        results, cache_hits = predict_with_cache(ocr, images, cache_keys, self.get_ocr_cache(), batch_size)
+        if cache_hits:
+            self.log_message(f"  {cache_hits}/{len(images)} 页命中OCR结果缓存，跳过识别")
+        return results
 
     def is_toc_page(self, text):
         """
@@ -564,6 +788,28 @@ class PDFProcessorGUI:
             return "目录" in first_line
         return False
 
+    def classify_toc_page(self, ocr, page):
+        """
+        低成本预判页面是否为目录页：返回 (类别, 整页结果)，类别为 'toc'、'other'，页面顶部没有文字（无法判断）时为None
+
+        优先使用PDF自带文本层（此时整页结果为文本层结果，完整识别时直接复用），否则以低DPI渲染页面顶部区域
+        并只识别该区域（整页结果为None）
+        """
+        if self.use_text_layer.get():
+            native = probe_text_layer(page)
+            if native is not None:
+                return ('toc' if self.is_toc_page("\n".join(native.texts)) else 'other'), native
+                
+        rect = page.rect
+        clip = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * TOC_HEADER_RATIO)
+        header = render_page_clip(page, clip, dpi=TOC_PROBE_DPI)
+        cache_key = page_cache_key(header, dpi=TOC_PROBE_DPI, region='toc-header') if self.use_ocr_cache.get() else None
+        result = self.recognize_images(ocr, [prepare_ocr_input(header)], [cache_key], 1)[0]
+        texts = [text for text in OCRPageResult.from_predict(result).texts if text.strip()]
+        if not texts:
+            return None, None
+        return ('toc' if self.is_toc_page("\n".join(texts)) else 'other'), None
+        
     def format_as_markdown_list(self, text):
         """
         将文本格式化为Markdown列表格式
@@ -726,14 +972,12 @@ class PDFProcessorGUI:
         """
         从OCR结果中解析表格数据，基于坐标位置进行智能分组
         """
-        if not ocr_result or not ocr_result[0]:
+        if not ocr_result:
             return None
             
-        # 创建OCR表格解析器实例
+        # 创建OCR表格解析器实例，直接加载结构化结果
         parser = OCRTableParser()
-        # 将OCR结果转换为文本格式供解析器处理
-        ocr_text = str(ocr_result)
-        parser.parse_log_text(ocr_text)
+        parser.load_page_result(normalize_ocr_result(ocr_result))
         
         # 检查是否真的包含表格内容
         if not parser.has_table_content():
@@ -746,15 +990,12 @@ class PDFProcessorGUI:
         使用PaddleOCR提取目录页 (严格按照用户要求实现)
         """
         self.log_message("开始单独输出目录页内容 (强制使用PaddleOCR)")
+        batch_size = self.get_int_option(self.batch_size)
+        self.cover_matcher = CoverTemplateMatcher() if self.use_cover_templates.get() else None
         
-        # 初始化PaddleOCR，使用与测试代码相同的配置
-        self.log_message("初始化PaddleOCR...")
-        try:
-            # 根据测试结果选择最佳配置，与测试代码保持一致
-            ocr = PaddleOCR(lang='ch')  # 使用与测试代码相同的配置
-            self.log_message("PaddleOCR初始化成功!")
-        except Exception as e:
-            self.log_message(f"PaddleOCR初始化失败: {str(e)}")
+        # 获取共享的PaddleOCR实例（多次运行之间复用已加载的模型）
+        ocr = self.load_ocr_engine()
+        if ocr is None:
             return
             
         for i, pdf_file in enumerate(pdf_files):
@@ -765,6 +1006,8 @@ class PDFProcessorGUI:
                 
             try:
                 self.log_message(f"处理文件 ({i+1}/{len(pdf_files)}): {os.path.basename(pdf_file)}")
+                if self.is_job_complete(pdf_file, 'toc'):
+                    continue
                 
                 # 打开PDF文件
                 doc = fitz.open(pdf_file)
@@ -775,81 +1018,38 @@ class PDFProcessorGUI:
                 # 为当前PDF创建过程文件夹
                 pdf_process_folder = os.path.join(temp_folder, f"{pdf_name}_ocr过程文件")
                 os.makedirs(pdf_process_folder, exist_ok=True)
+                store_path = os.path.join(pdf_process_folder, TOC_STORE_FILENAME)
+                reset_store(store_path)
                 
                 # 处理封面（第1页）
                 self.log_message(f"  处理封面 (第1页)...")
-                page = doc[0]  # 封面页
-                
-                # 将页面转换为图像
-                pix = page.get_pixmap(dpi=200)
-                temp_image_path = os.path.join(pdf_process_folder, f"cover_temp.png")
-                pix.save(temp_image_path)
                 
-                # 图像预处理
-                temp_image_path = self.resize_image_if_needed(temp_image_path, max_size=2000)
-                processed_image_path = self.preprocess_image_for_ocr(temp_image_path)
-                processed_image_path = self.resize_image_if_needed(processed_image_path, max_size=2000)
-                
-                # OCR识别
+                # OCR识别（在内存中渲染并预处理页面图像；有文本层时直接使用文本层）
                 self.log_message(f"  正在对封面进行OCR识别...")
-                result = ocr.predict(processed_image_path)
+                image_label, result = self.recognize_cover(ocr, doc, pdf_process_folder)
+                
+                # 结构化结果写入二进制结果文件（封面为第0页记录）
+                page_result = self.save_page_result(store_path, 0, result)
                 
-                # 保存完整的OCR结果到过程文件
+                # 保存OCR结果摘要到过程文件
                 full_result_file = os.path.join(pdf_process_folder, f"cover_full_result.txt")
                 with open(full_result_file, 'w', encoding='utf-8') as f:
                     f.write("OCR结果 - 封面\n")
                     f.write("=" * 50 + "\n")
-                    f.write(f"处理的图像: {os.path.basename(processed_image_path)}\n")
+                    f.write(f"处理的图像: {image_label}\n")
                     f.write(f"原始PDF页面: 1\n\n")
-                    f.write("详细结果:\n")
-                    f.write(str(result) + "\n\n")
+                    f.write(f"结构化结果: {TOC_STORE_FILENAME}\n\n")
                     
-                    # 提取解析后的文本部分 (严格按照已验证代码处理)
-                    if result and result[0]:
+                    # 提取解析后的文本部分
+                    if len(page_result):
                         f.write("解析后的文本:\n")
-                        texts = []
-                        if isinstance(result[0], dict):
-                            if 'rec_texts' in result[0]:
-                                texts = result[0]['rec_texts']
-                            elif 'text' in result[0]:
-                                texts = [result[0]['text']]
-                        elif isinstance(result[0], list):
-                            for item in result[0]:
-                                if isinstance(item, list) and len(item) > 1:
-                                    if isinstance(item[1], list) and len(item[1]) > 0:
-                                        texts.append(str(item[1][0]))
-                                    elif isinstance(item[1], (str, int, float)):
-                                        texts.append(str(item[1]))
-                                elif isinstance(item, dict) and 'text' in item:
-                                    texts.append(item['text'])
-                                elif isinstance(item, str):
-                                    texts.append(item)
-                        
-                        for i, text in enumerate(texts, 1):
+                        for i, text in enumerate(page_result.texts, 1):
                             f.write(f"{i}. {text}\n")
                 
                 # 提取解析后的文本并保存为TXT
                 cover_text = ""
-                if result and result[0]:
-                    # 解析OCR结果（严格按照已验证代码处理）
-                    texts = []
-                    if isinstance(result[0], dict):
-                        if 'rec_texts' in result[0]:
-                            texts = result[0]['rec_texts']
-                        elif 'text' in result[0]:
-                            texts = [result[0]['text']]
-                    elif isinstance(result[0], list):
-                        for item in result[0]:
-                            if isinstance(item, list) and len(item) > 1:
-                                if isinstance(item[1], list) and len(item[1]) > 0:
-                                    texts.append(str(item[1][0]))
-                                elif isinstance(item[1], (str, int, float)):
-                                    texts.append(str(item[1]))
-                            elif isinstance(item, dict) and 'text' in item:
-                                texts.append(item['text'])
-                            elif isinstance(item, str):
-                                texts.append(item)
-                    
+                if len(page_result):
+                    texts = page_result.texts
                     # 尝试提取结构化数据
                     try:
                         label_map = self.extract_structured_data(texts)
@@ -874,144 +1074,137 @@ class PDFProcessorGUI:
                         f.write("未识别到任何文本")
                     self.log_message(f"  封面未识别到任何文本，已保存到 {cover_txt_file}")
                 
-                # 注释掉删除临时图像文件的代码，保存所有过程文件
-                # if os.path.exists(temp_image_path):
-                #     os.remove(temp_image_path)
-                # if os.path.exists(processed_image_path) and processed_image_path != temp_image_path:
-                #     os.remove(processed_image_path)
-                
                 # 处理目录页（从第2页开始查找）
                 self.log_message(f"  查找目录页 (从第2页开始)...")
-                toc_texts = []
+                # 目录页文本与结构化结果，均以实际页码（从1开始）为键
+                toc_texts = {}
+                toc_page_results = {}
                 toc_found = False
                 
                 # 通常目录在前10页内，从第2页开始查找（封面之后）
+                # 先用低分辨率预判，遇到确定不是目录页的页面即停止；只有预判为目录页
+                # 或无法判断的页面才进行完整OCR，最终仍按完整OCR的结果判断
+                candidate_pages = []
+                # 预判（PDF文本层）或完整识别得到的整页结果，同一页面不重复识别
+                page_items = {}
                 for page_num in range(1, min(10, total_pages)):
-                    # 检查是否需要取消
                     if self.should_cancel:
-                        self.log_message("用户取消处理")
-                        doc.close()
-                        return
-                    
-                    page = doc[page_num]
-                    
-                    # 将页面转换为图像
-                    pix = page.get_pixmap(dpi=200)
-                    temp_image_path = os.path.join(pdf_process_folder, f"p{page_num+1}_temp.png")
-                    pix.save(temp_image_path)
-                    
-                    # 图像预处理
-                    temp_image_path = self.resize_image_if_needed(temp_image_path, max_size=2000)
-                    processed_image_path = self.preprocess_image_for_ocr(temp_image_path)
-                    processed_image_path = self.resize_image_if_needed(processed_image_path, max_size=2000)
-                    
-                    # OCR识别
-                    self.log_message(f"  正在对第{page_num+1}页进行OCR识别...")
-                    result = ocr.predict(processed_image_path)
-                    
-                    # 保存完整的OCR结果到过程文件
-                    full_result_file = os.path.join(pdf_process_folder, f"p{page_num+1}_full_result.txt")
-                    with open(full_result_file, 'w', encoding='utf-8') as f:
-                        f.write(f"OCR结果 - 第 {page_num+1} 页\n")
-                        f.write("=" * 50 + "\n")
-                        f.write(f"处理的图像: {os.path.basename(processed_image_path)}\n")
-                        f.write(f"原始PDF页面: {page_num+1}\n\n")
-                        f.write("详细结果:\n")
-                        f.write(str(result) + "\n\n")
-                        
-                        # 提取解析后的文本部分 (严格按照已验证代码处理)
-                        if result and result[0]:
-                            f.write("解析后的文本:\n")
-                            texts = []
-                            if isinstance(result[0], dict):
-                                if 'rec_texts' in result[0]:
-                                    texts = result[0]['rec_texts']
-                                elif 'text' in result[0]:
-                                    texts = [result[0]['text']]
-                            elif isinstance(result[0], list):
-                                for item in result[0]:
-                                    if isinstance(item, list) and len(item) > 1:
-                                        if isinstance(item[1], list) and len(item[1]) > 0:
-                                            texts.append(str(item[1][0]))
-                                        elif isinstance(item[1], (str, int, float)):
-                                            texts.append(str(item[1]))
-                                    elif isinstance(item, dict) and 'text' in item:
-                                        texts.append(item['text'])
-                                    elif isinstance(item, str):
-                                        texts.append(item)
-                            
-                            for i, text in enumerate(texts, 1):
-                                f.write(f"{i}. {text}\n")
-                    
-                    # 提取解析后的文本
-                    page_text = ""
-                    if result and result[0]:
-                        # 解析OCR结果（严格按照已验证代码处理）
-                        texts = []
-                        if isinstance(result[0], dict):
-                            if 'rec_texts' in result[0]:
-                                texts = result[0]['rec_texts']
-                            elif 'text' in result[0]:
-                                texts = [result[0]['text']]
-                        elif isinstance(result[0], list):
-                            for item in result[0]:
-                                if isinstance(item, list) and len(item) > 1:
-                                    if isinstance(item[1], list) and len(item[1]) > 0:
-                                        texts.append(str(item[1][0]))
-                                    elif isinstance(item[1], (str, int, float)):
-                                        texts.append(str(item[1]))
-                                elif isinstance(item, dict) and 'text' in item:
-                                    texts.append(item['text'])
-                                elif isinstance(item, str):
-                                    texts.append(item)
-                        
-                        # 尝试提取结构化数据（仅对目录页）
-                        try:
-                            label_map = self.extract_structured_data(texts)
-                            structured_md_table = self.generate_markdown_table(label_map)
-                            # 保存结构化数据到单独的文件
-                            structured_file = os.path.join(pdf_process_folder, f"p{page_num+1}_structured.md")
-                            with open(structured_file, 'w', encoding='utf-8') as f:
-                                f.write(structured_md_table)
-                            self.log_message(f"  第{page_num+1}页结构化数据已保存到 {structured_file}")
-                        except Exception as e:
-                            self.log_message(f"  第{page_num+1}页结构化数据提取失败: {str(e)}")
-                        
-                        # 保存提取的文本
-                        page_text = "\n".join(texts)
-                        page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
-                        with open(page_txt_file, 'w', encoding='utf-8') as f:
-                            f.write(page_text)
-                        self.log_message(f"  第{page_num+1}页OCR完成，识别到 {len(texts)} 条文本，已保存到 {page_txt_file}")
-                    else:
-                        page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
-                        with open(page_txt_file, 'w', encoding='utf-8') as f:
-                            f.write("未识别到任何文本")
-                        self.log_message(f"  第{page_num+1}页未识别到任何文本，已保存到 {page_txt_file}")
-                    
-                    # 删除临时图像文件
-                    if os.path.exists(temp_image_path):
-                        os.remove(temp_image_path)
-                    if os.path.exists(processed_image_path) and processed_image_path != temp_image_path:
-                        os.remove(processed_image_path)
-                    
-                    # 检查是否为目录页（检查首行是否包含"目录"）
-                    if self.is_toc_page(page_text):
-                        toc_texts.append(page_text)
-                        toc_found = True
-                        self.log_message(f"  找到目录页: 第{page_num+1}页")
-                    elif toc_found:
-                        # 如果之前找到过目录页，但现在不是目录页了，就停止查找
-                        self.log_message(f"  目录结束于第{page_num+1}页")
                         break
-                    elif page_text.strip() == "" or "未识别到任何文本" in page_text:
-                        # 如果当前页没有识别到文本，继续下一页
-                        continue
-                    else:
-                        # 如果当前页有文本但不是目录页，则停止处理当前PDF
-                        self.log_message(f"  第{page_num+1}页不是目录页，停止处理当前PDF")
+                    kind, native = self.classify_toc_page(ocr, doc[page_num])
+                    if native is not None:
+                        page_items[page_num] = (f"p{page_num+1} (PDF文本层)", native)
+                    if kind == 'other':
+                        self.log_message(f"  第{page_num+1}页预判不是目录页，停止查找")
                         break
+                    candidate_pages.append(page_num)
+                    if kind == 'toc':
+                        self.log_message(f"  第{page_num+1}页预判为目录页")
                 
+                # 对候选页面按批次进行完整OCR；预判只看页面顶部的低分辨率条带，可能把目录页误判为其他页面，
+                # 没有找到目录页时回退为从第2页开始逐页完整识别（已完整识别过的页面不再重复识别）
+                full_ocr_pages = set()
+                search_end = min(10, total_pages)
+                for search_pages in (candidate_pages, None):
+                    if search_pages is None:
+                        if toc_found or self.should_cancel:
+                            break
+                        search_pages = [page_num for page_num in range(1, search_end) if page_num not in full_ocr_pages]
+                        if not search_pages:
+                            break
+                        self.log_message("  预判未找到目录页，改为逐页完整识别")
+                    toc_search_done = False
+                    for batch_start in range(0, len(search_pages), batch_size):
+                        # 检查是否需要取消
+                        if self.should_cancel:
+                            self.log_message("用户取消处理")
+                            doc.close()
+                            return
+                        
+                        batch_pages = search_pages[batch_start:batch_start + batch_size]
+                        
+                        # 在内存中渲染并预处理本批页面图像，一次提交整批页面识别；预判时已有整页结果的页面不再识别
+                        ocr_pages = [page_num for page_num in batch_pages if page_num not in page_items]
+                        if ocr_pages:
+                            self.log_message(f"  正在对第{ocr_pages[0]+1}-{ocr_pages[-1]+1}页进行OCR识别...")
+                            page_items.update(zip(ocr_pages, self.recognize_pages(
+                                ocr, doc, ocr_pages, pdf_process_folder,
+                                [f"p{page_num+1}" for page_num in ocr_pages], batch_size)))
+                        batch_items = [page_items[page_num] for page_num in batch_pages]
+                        full_ocr_pages.update(batch_pages)
+                        
+                        for page_num, (image_label, result) in zip(batch_pages, batch_items):
+                            # 结构化结果写入二进制结果文件
+                            page_result = self.save_page_result(store_path, page_num, result)
+                            
+                            # 保存OCR结果摘要到过程文件
+                            full_result_file = os.path.join(pdf_process_folder, f"p{page_num+1}_full_result.txt")
+                            with open(full_result_file, 'w', encoding='utf-8') as f:
+                                f.write(f"OCR结果 - 第 {page_num+1} 页\n")
+                                f.write("=" * 50 + "\n")
+                                f.write(f"处理的图像: {image_label}\n")
+                                f.write(f"原始PDF页面: {page_num+1}\n\n")
+                                if page_result.describe_correction():
+                                    f.write(f"页面校正: {page_result.describe_correction()}\n\n")
+                                f.write(f"结构化结果: {TOC_STORE_FILENAME}\n\n")
+                                
+                                # 提取解析后的文本部分
+                                if len(page_result):
+                                    f.write("解析后的文本:\n")
+                                    for i, text in enumerate(page_result.texts, 1):
+                                        f.write(f"{i}. {text}\n")
+                            
+                            # 提取解析后的文本
+                            page_text = ""
+                            if len(page_result):
+                                texts = page_result.texts
+                                # 尝试提取结构化数据（仅对目录页）
+                                try:
+                                    label_map = self.extract_structured_data(texts)
+                                    structured_md_table = self.generate_markdown_table(label_map)
+                                    # 保存结构化数据到单独的文件
+                                    structured_file = os.path.join(pdf_process_folder, f"p{page_num+1}_structured.md")
+                                    with open(structured_file, 'w', encoding='utf-8') as f:
+                                        f.write(structured_md_table)
+                                    self.log_message(f"  第{page_num+1}页结构化数据已保存到 {structured_file}")
+                                except Exception as e:
+                                    self.log_message(f"  第{page_num+1}页结构化数据提取失败: {str(e)}")
+                                
+                                # 保存提取的文本
+                                page_text = "\n".join(texts)
+                                page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
+                                with open(page_txt_file, 'w', encoding='utf-8') as f:
+                                    f.write(page_text)
+                                self.log_message(f"  第{page_num+1}页OCR完成，识别到 {len(texts)} 条文本，已保存到 {page_txt_file}")
+                            else:
+                                page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
+                                with open(page_txt_file, 'w', encoding='utf-8') as f:
+                                    f.write("未识别到任何文本")
+                                self.log_message(f"  第{page_num+1}页未识别到任何文本，已保存到 {page_txt_file}")
+                            
+                            # 检查是否为目录页（检查首行是否包含"目录"）
+                            if self.is_toc_page(page_text):
+                                toc_texts[page_num+1] = page_text
+                                toc_page_results[page_num+1] = page_result
+                                toc_found = True
+                                self.log_message(f"  找到目录页: 第{page_num+1}页")
+                            elif toc_found:
+                                # 如果之前找到过目录页，但现在不是目录页了，就停止查找
+                                self.log_message(f"  目录结束于第{page_num+1}页")
+                                toc_search_done = True
+                                break
+                            elif page_text.strip() == "" or "未识别到任何文本" in page_text:
+                                # 如果当前页没有识别到文本，继续下一页
+                                continue
+                            else:
+                                # 如果当前页有文本但不是目录页，则停止处理当前PDF
+                                self.log_message(f"  第{page_num+1}页不是目录页，停止处理当前PDF")
+                                search_end = page_num
+                                toc_search_done = True
+                                break
+                        
+                        if toc_search_done:
+                            break
+
                 doc.close()
                 
                 # 合并封面和目录页内容为MD文件
@@ -1031,24 +1224,22 @@ class PDFProcessorGUI:
                         f.write("未识别到任何文本")
                     f.write("\n\n## 目录内容\n\n")
                     if toc_texts:
-                        for i, toc_text in enumerate(toc_texts):
-                            f.write(f"### 目录页 {i+1} (第{toc_texts.index(toc_text)+2}页)\n\n")
+                        for i, (toc_page_no, toc_text) in enumerate(toc_texts.items()):
+                            f.write(f"### 目录页 {i+1} (第{toc_page_no}页)\n\n")
                             # 首先尝试检测表格
                             try:
                                 # 创建OCR表格解析器实例
                                 parser = OCRTableParser()
-                                # 读取完整结果文件进行表格解析
-                                full_result_file = os.path.join(pdf_process_folder, f"p{toc_texts.index(toc_text)+2}_full_result.txt")
-                                if os.path.exists(full_result_file):
-                                    with open(full_result_file, 'r', encoding='utf-8') as rf:
-                                        full_result_content = rf.read()
-                                        parser.parse_log_text(full_result_content)
-                                        if parser.has_table_content():
-                                            table_md = parser.to_markdown()
-                                            if table_md and "No data found" not in table_md:
-                                                f.write(table_md)  # 直接写入表格，不需要额外的标题
-                                                f.write("\n\n")
-                                                continue  # 如果成功提取表格，则跳过其他格式化方式
+                                # 使用内存中的结构化OCR结果进行表格解析
+                                page_result = toc_page_results.get(toc_page_no)
+                                if page_result is not None:
+                                    parser.load_page_result(page_result)
+                                    if parser.has_table_content():
+                                        table_md = parser.to_markdown()
+                                        if table_md and "No data found" not in table_md:
+                                            f.write(table_md)  # 直接写入表格，不需要额外的标题
+                                            f.write("\n\n")
+                                            continue  # 如果成功提取表格，则跳过其他格式化方式
                             except Exception as e:
                                 self.log_message(f"  目录页表格提取失败: {str(e)}")
                             
@@ -1065,240 +1256,501 @@ class PDFProcessorGUI:
                     else:
                         f.write("未找到目录页\n")
                 
+                self.mark_job_complete(pdf_file, 'toc', {'markdown': md_file})
                 self.log_message(f"  完成处理: {pdf_name}")
                 
             except Exception as e:
                 self.log_message(f"  处理文件时出错: {str(e)}")
                 
-    def process_with_paddleocr(self, pdf_files, temp_folder, processed_folder):
-        """使用PaddleOCR处理所有PDF (与主处理脚本保持一致)"""
-        self.log_message("开始使用PaddleOCR处理所有PDF文件")
-        
-        # 初始化PaddleOCR，使用与测试代码相同的配置
-        self.log_message("初始化PaddleOCR...")
+    def is_job_complete(self, pdf_file, stage):
+        """
+        断点续跑时检查文件的某个处理阶段是否已完成（输出文件仍存在）
+        """
+        if self.job_manifest is None or not self.resume_jobs.get():
+            return False
         try:
-            # 根据测试结果选择最佳配置，与测试代码保持一致
-            ocr = PaddleOCR(lang='ch')  # 使用与测试代码相同的配置
-            self.log_message("PaddleOCR初始化成功!")
+            if self.job_manifest.is_stage_complete(pdf_file, stage):
+                self.log_message(f"  已完成，跳过: {os.path.basename(pdf_file)}")
+                return True
         except Exception as e:
-            self.log_message(f"PaddleOCR初始化失败: {str(e)}")
-            return
-            
-        for i, pdf_file in enumerate(pdf_files):
-            # 检查是否需要取消
-            if self.should_cancel:
-                self.log_message("用户取消处理")
-                break
-                
-            try:
-                self.log_message(f"处理文件 ({i+1}/{len(pdf_files)}): {os.path.basename(pdf_file)}")
-                
-                # 打开PDF文件
-                doc = fitz.open(pdf_file)
-                total_pages = len(doc)
-                pdf_name = os.path.splitext(os.path.basename(pdf_file))[0]
-                self.log_message(f"  PDF总页数: {total_pages}")
-                
-                # 为当前PDF创建过程文件夹
-                pdf_process_folder = os.path.join(temp_folder, f"{pdf_name}_ocr过程文件")
-                os.makedirs(pdf_process_folder, exist_ok=True)
-                
-                # 存储所有页面的OCR结果
-                all_page_texts = []
-                
-                # 处理每一页
-                for page_num in range(total_pages):
-                    # 检查是否需要取消
-                    if self.should_cancel:
-                        self.log_message("用户取消处理")
-                        doc.close()
-                        return
-                        
-                    self.log_message(f"  处理第 {page_num + 1}/{total_pages} 页...")
-                    
-                    # 获取原始页面
-                    page = doc[page_num]
-                    
-                    # 将页面转换为图像
-                    pix = page.get_pixmap(dpi=200)
-                    temp_image_path = os.path.join(pdf_process_folder, f"p{page_num+1}_temp.png")
-                    pix.save(temp_image_path)
-                    
-                    # 图像预处理
-                    temp_image_path = self.resize_image_if_needed(temp_image_path, max_size=2000)
-                    processed_image_path = self.preprocess_image_for_ocr(temp_image_path)
-                    processed_image_path = self.resize_image_if_needed(processed_image_path, max_size=2000)
-                    
-                    # OCR识别
-                    self.log_message(f"  正在对第{page_num+1}页进行OCR识别...")
-                    result = ocr.predict(processed_image_path)
-                    
-                    # 保存完整的OCR结果到过程文件
-                    full_result_file = os.path.join(pdf_process_folder, f"p{page_num+1}_full_result.txt")
-                    with open(full_result_file, 'w', encoding='utf-8') as f:
-                        f.write(f"OCR结果 - 第 {page_num+1} 页\n")
-                        f.write("=" * 50 + "\n")
-                        f.write(f"处理的图像: {os.path.basename(processed_image_path)}\n")
-                        f.write(f"原始PDF页面: {page_num+1}\n\n")
-                        f.write("详细结果:\n")
-                        f.write(str(result) + "\n\n")
-                        
-                        # 提取解析后的文本部分 (严格按照已验证代码处理)
-                        if result and result[0]:
-                            f.write("解析后的文本:\n")
-                            texts = []
-                            if isinstance(result[0], dict):
-                                if 'rec_texts' in result[0]:
-                                    texts = result[0]['rec_texts']
-                                elif 'text' in result[0]:
-                                    texts = [result[0]['text']]
-                            elif isinstance(result[0], list):
-                                for item in result[0]:
-                                    if isinstance(item, list) and len(item) > 1:
-                                        if isinstance(item[1], list) and len(item[1]) > 0:
-                                            texts.append(str(item[1][0]))
-                                        elif isinstance(item[1], (str, int, float)):
-                                            texts.append(str(item[1]))
-                                    elif isinstance(item, dict) and 'text' in item:
-                                        texts.append(item['text'])
-                                    elif isinstance(item, str):
-                                        texts.append(item)
-                            
-                            for i, text in enumerate(texts, 1):
-                                f.write(f"{i}. {text}\n")
-                    
-                    # 尝试提取表格数据
-                    table_md = None
+            self.log_message(f"  读取任务清单失败: {str(e)}")
+        return False
+        
+    def get_pending_pages(self, pdf_file, stage, total_pages, store_path):
+        """
+        返回尚未完成的页码列表
+
+        断点续跑且结构化结果文件仍存在时保留已完成页面的结果，否则清空结果文件从头处理；
+        任务清单中已完成、但结构化结果文件中没有记录的页面重新识别
+        """
+        done_pages = set()
+        if self.job_manifest is not None:
+            if self.resume_jobs.get() and os.path.exists(store_path):
+                done_pages = self.job_manifest.completed_pages(pdf_file, stage)
+                if done_pages:
                     try:
-                        table_md = self.parse_ocr_result_for_table(result)
-                        if table_md and "No data found" not in table_md:
-                            table_file = os.path.join(pdf_process_folder, f"p{page_num+1}_table.md")
-                            with open(table_file, 'w', encoding='utf-8') as f:
-                                f.write("# OCR表格提取结果\n\n")
-                                f.write(table_md)
-                            self.log_message(f"  第{page_num+1}页表格数据已保存到 {table_file}")
+                        stored_pages = set(load_page_results(store_path))
                     except Exception as e:
-                        self.log_message(f"  第{page_num+1}页表格提取失败: {str(e)}")
-                    
-                    # 提取解析后的文本
-                    page_text = ""
-                    if result and result[0]:
-                        # 解析OCR结果（严格按照已验证代码处理）
-                        texts = []
-                        if isinstance(result[0], dict):
-                            if 'rec_texts' in result[0]:
-                                texts = result[0]['rec_texts']
-                            elif 'text' in result[0]:
-                                texts = [result[0]['text']]
-                        elif isinstance(result[0], list):
-                            for item in result[0]:
-                                if isinstance(item, list) and len(item) > 1:
-                                    if isinstance(item[1], list) and len(item[1]) > 0:
-                                        texts.append(str(item[1][0]))
-                                    elif isinstance(item[1], (str, int, float)):
-                                        texts.append(str(item[1]))
-                                elif isinstance(item, dict) and 'text' in item:
-                                    texts.append(item['text'])
-                                elif isinstance(item, str):
-                                    texts.append(item)
-                        
-                        # 保存提取的文本
-                        page_text = "\n".join(texts)
-                        page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
-                        with open(page_txt_file, 'w', encoding='utf-8') as f:
-                            f.write(page_text)
-                        self.log_message(f"  第{page_num+1}页OCR完成，识别到 {len(texts)} 条文本，已保存到 {page_txt_file}")
-                    else:
-                        page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
-                        with open(page_txt_file, 'w', encoding='utf-8') as f:
-                            f.write("未识别到任何文本")
-                        self.log_message(f"  第{page_num+1}页未识别到任何文本，已保存到 {page_txt_file}")
-                    
-                    # 添加到所有页面文本列表
-                    all_page_texts.append(page_text)
-                    
-                    # 注释掉删除临时图像文件的代码，保存所有过程文件
-                    # if os.path.exists(temp_image_path):
-                    #     os.remove(temp_image_path)
-                    # if os.path.exists(processed_image_path) and processed_image_path != temp_image_path:
-                    #     os.remove(processed_image_path)
-                
-                doc.close()
+                        self.log_message(f"  读取结构化结果文件失败: {str(e)}")
+                        stored_pages = set()
+                    if not done_pages <= stored_pages:
+                        self.log_message(f"  结构化结果文件缺少 {len(done_pages - stored_pages)} 个已完成页面的结果，重新识别这些页面")
+                        done_pages &= stored_pages
+            else:
+                self.job_manifest.reset_stage(pdf_file, stage)
                 
-                # 合并所有页面内容为MD文件
-                date_suffix = datetime.now().strftime("%Y%m%d")
-                md_file = os.path.join(processed_folder, f"{pdf_name}_ocr_{date_suffix}.md")
-                self.log_message(f"  生成MD文件: {md_file}")
-                with open(md_file, 'w', encoding='utf-8') as f:
-                    f.write(f"# {pdf_name} OCR结果\n\n")
-                    # 读取所有提取的页面文本
-                    for i in range(len(all_page_texts)):
-                        page_num = i + 1
-                        f.write(f"## 第{page_num}页\n\n")
-                        
-                        # 首先检查是否有表格提取结果
-                        table_file = os.path.join(pdf_process_folder, f"p{page_num}_table.md")
-                        if os.path.exists(table_file):
-                            with open(table_file, 'r', encoding='utf-8') as tf:
-                                table_content = tf.read()
-                                f.write(table_content)
-                            f.write("\n\n")
-                        else:
-                            # 读取页面提取的文本
-                            page_extracted_file = os.path.join(pdf_process_folder, f"p{page_num}_extracted.txt")
-                            if os.path.exists(page_extracted_file):
-                                with open(page_extracted_file, 'r', encoding='utf-8') as pf:
-                                    page_content = pf.read()
-                                    f.write(page_content if page_content else "未识别到任何文本")
-                            else:
-                                f.write("未识别到任何文本")
-                        f.write("\n\n")
+        pending_pages = [page_num for page_num in range(total_pages) if page_num not in done_pages]
+        if not done_pages:
+            reset_store(store_path)
+        elif pending_pages:
+            self.log_message(f"  断点续跑: 已完成 {len(done_pages)}/{total_pages} 页，从第{pending_pages[0]+1}页继续")
+        return pending_pages
+        
+    def has_searchable_pdf(self, pdf_file):
+        """
+        开启可搜索PDF输出时，检查已完成的文件上次是否也生成了可搜索PDF（没有时需要由保存的结果补生成）
+        """
+        if not self.save_searchable_pdf.get() or self.job_manifest is None:
+            return True
+        return 'pdf' in self.job_manifest.get_outputs(pdf_file, 'paddleocr')
+        
+    def mark_job_page_done(self, pdf_file, stage, page_num):
+        if self.job_manifest is not None:
+            self.job_manifest.mark_page_done(pdf_file, stage, page_num)
+            
+    def mark_job_complete(self, pdf_file, stage, outputs):
+        if self.job_manifest is not None:
+            self.job_manifest.mark_stage_complete(pdf_file, stage, outputs)
+        
+    def save_page_result(self, store_path, page_num, result):
+        """
+        将OCR输出（或文本层得到的OCRPageResult）转换为结构化结果并追加写入PDF的二进制结果文件
+        """
+        page_result = normalize_ocr_result(result)
+        try:
+            append_page_result(store_path, page_num, page_result)
+        except Exception as e:
+            self.log_message(f"  第{page_num+1}页结构化结果保存失败: {str(e)}")
+        return page_result
+        
+    def handle_page_result(self, pdf_process_folder, page_num, result, image_label):
+        """
+        保存单页OCR结果（结构化结果，及可选的逐页过程文件），返回 (OCRPageResult, 该页在MD文件中的正文)
+        """
+        # 结构化结果写入二进制结果文件，供表格解析、断点续跑和重新处理模式使用
+        store_path = os.path.join(pdf_process_folder, OCR_STORE_FILENAME)
+        page_result = self.save_page_result(store_path, page_num, result)
+        save_page_files = self.save_page_files.get()
+        
+        # 保存OCR结果摘要到过程文件
+        if save_page_files:
+            full_result_file = os.path.join(pdf_process_folder, f"p{page_num+1}_full_result.txt")
+            with open(full_result_file, 'w', encoding='utf-8') as f:
+                f.write(f"OCR结果 - 第 {page_num+1} 页\n")
+                f.write("=" * 50 + "\n")
+                f.write(f"处理的图像: {image_label}\n")
+                f.write(f"原始PDF页面: {page_num+1}\n\n")
+                if page_result.describe_correction():
+                    f.write(f"页面校正: {page_result.describe_correction()}\n\n")
+                if is_blank_result(page_result):
+                    f.write(f"页面分类: 空白页（墨迹占比 {page_result.meta['ink_ratio']:.3%}），跳过识别\n\n")
+                if page_result.meta.get('source') == 'duplicate':
+                    duplicate_of = page_result.meta['duplicate_of']
+                    f.write(f"页面分类: 与 {duplicate_of['pdf']} 第{duplicate_of['page']+1}页内容完全相同，复用识别结果\n\n")
+                f.write(f"结构化结果: {OCR_STORE_FILENAME}\n\n")
                 
-                self.log_message(f"  完成处理: {md_file}")
+                # 提取解析后的文本部分
+                if len(page_result):
+                    f.write("解析后的文本:\n")
+                    for i, text in enumerate(page_result.texts, 1):
+                        f.write(f"{i}. {text}\n")
+        
+        # 尝试提取表格数据
+        table_md = None
+        try:
+            table_md = self.parse_ocr_result_for_table(page_result)
+            if table_md and "No data found" in table_md:
+                table_md = None
+            if table_md and save_page_files:
+                table_file = os.path.join(pdf_process_folder, f"p{page_num+1}_table.md")
+                with open(table_file, 'w', encoding='utf-8') as f:
+                    f.write("# OCR表格提取结果\n\n")
+                    f.write(table_md)
+                self.log_message(f"  第{page_num+1}页表格数据已保存到 {table_file}")
+        except Exception as e:
+            self.log_message(f"  第{page_num+1}页表格提取失败: {str(e)}")
+        
+        # 提取解析后的文本
+        page_text = ""
+        if is_blank_result(page_result):
+            page_text = BLANK_PAGE_TEXT
+        elif len(page_result):
+            texts = page_result.texts
+            page_text = "\n".join(texts)
+            self.log_message(f"  第{page_num+1}页OCR完成，识别到 {len(texts)} 条文本")
+        else:
+            self.log_message(f"  第{page_num+1}页未识别到任何文本")
+            
+        # 保存提取的文本
+        if save_page_files:
+            page_txt_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
+            with open(page_txt_file, 'w', encoding='utf-8') as f:
+                f.write(page_text or NO_TEXT_PLACEHOLDER)
+            
+        return page_result, page_markdown(page_text, table_md)
+        
+    def stored_page_markdown(self, pdf_process_folder, page_num, stored_results):
+        """
+        生成上次运行已完成页面在MD文件中的正文：优先使用结构化结果，兼容只有逐页过程文件的旧版输出
+        """
+        page_result = stored_results.get(page_num)
+        if page_result is not None:
+            if is_blank_result(page_result):
+                return BLANK_PAGE_TEXT
+            table_md = None
+            try:
+                table_md = self.parse_ocr_result_for_table(page_result)
+            except Exception as e:
+                self.log_message(f"  第{page_num+1}页表格提取失败: {str(e)}")
+            if table_md and "No data found" in table_md:
+                table_md = None
+            return page_markdown("\n".join(page_result.texts), table_md)
+        
+        # 旧版过程文件：表格结果优先，其次为提取的文本
+        table_file = os.path.join(pdf_process_folder, f"p{page_num+1}_table.md")
+        if os.path.exists(table_file):
+            with open(table_file, 'r', encoding='utf-8') as tf:
+                return f"{tf.read()}\n\n"
+        page_extracted_file = os.path.join(pdf_process_folder, f"p{page_num+1}_extracted.txt")
+        if os.path.exists(page_extracted_file):
+            with open(page_extracted_file, 'r', encoding='utf-8') as pf:
+                return page_markdown(pf.read())
+        return NO_TEXT_PLACEHOLDER
+        
+    def open_page_writers(self, info, processed_folder):
+        """
+        创建PDF的流式MD写出器（及可选的可搜索PDF写出器），先写入上次运行已完成（本次不再识别）的页面
+        """
+        md_file = markdown_path(processed_folder, info['name'])
+        self.log_message(f"  生成MD文件: {md_file}")
+        info['writer'] = StreamingMarkdownWriter(md_file, info['name'], info['total'])
+        if self.save_searchable_pdf.get():
+            pdf_output = searchable_pdf_path(processed_folder, info['name'])
+            self.log_message(f"  生成可搜索PDF: {pdf_output}")
+            try:
+                info['pdf_writer'] = SearchablePDFWriter(info['path'], pdf_output, dpi=200, max_size=2000)
+            except Exception as e:
+                self.log_message(f"  无法创建可搜索PDF: {str(e)}")
+        done_pages = [page_num for page_num in range(info['total']) if page_num not in info['pending']]
+        if done_pages:
+            stored_results = {}
+            store_path = os.path.join(info['folder'], OCR_STORE_FILENAME)
+            if os.path.exists(store_path):
+                try:
+                    stored_results = load_page_results(store_path)
+                except Exception as e:
+                    self.log_message(f"  读取结构化结果文件失败: {str(e)}")
+            for page_num in done_pages:
+                info['writer'].add_page(page_num, self.stored_page_markdown(info['folder'], page_num, stored_results))
+                self.add_searchable_page(info, page_num, stored_results.get(page_num))
                 
+    def add_searchable_page(self, info, page_num, page_result):
+        """
+        将一页的识别结果写入可搜索PDF的文本层（未开启可搜索PDF输出时忽略）
+        """
+        if info['pdf_writer'] is None or page_result is None:
+            return
+        try:
+            info['pdf_writer'].add_page(page_num, page_result)
+        except Exception as e:
+            self.log_message(f"  第{page_num+1}页文本层写入失败: {str(e)}")
+            
+    def close_page_writers(self, info):
+        """
+        所有页面完成后关闭MD文件并保存可搜索PDF，返回写入任务清单的输出文件字典
+        """
+        outputs = {'markdown': info['writer'].md_path}
+        info['writer'].close()
+        info['writer'] = None
+        if info['pdf_writer'] is not None:
+            try:
+                outputs['pdf'] = info['pdf_writer'].save()
+                self.log_message(f"  可搜索PDF已保存: {outputs['pdf']}")
             except Exception as e:
-                self.log_message(f"  处理文件时出错: {str(e)}")
+                self.log_message(f"  可搜索PDF保存失败: {str(e)}")
+            info['pdf_writer'] = None
+        return outputs
+        
+    def write_pdf_outputs(self, info, processed_folder):
+        """
+        所有页面都已在之前的运行中完成时，由结构化结果直接生成PDF对应的MD文件（及可搜索PDF）
+        """
+        self.open_page_writers(info, processed_folder)
+        return self.close_page_writers(info)
+        
+    def process_with_paddleocr(self, pdf_files, temp_folder, processed_folder):
+        """使用PaddleOCR处理所有PDF (与主处理脚本保持一致)"""
+        self.log_message("开始使用PaddleOCR处理所有PDF文件")
+        
+        batch_size = self.get_int_option(self.batch_size)
+        self.log_message(f"批量识别大小: {batch_size}")
+        
+        # 多进程模式：所有PDF的页面统一调度到工作进程
+        workers = self.get_int_option(self.worker_count)
+        if workers > 1:
+            self.process_with_paddleocr_pool(pdf_files, temp_folder, processed_folder, workers, batch_size)
+            return
+        
+        # 获取共享的PaddleOCR实例（多次运行之间复用已加载的模型）
+        ocr = self.load_ocr_engine()
+        if ocr is None:
+            return
+            
+        pdf_infos, page_tasks = self.collect_page_tasks(pdf_files, temp_folder, processed_folder)
+        if not page_tasks:
+            return
+            
+        # 单进程流水线：渲染、预处理、识别、写出各阶段并行，阶段之间用有界队列连接
+        image_hook = None
+        if self.save_debug_images.get():
+            image_hook = lambda pdf_file, page_num, rendered, ocr_input: self.save_debug_page_images(
+                pdf_infos[pdf_file]['folder'], f"p{page_num+1}", rendered, ocr_input)
+        duplicate_index = self.get_duplicate_index()
+        pipeline = OCRPipeline(ocr, dpi=200, max_size=2000, batch_size=batch_size,
+                               cache=self.get_ocr_cache(), image_hook=image_hook,
+                               use_text_layer=self.use_text_layer.get(), adaptive=self.get_adaptive_dpi(),
+                               skip_blank=self.skip_blank_pages.get(), duplicate_index=duplicate_index)
+        self.log_message(f"使用流水线模式，预处理线程数: {pipeline.preprocess_workers}")
+        
+        label_format = "p{page}_temp_processed.png" if image_hook is not None else "p{page} (内存图像)"
+        reset_preprocess_timings()
+        try:
+            self.consume_page_results(pipeline.run(page_tasks), pipeline.cancel, pdf_infos, len(page_tasks),
+                                      processed_folder, label_format)
+        except Exception as e:
+            self.log_message(f"流水线OCR处理出错: {str(e)}")
+            pipeline.cancel()
+        finally:
+            self.finish_duplicate_index(duplicate_index, processed_folder)
+        self.log_message(f"预处理耗时: {preprocess_timing_report()}")
+        
+    def save_debug_page_images(self, pdf_process_folder, image_name, rendered, ocr_input):
+        """
+        调试模式下保存页面的渲染图像和预处理后的图像（在流水线预处理线程中调用）
+        """
+        save_debug_image(rendered, os.path.join(pdf_process_folder, f"{image_name}_temp.png"))
+        save_debug_image(ocr_input, os.path.join(pdf_process_folder, f"{image_name}_temp_processed.png"))
+        
+    def collect_page_tasks(self, pdf_files, temp_folder, processed_folder):
+        """
+        收集所有PDF待识别的页面任务，返回 (PDF信息字典, [(pdf_path, page_num), ...])
+
+        断点续跑时已完成的页面不再加入任务；没有待识别页面的PDF直接生成MD文件
+        """
+        pdf_infos = {}
+        page_tasks = []
+        for pdf_file in pdf_files:
+            try:
+                if self.has_searchable_pdf(pdf_file) and self.is_job_complete(pdf_file, 'paddleocr'):
+                    continue
+                with fitz.open(pdf_file) as doc:
+                    total_pages = len(doc)
+            except Exception as e:
+                self.log_message(f"  无法打开文件 {os.path.basename(pdf_file)}: {str(e)}")
+                continue
                 
-    def process_with_ocrmypdf(self, pdf_files, temp_folder, processed_folder):
-        """使用OCRmyPDF处理所有PDF"""
-        self.log_message("开始使用OCRmyPDF处理所有PDF文件")
+            pdf_name = os.path.splitext(os.path.basename(pdf_file))[0]
+            pdf_process_folder = os.path.join(temp_folder, f"{pdf_name}_ocr过程文件")
+            os.makedirs(pdf_process_folder, exist_ok=True)
+            pending_pages = self.get_pending_pages(pdf_file, 'paddleocr', total_pages,
+                                                   os.path.join(pdf_process_folder, OCR_STORE_FILENAME))
+            pdf_infos[pdf_file] = {
+                'path': pdf_file,
+                'name': pdf_name,
+                'folder': pdf_process_folder,
+                'total': total_pages,
+                'done': total_pages - len(pending_pages),
+                'pending': set(pending_pages),
+                'writer': None,
+                'pdf_writer': None,
+                'failed': 0
+            }
+            page_tasks.extend((pdf_file, page_num) for page_num in pending_pages)
+            
+        self.log_message(f"共 {len(pdf_infos)} 个PDF，{len(page_tasks)} 页待识别")
         
-        for i, pdf_file in enumerate(pdf_files):
+        # 没有待识别页面的PDF（空文件或上次已识别完所有页面）直接生成MD文件（及可搜索PDF）
+        for pdf_file, info in pdf_infos.items():
+            if info['done'] == info['total']:
+                self.mark_job_complete(pdf_file, 'paddleocr', self.write_pdf_outputs(info, processed_folder))
+                
+        return pdf_infos, page_tasks
+        
+    def consume_page_results(self, page_results, cancel, pdf_infos, total_tasks, processed_folder, label_format):
+        """
+        写出阶段：逐页保存识别结果，并按页码顺序流式写入PDF对应的MD文件
+
+        page_results 产出 (pdf_path, page_num, result, error)，页面可以乱序到达；
+        label_format 为过程文件中记录的图像标识，{page} 替换为页码
+        """
+        try:
+            self._consume_page_results(page_results, cancel, pdf_infos, total_tasks, processed_folder, label_format)
+        finally:
+            # 取消或出错时关闭未完成的MD文件（已写出的连续页面保留），未完成的可搜索PDF不保存
+            for info in pdf_infos.values():
+                if info['writer'] is not None:
+                    info['writer'].close()
+                    info['writer'] = None
+                if info['pdf_writer'] is not None:
+                    info['pdf_writer'].close()
+                    info['pdf_writer'] = None
+                    
+    def _consume_page_results(self, page_results, cancel, pdf_infos, total_tasks, processed_folder, label_format):
+        finished = 0
+        for pdf_file, page_num, result, error in page_results:
             # 检查是否需要取消
             if self.should_cancel:
                 self.log_message("用户取消处理")
-                break
+                cancel()
+                return
                 
-            try:
-                self.log_message(f"处理文件 ({i+1}/{len(pdf_files)}): {os.path.basename(pdf_file)}")
+            finished += 1
+            info = pdf_infos[pdf_file]
+            source = "识别完成"
+            if isinstance(result, OCRPageResult):
+                if result.meta.get('source') == 'text_layer':
+                    source = "使用PDF文本层"
+                elif is_blank_result(result):
+                    source = "为空白页，跳过识别"
+                elif result.meta.get('source') == 'duplicate':
+                    duplicate_of = result.meta['duplicate_of']
+                    source = f"与 {os.path.basename(duplicate_of['pdf'])} 第{duplicate_of['page']+1}页重复，复用识别结果"
+                elif result.meta.get('refined_regions'):
+                    source = f"识别完成（{result.meta['refined_regions']}个区域以高DPI重新识别）"
+                if result.describe_correction():
+                    source += f"，页面校正: {result.describe_correction()}"
+            self.log_message(f"  [{finished}/{total_tasks}] {info['name']} 第{page_num+1}页{source}")
+            if error:
+                self.log_message(f"  第{page_num+1}页OCR失败: {error}")
                 
-                # 生成输出文件名（添加日期）
-                pdf_name = os.path.splitext(os.path.basename(pdf_file))[0]
-                date_suffix = datetime.now().strftime("%Y%m%d")
-                output_name = f"{pdf_name}_ocr_{date_suffix}.pdf"
-                output_path = os.path.join(processed_folder, output_name)
+            if info['writer'] is None:
+                self.open_page_writers(info, processed_folder)
                 
-                # 构建OCRmyPDF命令
-                cmd = [
-                    "ocrmypdf",
-                    "-l", "chi_sim",
-                    "--optimize", "3",
-                    "--output-type", "pdf",
-                    pdf_file,
-                    output_path
-                ]
+            # 同一个 OCRPageResult 同时用于MD正文、表格和可搜索PDF的文本层
+            page_result = None
+            page_content = page_markdown("")
+            page_ok = False
+            try:
+                page_result, page_content = self.handle_page_result(info['folder'], page_num, result,
+                                                                    label_format.format(page=page_num+1))
+                if not error:
+                    self.mark_job_page_done(pdf_file, 'paddleocr', page_num)
+                    page_ok = True
+            except Exception as e:
+                self.log_message(f"  第{page_num+1}页结果保存失败: {str(e)}")
+            if not page_ok:
+                info['failed'] += 1
+            info['writer'].add_page(page_num, page_content)
+            self.add_searchable_page(info, page_num, page_result)
+            
+            # 某个PDF的所有页面完成后关闭MD文件并保存可搜索PDF
+            info['done'] += 1
+            if info['done'] == info['total']:
+                outputs = self.close_page_writers(info)
+                if info['failed']:
+                    # 有页面识别失败时不标记完成，下次运行只重新识别失败的页面
+                    self.log_message(f"  {info['name']} 有 {info['failed']} 页识别失败，下次运行时重新识别这些页面: "
+                                     f"{outputs['markdown']}")
+                    continue
+                self.mark_job_complete(pdf_file, 'paddleocr', outputs)
+                self.log_message(f"  完成处理: {outputs['markdown']}")
                 
-                self.log_message(f"  执行命令: {' '.join(cmd)}")
+    def process_with_paddleocr_pool(self, pdf_files, temp_folder, processed_folder, workers, batch_size=1):
+        """
+        多进程并行处理：每个工作进程初始化一次PaddleOCR，所有PDF的页面统一调度
+        """
+        self.log_message(f"使用多进程模式，工作进程数: {workers}")
+        if self.save_debug_images.get():
+            self.log_message("  注意：多进程模式下不保存中间图像")
+        if self.reuse_duplicate_pages.get() or self.detect_duplicate_pages.get():
+            self.log_message("  注意：多进程模式下不做重复页检测")
+        
+        pdf_infos, page_tasks = self.collect_page_tasks(pdf_files, temp_folder, processed_folder)
+        if not page_tasks:
+            return
+        if self.shard_large_pdfs.get():
+            # 页面任务本身已分散到各工作进程；页数多的PDF先提交，避免最后只剩一个大文件的页面在识别
+            page_tasks.sort(key=lambda task: pdf_infos[task[0]]['total'], reverse=True)
+        
+        self.log_message("启动工作进程并加载PaddleOCR模型...")
+        cache = self.get_ocr_cache()
+        pool = OCRWorkerPool(workers=workers, lang='ch', dpi=200, max_size=2000,
+                             cache_dir=cache.cache_dir if cache is not None else None,
+                             use_text_layer=self.use_text_layer.get(), adaptive=self.get_adaptive_dpi(),
+                             skip_blank=self.skip_blank_pages.get())
+        try:
+            self.consume_page_results(pool.run(page_tasks, batch_size=batch_size), pool.cancel, pdf_infos,
+                                      len(page_tasks), processed_folder, "p{page} (工作进程内存图像)")
+        except Exception as e:
+            self.log_message(f"多进程OCR处理出错: {str(e)}")
+        finally:
+            pool.shutdown()
                 
-                # 执行命令
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    self.log_message(f"  成功处理: {output_path}")
-                else:
-                    self.log_message(f"  处理失败: {result.stderr}")
+    def process_with_ocrmypdf(self, pdf_files, temp_folder, processed_folder):
+        """使用OCRmyPDF处理所有PDF（多个ocrmypdf进程并行，大文件优先）"""
+        self.log_message("开始使用OCRmyPDF处理所有PDF文件")
+        
+        jobs = []
+        for pdf_file in pdf_files:
+            if self.is_job_complete(pdf_file, 'ocrmypdf'):
+                continue
+            # 生成输出文件名（添加日期）
+            pdf_name = os.path.splitext(os.path.basename(pdf_file))[0]
+            date_suffix = datetime.now().strftime("%Y%m%d")
+            output_name = f"{pdf_name}_ocr_{date_suffix}.pdf"
+            jobs.append(OCRmyPDFJob(pdf_file, os.path.join(processed_folder, output_name)))
+        if not jobs:
+            return
+            
+        # OCRmyPDF参数（--jobs 由调度器按核心预算添加）
+        runner = OCRmyPDFRunner(["-l", "chi_sim", "--optimize", "3", "--output-type", "pdf"])
+        run_jobs = jobs
+        if self.shard_large_pdfs.get():
+            # 超过 DEFAULT_SHARD_PAGES 页的文件拆分为页面范围分片并行处理，完成后按页码顺序合并
+            run_jobs = runner.shard(jobs, work_dir=temp_folder)
+            if len(run_jobs) > len(jobs):
+                self.log_message(f"大文件分片: 超过 {DEFAULT_SHARD_PAGES} 页的文件已拆分，共 {len(run_jobs)} 个任务")
+        processes, jobs_per_process = plan_concurrency(len(run_jobs))
+        self.log_message(f"共 {len(jobs)} 个文件，同时运行 {processes} 个ocrmypdf进程，"
+                         f"每个进程 --jobs {jobs_per_process}，按文件大小从大到小处理")
+        finished = 0
+        self.ocrmypdf_runner = runner
+        try:
+            for event, job in runner.run(run_jobs):
+                # 检查是否需要取消
+                if self.should_cancel:
+                    self.log_message("用户取消处理")
+                    runner.cancel()
+                    break
                     
-            except Exception as e:
-                self.log_message(f"  处理文件时出错: {str(e)}")
+                if event == 'start':
+                    self.log_message(f"  开始处理: {os.path.basename(job.input_path)} ({job.size / 1024 / 1024:.1f} MB)")
+                    continue
+                if event == 'progress':
+                    total = f"/{job.total_pages}" if job.total_pages else ""
+                    self.log_message(f"  {os.path.basename(job.input_path)}: 已处理 {len(job.pages_seen)}{total} 页")
+                    continue
+                finished += 1
+                if job.success:
+                    self.mark_job_complete(job.input_path, 'ocrmypdf', {'pdf': job.output_path})
+                    self.log_message(f"  [{finished}/{len(jobs)}] 成功处理: {job.output_path}（耗时 {job.elapsed:.1f} 秒）")
+                else:
+                    self.log_message(f"  [{finished}/{len(jobs)}] 处理失败: {os.path.basename(job.input_path)} - {job.error}")
+        except Exception as e:
+            self.log_message(f"  OCRmyPDF并行处理出错: {str(e)}")
+            runner.cancel()
+        finally:
+            self.ocrmypdf_runner = None
 
     def process_pdfs(self):
         try:
@@ -1331,6 +1783,11 @@ class PDFProcessorGUI:
             os.makedirs(temp_folder, exist_ok=True)
             self.log_message(f"创建过程文件夹: {temp_folder}")
             
+            # 打开任务清单，用于跳过上次运行已完成的文件和页面
+            self.job_manifest = JobManifest(os.path.join(temp_folder, MANIFEST_FILENAME))
+            if self.resume_jobs.get():
+                self.log_message(f"断点续跑: 任务清单 {self.job_manifest.manifest_path}")
+            
             pdf_files = []
             for root, dirs, files in os.walk(input_folder):
                 for file in files:
@@ -1362,6 +1819,11 @@ class PDFProcessorGUI:
         except Exception as e:
             self.log_message(f"处理过程中出错: {str(e)}")
         finally:
+            if self.job_manifest is not None:
+                try:
+                    self.job_manifest.save()
+                except Exception as e:
+                    self.log_message(f"保存任务清单失败: {str(e)}")
             self.finish_processing()
 
     def reprocess_from_temp_folder(self, temp_folder, processed_folder):
@@ -1447,6 +1909,20 @@ class PDFProcessorGUI:
                 toc_content = ""
                 page_files = []
                 
+                # 优先读取封面目录阶段的结构化结果文件（内存映射，无需正则解析），兼容两个阶段共用结果文件的旧版输出
+                stored_results = {}
+                store_name = TOC_STORE_FILENAME
+                if not os.path.exists(os.path.join(process_folder, store_name)):
+                    store_name = OCR_STORE_FILENAME
+                store_path = os.path.join(process_folder, store_name)
+                if os.path.exists(store_path):
+                    try:
+                        stored_results = load_page_results(store_path)
+                        for stored_page in stored_results:
+                            page_files.append((stored_page + 1, store_name))
+                    except Exception as e:
+                        self.log_message(f"  读取结构化结果文件失败: {str(e)}")
+                
                 # 收集所有页面文件
                 try:
                     for file in os.listdir(process_folder):
@@ -1479,7 +1955,20 @@ class PDFProcessorGUI:
                                     self.log_message(f"  找到表格文件: {file_name}")
                                     break  # 找到表格就停止
                         
-                        elif file_name.endswith("_full_result.txt") and not table_found:
+                        elif file_name == store_name and not table_found:
+                            # 使用结构化结果进行表格解析
+                            parser = OCRTableParser()
+                            parser.load_page_result(stored_results[page_num - 1])
+                            if parser.has_table_content():
+                                table_md = parser.to_markdown()
+                                if table_md and "No data found" not in table_md:
+                                    toc_content = table_md
+                                    table_found = True
+                                    self.log_message(f"  从结构化OCR结果中提取表格: 第{page_num}页")
+                                    break  # 找到表格就停止
+                        
+                        elif file_name.endswith("_full_result.txt") and not table_found and (page_num - 1) not in stored_results:
+                            # 兼容旧版过程文件：从完整结果文本中解析
                             with open(file_path, 'r', encoding='utf-8') as f:
                                 full_result_content = f.read()
                                 # 使用OCR表格解析器处理完整结果
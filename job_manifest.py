@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+# 批处理任务清单的默认文件名（保存在输出/过程文件夹中）
+MANIFEST_FILENAME = "job_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_content_hash(file_path, chunk_size=1024 * 1024):
+    """
+    分块计算文件内容的blake2b哈希
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobManifest:
+    """
+    可断点续跑的批处理任务清单
+
+    每个输入文件记录大小、修改时间、内容哈希、各处理阶段的完成情况
+    （已完成的页面、输出文件路径）。输入文件内容变化时自动清空其进度；
+    阶段已完成且输出文件仍存在时，再次运行直接跳过该阶段
+    """
+
+    def __init__(self, manifest_path, save_interval=2.0):
+        self.manifest_path = manifest_path
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._last_save = 0.0
+        self._dirty = False
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.files = data.get('files', {})
+        except (OSError, ValueError):
+            self.files = {}
+
+    def save(self, force=True):
+        """
+        写入清单文件（先写临时文件再原子替换）
+
+        force 为False时，距离上次写入不足 save_interval 秒则推迟写入
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            if not force and time.time() - self._last_save < self.save_interval:
+                return
+            manifest_dir = os.path.dirname(self.manifest_path)
+            if manifest_dir:
+                os.makedirs(manifest_dir, exist_ok=True)
+            temp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'files': self.files}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.manifest_path)
+            self._last_save = time.time()
+            self._dirty = False
+
+    def _file_entry(self, file_path):
+        """
+        获取输入文件的记录；文件大小或修改时间变化时重新计算哈希，内容变化则清空进度
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        entry = self.files.get(key)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            return entry
+
+        content_hash = file_content_hash(file_path)
+        if not entry or entry.get('hash') != content_hash:
+            entry = {'stages': {}}
+        entry.update(size=stat.st_size, mtime=stat.st_mtime, hash=content_hash)
+        self.files[key] = entry
+        self._dirty = True
+        return entry
+
+    def _stage(self, file_path, stage):
+        entry = self._file_entry(file_path)
+        return entry['stages'].setdefault(stage, {'complete': False, 'pages_done': [], 'outputs': {}})
+
+    def is_stage_complete(self, file_path, stage):
+        """
+        阶段已完成且记录的输出文件都还存在时返回True
+        """
+        with self._lock:
+            state = self._stage(file_path, stage)
+            if not state['complete']:
+                return False
+            return all(os.path.exists(path) for path in state['outputs'].values())
+
+    def completed_pages(self, file_path, stage):
+        """
+        返回该阶段已完成的页码集合（从0开始）
+        """
+        with self._lock:
+            return set(self._stage(file_path, stage)['pages_done'])
+
+    def get_outputs(self, file_path, stage):
+        with self._lock:
+            return dict(self._stage(file_path, stage)['outputs'])
+
+    def mark_page_done(self, file_path, stage, page_num):
+        """
+        记录单页完成，按 save_interval 节流写入清单文件
+        """
+        with self._lock:
+            state = self._stage(file_path, stage)
+            if page_num not in state['pages_done']:
+                state['pages_done'].append(page_num)
+                self._dirty = True
+            self.save(force=False)
+
+    def mark_stage_complete(self, file_path, stage, outputs=None):
+        """
+        记录阶段完成及其输出文件，并立即写入清单文件
+        """
+        with self._lock:
+            state = self._stage(file_path, stage)
+            state['complete'] = True
+            state['outputs'] = dict(outputs or {})
+            self._dirty = True
+            self.save()
+
+    def reset_stage(self, file_path, stage):
+        """
+        清空某个阶段的进度（重新处理该文件）
+        """
+        with self._lock:
+            entry = self._file_entry(file_path)
+            entry['stages'].pop(stage, None)
+            self._dirty = True
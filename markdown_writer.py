@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import datetime
+
+# 没有识别到文本的页面在MD文件中的占位内容
+NO_TEXT_PLACEHOLDER = "未识别到任何文本"
+
+
+def markdown_path(processed_folder, pdf_name):
+    """
+    返回PDF对应的MD输出文件路径（文件末尾增加 '_ocr_YYYYMMDD'）
+    """
+    date_suffix = datetime.now().strftime("%Y%m%d")
+    return os.path.join(processed_folder, f"{pdf_name}_ocr_{date_suffix}.md")
+
+
+def page_markdown(page_text, table_md=None):
+    """
+    生成单页在MD文件中的正文：识别出表格时输出表格，否则输出提取的文本
+    """
+    if table_md:
+        return f"# OCR表格提取结果\n\n{table_md}\n\n"
+    return page_text or NO_TEXT_PLACEHOLDER
+
+
+class StreamingMarkdownWriter:
+    """
+    按页码顺序流式写出PDF的MD文件
+
+    页面可以乱序到达：后面的页面先到时暂存在内存中，前面的页面写出后再依次写出。
+    每次写出后立即刷新到磁盘，处理长卷时可以用 tail -f 查看已完成的部分
+    """
+
+    def __init__(self, md_path, title, total_pages):
+        self.md_path = md_path
+        self.total_pages = total_pages
+        self.next_page = 0
+        self._pending = {}
+        self._file = open(md_path, 'w', encoding='utf-8')
+        self._file.write(f"# {title} OCR结果\n\n")
+        self._file.flush()
+
+    @property
+    def complete(self):
+        return self.next_page >= self.total_pages
+
+    @property
+    def buffered_pages(self):
+        return len(self._pending)
+
+    def add_page(self, page_num, content):
+        """
+        提交一页的正文（page_num 从0开始），写出从 next_page 开始所有已连续到达的页面
+        """
+        if page_num < self.next_page or self._file is None:
+            return
+        self._pending[page_num] = content
+        if page_num != self.next_page:
+            return
+        while self.next_page in self._pending:
+            content = self._pending.pop(self.next_page)
+            self._file.write(f"## 第{self.next_page + 1}页\n\n{content}\n\n")
+            self.next_page += 1
+        self._file.flush()
+
+    def close(self):
+        """
+        关闭文件；未完成时（处理被取消或出错）已写出的连续页面保留，暂存的后续页面丢弃
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
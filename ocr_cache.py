@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+
+from ocr_engine import predict_in_batches
+from ocr_image_utils import PAGE_PREPROCESS_CHAIN
+from ocr_result import OCRPageResult
+from ocr_result_store import append_page_result, load_page_results
+
+# 默认缓存目录与容量上限
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.pdf_processor_cache/ocr")
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# 缓存子目录数（键的前两位十六进制字符），每个子目录分得总容量的 1/BUCKET_COUNT
+BUCKET_COUNT = 256
+
+# 整页预处理流程的标识，预处理链的步骤或参数变化时旧缓存自动失效
+PREPROCESS_SIGNATURE = PAGE_PREPROCESS_CHAIN.signature
+
+_engine_version = None
+
+
+def get_engine_version():
+    """
+    返回PaddleOCR版本号，作为缓存键的一部分
+    """
+    global _engine_version
+    if _engine_version is None:
+        try:
+            import paddleocr
+            _engine_version = getattr(paddleocr, '__version__', 'unknown')
+        except Exception:
+            _engine_version = 'unknown'
+    return _engine_version
+
+
+def page_cache_key(image, **params):
+    """
+    根据渲染后的页面图像内容和处理参数（DPI、预处理方式、引擎版本等）计算缓存键
+
+    使用非默认预处理链时传入 preprocess=chain.signature
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(image.shape).encode('ascii'))
+    digest.update(np.ascontiguousarray(image).data)
+    params = dict(params, engine=get_engine_version())
+    params.setdefault('preprocess', PREPROCESS_SIGNATURE)
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """
+    以页面图像哈希为键的持久化OCR结果缓存
+
+    每条缓存为一个小的结构化结果文件；命中时更新文件修改时间。缓存文件按键的前两位十六进制字符
+    分到 BUCKET_COUNT 个子目录（键为均匀分布的哈希），每个子目录的容量为总上限的 1/BUCKET_COUNT，
+    写入后只扫描所在子目录，超过容量时在该子目录内按最近最少使用 (LRU) 顺序淘汰。
+    大小总是从磁盘读取，多个工作进程共用同一缓存目录时总大小也不会超过上限
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _entries(self, bucket_dir):
+        """
+        列出一个子目录中的缓存文件，返回 (路径, 最后访问时间, 大小) 列表
+        """
+        entries = []
+        try:
+            with os.scandir(bucket_dir) as items:
+                for item in items:
+                    if not item.name.endswith('.bin'):
+                        continue
+                    try:
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    entries.append((item.path, stat.st_mtime, stat.st_size))
+        except OSError:
+            pass
+        return entries
+
+    def _bucket_dirs(self):
+        try:
+            return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                    if os.path.isdir(os.path.join(self.cache_dir, name))]
+        except OSError:
+            return []
+
+    def total_bytes(self):
+        """
+        缓存文件的总大小（逐个子目录统计）
+        """
+        return sum(size for bucket_dir in self._bucket_dirs() for _, _, size in self._entries(bucket_dir))
+
+    def get(self, key):
+        """
+        查询缓存，命中返回 OCRPageResult，未命中返回 None
+        """
+        path = self._entry_path(key)
+        try:
+            results = load_page_results(path)
+            os.utime(path)  # 更新访问时间，用于LRU淘汰
+        except (OSError, ValueError):
+            results = {}
+
+        with self._lock:
+            if 0 in results:
+                self.hits += 1
+                return results[0]
+            self.misses += 1
+        return None
+
+    def put(self, key, page_result):
+        """
+        写入一条缓存（先写临时文件再原子替换，同一键覆盖旧文件），所在子目录超过容量时淘汰旧缓存
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            append_page_result(temp_path, 0, page_result)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._evict_bucket(os.path.dirname(path))
+
+    def _evict_bucket(self, bucket_dir):
+        """
+        子目录总大小超过其容量时，按最近最少使用顺序删除缓存，直到降到容量的90%以下
+        """
+        entries = self._entries(bucket_dir)
+        total = sum(size for _, _, size in entries)
+        limit = self.max_bytes / BUCKET_COUNT
+        if total <= limit:
+            return
+        for path, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if total <= limit * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass  # 其他进程已删除
+
+    def evict(self):
+        """
+        逐个子目录淘汰超出容量的缓存（例如调低 max_bytes 之后）
+        """
+        for bucket_dir in self._bucket_dirs():
+            self._evict_bucket(bucket_dir)
+
+
+def predict_with_cache(ocr, images, keys, cache=None, batch_size=1):
+    """
+    命中缓存的页面直接复用缓存结果，其余页面批量识别后写入缓存
+
+    keys 与 images 一一对应（为None表示该页不使用缓存）；
+    返回 (结果列表, 命中缓存的页数)，结果结构与 ocr.predict(单张图像) 相同
+    """
+    results = [None] * len(images)
+    missing = []
+    for i, key in enumerate(keys):
+        cached = cache.get(key) if cache is not None and key else None
+        if cached is not None:
+            results[i] = cached.to_predict_result()
+        else:
+            missing.append(i)
+
+    if missing:
+        outputs = predict_in_batches(ocr, [images[i] for i in missing], batch_size)
+        for i, output in zip(missing, outputs):
+            results[i] = output
+            if cache is not None and keys[i]:
+                cache.put(keys[i], OCRPageResult.from_predict(output))
+
+    return results, len(images) - len(missing)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+# 默认每次predict调用提交的页面数
+DEFAULT_BATCH_SIZE = 4
+
+# 进程内共享的OCR引擎缓存：同一组参数只加载一次模型
+_engines = {}
+_engine_lock = threading.Lock()
+_engine_metrics = {
+    'load_count': 0,        # 实际加载模型的次数
+    'reuse_count': 0,       # 复用已加载模型的次数
+    'load_seconds': 0.0,    # 模型加载累计耗时（秒）
+    'last_load_seconds': 0.0
+}
+
+
+def get_ocr_engine(lang='ch', **kwargs):
+    """
+    获取当前进程共享的PaddleOCR实例，首次调用时才加载模型
+
+    相同的 lang 和初始化参数会返回同一个实例，可在多个PDF、多次GUI运行和
+    不同脚本之间复用，避免重复支付模型初始化开销
+    """
+    key = (lang, tuple(sorted(kwargs.items())))
+    with _engine_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            _engine_metrics['reuse_count'] += 1
+            return engine
+
+        from paddleocr import PaddleOCR
+        start_time = time.time()
+        engine = PaddleOCR(lang=lang, **kwargs)
+        elapsed = time.time() - start_time
+
+        _engines[key] = engine
+        _engine_metrics['load_count'] += 1
+        _engine_metrics['load_seconds'] += elapsed
+        _engine_metrics['last_load_seconds'] = elapsed
+        return engine
+
+
+def is_ocr_engine_loaded(lang='ch', **kwargs):
+    """
+    检查指定参数的OCR引擎是否已在当前进程中加载
+    """
+    return (lang, tuple(sorted(kwargs.items()))) in _engines
+
+
+def get_engine_metrics():
+    """
+    返回模型加载统计信息的副本
+    """
+    with _engine_lock:
+        metrics = dict(_engine_metrics)
+        metrics['loaded_engines'] = len(_engines)
+    return metrics
+
+
+def predict_in_batches(ocr, images, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    将多页预处理后的图像数组分批提交给PaddleOCR识别
+
+    每批只调用一次 ocr.predict，然后按输入顺序拆分结果；
+    返回列表中每一项的结构与 ocr.predict(单张图像) 的返回值相同，
+    可直接交给原有的逐页结果处理代码
+    """
+    batch_size = max(1, int(batch_size or 1))
+    results = []
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size]
+        if len(batch) == 1:
+            outputs = list(ocr.predict(batch[0]))
+        else:
+            outputs = list(ocr.predict(batch))
+
+        if len(outputs) != len(batch):
+            raise RuntimeError(f"批量识别结果数量 ({len(outputs)}) 与输入页面数量 ({len(batch)}) 不一致")
+
+        results.extend([output] for output in outputs)
+    return results
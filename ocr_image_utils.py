@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+
+import cv2
+import numpy as np
+
+# 预处理链可用的步骤（按列出的顺序依次执行，纠偏放在二值化之前效果更好）
+#   resize   - 超过 max_size 时等比缩小
+#   gray     - 灰度化
+#   orient   - 检测并纠正页面方向（旋转90°/180°/270°的扫描页）
+#   deskew   - 估计并纠正小角度倾斜（投影轮廓法，在缩小的图像上估计）
+#   denoise  - 高斯模糊降噪
+#   binarize - Otsu阈值二值化
+PREPROCESS_STEPS = ('resize', 'gray', 'orient', 'deskew', 'denoise', 'binarize')
+
+# 默认预处理流程（与原文件版流程一致），用于封面区域、目录页眉等局部图像
+DEFAULT_PREPROCESS_STEPS = ('resize', 'gray', 'denoise', 'binarize')
+
+# 整页识别的预处理流程：识别前先纠正方向和倾斜
+PAGE_PREPROCESS_STEPS = ('resize', 'gray', 'orient', 'deskew', 'denoise', 'binarize')
+
+# 倾斜估计参数：搜索范围（度）、步长（度）、估计用图像的最大边长；小于 MIN_SKEW_ANGLE 的倾斜不纠正
+MAX_SKEW_ANGLE = 5.0
+SKEW_ANGLE_STEP = 0.25
+MIN_SKEW_ANGLE = 0.5
+SKEW_ESTIMATE_SIZE = 800
+MAX_SKEW_POINTS = 20000
+
+# 方向判断阈值：列投影比行投影起伏大 ORIENTATION_AXIS_RATIO 倍才认为页面被旋转了90°；
+# 至少 MIN_RAGGED_LINES 行且参差的一侧行数是另一侧的两倍以上才判断为倒置
+ORIENTATION_AXIS_RATIO = 2.0
+MIN_RAGGED_LINES = 3
+# 墨迹整体宽度达到高度的该倍数时视为一两行横排文字，不判断为旋转了90°
+MIN_STRIP_ASPECT = 4.0
+
+# 各方向对应的OpenCV旋转方式（顺时针角度）
+_ROTATE_CODES = {90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_COUNTERCLOCKWISE}
+
+
+def pixmap_to_array(pix):
+    """
+    将PyMuPDF的Pixmap样本缓冲区直接包装为NumPy数组（不复制数据）
+
+    注意：返回的数组与pixmap共享内存，使用期间必须保持pixmap对象存活
+    """
+    samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+    img = np.frombuffer(samples, dtype=np.uint8)
+    if pix.n == 1:
+        return img.reshape(pix.height, pix.width)
+    return img.reshape(pix.height, pix.width, pix.n)
+
+
+def resize_array_if_needed(img, max_size=2000):
+    """
+    如果图像尺寸超过指定大小，则在内存中等比缩放图像
+
+    返回 (图像数组, 缩放比例)，未缩放时比例为1.0且返回原数组
+    """
+    height, width = img.shape[:2]
+    if width <= max_size and height <= max_size:
+        return img, 1.0
+
+    # 计算缩放比例
+    ratio = min(max_size / width, max_size / height)
+    new_width = int(width * ratio)
+    new_height = int(height * ratio)
+
+    # 缩小图像时使用区域插值，效果接近LANCZOS且速度更快
+    resized = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    return resized, ratio
+
+
+def _ink_mask(gray, estimate_size):
+    """
+    缩小图像并用Otsu阈值取出墨迹像素（墨迹为True）
+    """
+    height, width = gray.shape[:2]
+    ratio = min(1.0, estimate_size / max(height, width))
+    small = gray
+    if ratio < 1.0:
+        small = cv2.resize(gray, (max(1, int(width * ratio)), max(1, int(height * ratio))), interpolation=cv2.INTER_AREA)
+    _, ink = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return ink
+
+
+def _projection_scores(ys, xs, angles):
+    """
+    计算各候选角度下墨迹像素行投影直方图的方差（一次性对所有角度向量化计算）
+    """
+    tans = np.tan(np.radians(angles))
+    # rows[i, j] 为第i个角度下第j个像素旋转后所在的行
+    rows = np.rint(ys[None, :] + xs[None, :] * tans[:, None]).astype(np.int64)
+    rows -= rows.min()
+    n_rows = int(rows.max()) + 1
+    offsets = np.arange(len(angles), dtype=np.int64)[:, None] * n_rows
+    profiles = np.bincount((rows + offsets).ravel(), minlength=len(angles) * n_rows).reshape(len(angles), n_rows)
+    return profiles.astype(np.float64).var(axis=1)
+
+
+def estimate_skew_angle(gray, max_angle=MAX_SKEW_ANGLE, step=SKEW_ANGLE_STEP, estimate_size=SKEW_ESTIMATE_SIZE):
+    """
+    投影轮廓法估计文字行的倾斜角度（度，逆时针为正）
+
+    在缩小的图像上取出墨迹像素（过多时等间隔抽样），先以1°步长粗搜索，再在最佳角度附近按 step 细搜索，
+    行投影直方图方差最大的角度即文字行最水平的角度。墨迹过少或各角度差别不明显时返回0
+    """
+    ys, xs = np.nonzero(_ink_mask(gray, estimate_size))
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > MAX_SKEW_POINTS:
+        stride = len(ys) // MAX_SKEW_POINTS + 1
+        ys, xs = ys[::stride], xs[::stride]
+
+    coarse = np.arange(-max_angle, max_angle + 0.5, 1.0)
+    coarse_scores = _projection_scores(ys, xs, coarse)
+    center = float(coarse[int(np.argmax(coarse_scores))])
+    fine = np.arange(max(-max_angle, center - 1.0), min(max_angle, center + 1.0) + step / 2, step)
+    fine_scores = _projection_scores(ys, xs, fine)
+    best = int(np.argmax(fine_scores))
+    # 各角度差别不明显（如空白页、图片页）时不旋转
+    if fine_scores[best] <= coarse_scores[len(coarse) // 2] * 1.01:
+        return 0.0
+    return float(fine[best])
+
+
+def _profile_contrast(profile):
+    """
+    投影的起伏程度（方差/均值²）；横排文字的行投影在文字行与行间空白之间交替，起伏很大
+    """
+    nonzero = np.nonzero(profile)[0]
+    if len(nonzero) < 2:
+        return 0.0
+    span = profile[nonzero[0]:nonzero[-1] + 1].astype(np.float64)
+    mean = span.mean()
+    return float(span.var() / (mean * mean)) if mean > 0 else 0.0
+
+
+def _text_lines(ink):
+    """
+    将连续的有墨迹像素行合并为横向墨迹带，返回 (起始行, 结束行, 各带每列是否有墨迹)，忽略高度不足3像素的带
+    """
+    rows = ink.sum(axis=1)
+    text_rows = rows > max(1, rows.max() * 0.05)
+    edges = np.diff(np.concatenate([[0], text_rows.astype(np.int8), [0]]))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    keep = ends - starts >= 3
+    starts, ends = starts[keep], ends[keep]
+    line_ink = np.stack([ink[start:end].any(axis=0) for start, end in zip(starts, ends)]) if len(starts) else None
+    return starts, ends, line_ink
+
+
+def _is_upside_down(ink):
+    """
+    根据文字行两端的参差判断横排文字是否倒置
+
+    正置的段落行首对齐（最多缩进两个字），行尾参差（段落末行较短）；倒置后两侧互换
+    """
+    starts, ends, line_ink = _text_lines(ink)
+    if len(starts) < MIN_RAGGED_LINES:
+        return False
+    heights = ends - starts
+
+    has_ink = line_ink.any(axis=1)
+    lefts = np.argmax(line_ink, axis=1)[has_ink]
+    rights = (line_ink.shape[1] - 1 - np.argmax(line_ink[:, ::-1], axis=1))[has_ink]
+    char_size = float(np.median(heights))
+
+    # 超过三个字宽的空缺才算参差（排除两个字的首行缩进）
+    left_gaps = lefts - lefts.min()
+    right_gaps = rights.max() - rights
+    ragged_left = int((left_gaps > 3 * char_size).sum())
+    ragged_right = int((right_gaps > 3 * char_size).sum())
+    return ragged_left >= MIN_RAGGED_LINES and ragged_left >= 2 * max(ragged_right, 1)
+
+
+def estimate_orientation(gray, estimate_size=SKEW_ESTIMATE_SIZE):
+    """
+    估计页面方向，返回使页面正置需要顺时针旋转的角度（0/90/180/270），无法判断时返回0
+
+    - 横排文字的行投影起伏明显大于列投影；列投影起伏更大说明页面被旋转了90°
+    - 再根据文字行行首对齐、行尾参差的特点区分正置与倒置
+    """
+    ink = _ink_mask(gray, estimate_size)
+    if int(ink.sum()) < 200:
+        return 0
+
+    rotation = 0
+    row_contrast = _profile_contrast(ink.sum(axis=1))
+    col_contrast = _profile_contrast(ink.sum(axis=0))
+    # 只有一两行横排文字时行投影几乎没有起伏，列投影却因字间空隙起伏很大，不能据此判断为旋转
+    rows = np.nonzero(ink.any(axis=1))[0]
+    cols = np.nonzero(ink.any(axis=0))[0]
+    is_strip = cols[-1] - cols[0] + 1 >= (rows[-1] - rows[0] + 1) * MIN_STRIP_ASPECT
+    if col_contrast > row_contrast * ORIENTATION_AXIS_RATIO and not is_strip:
+        ink = cv2.rotate(ink, cv2.ROTATE_90_CLOCKWISE)
+        rotation = 90
+    elif row_contrast <= col_contrast * ORIENTATION_AXIS_RATIO:
+        # 行、列投影都不明显（图片、表格为主的页面），不做判断
+        return 0
+
+    if _is_upside_down(ink):
+        rotation = (rotation + 180) % 360
+    return rotation
+
+
+def _rotation_transform(rotation, width, height):
+    """
+    按顺时针 rotation 度旋转 width x height 图像时的坐标变换矩阵 (3x3)
+    """
+    if rotation == 90:
+        return np.array([[0, -1, height - 1], [1, 0, 0], [0, 0, 1]], dtype=np.float64)
+    if rotation == 180:
+        return np.array([[-1, 0, width - 1], [0, -1, height - 1], [0, 0, 1]], dtype=np.float64)
+    if rotation == 270:
+        return np.array([[0, 1, 0], [-1, 0, width - 1], [0, 0, 1]], dtype=np.float64)
+    return np.eye(3)
+
+
+def _compose_transform(info, matrix):
+    """
+    将一个几何变换累加到 info['transform']（输入图像坐标 -> 预处理后图像坐标，3x3嵌套列表）
+    """
+    if info is None:
+        return
+    current = np.asarray(info.get('transform', np.eye(3)), dtype=np.float64)
+    info['transform'] = (np.asarray(matrix, dtype=np.float64) @ current).tolist()
+
+
+class PreprocessChain:
+    """
+    可配置的OCR图像预处理链：在同一块内存图像上依次执行各步骤
+
+    - 中间结果写入按线程预分配的缓冲区，页面尺寸不变时在页面之间复用，不再为每页分配新数组
+    - 只有最终送入PaddleOCR的三通道数组是新分配的（它会在队列中等待识别，不能被下一页覆盖）
+    - 记录每个步骤的累计耗时，可通过 timing_report() 查看
+
+    同一个实例可以被多个预处理线程同时使用（缓冲区按线程隔离）
+    """
+
+    def __init__(self, steps=DEFAULT_PREPROCESS_STEPS, max_size=2000, blur_ksize=3):
+        unknown = [step for step in steps if step not in PREPROCESS_STEPS]
+        if unknown:
+            raise ValueError(f"未知的预处理步骤: {', '.join(unknown)}")
+        self.steps = tuple(steps)
+        self.max_size = max_size
+        self.blur_ksize = blur_ksize
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    @property
+    def signature(self):
+        """
+        预处理流程的标识（用于OCR结果缓存键），默认流程为 "resize-area|gray|gaussian3|otsu"
+        """
+        tokens = {'resize': 'resize-area', 'gray': 'gray', 'orient': 'orient', 'deskew': 'deskew',
+                  'denoise': f'gaussian{self.blur_ksize}', 'binarize': 'otsu'}
+        return "|".join(tokens[step] for step in self.steps)
+
+    def _buffer(self, name, shape):
+        """
+        获取当前线程的预分配缓冲区，尺寸变化时才重新分配
+        """
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            buffers[name] = buffer
+        return buffer
+
+    def _resize(self, img, info):
+        height, width = img.shape[:2]
+        if width <= self.max_size and height <= self.max_size:
+            return img
+        ratio = min(self.max_size / width, self.max_size / height)
+        size = (int(width * ratio), int(height * ratio))
+        dst = self._buffer('resize', (size[1], size[0]) + img.shape[2:])
+        cv2.resize(img, size, dst=dst, interpolation=cv2.INTER_AREA)
+        _compose_transform(info, np.diag([size[0] / width, size[1] / height, 1.0]))
+        return dst
+
+    def _gray(self, img, info):
+        if img.ndim == 2:
+            return img
+        code = cv2.COLOR_RGBA2GRAY if img.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        return cv2.cvtColor(img, code, dst=self._buffer('gray', img.shape[:2]))
+
+    def _orient(self, img, info):
+        rotation = estimate_orientation(self._gray(img, None))
+        if info is not None:
+            info['orientation'] = rotation
+        if rotation == 0:
+            return img
+        height, width = img.shape[:2]
+        shape = (width, height) + img.shape[2:] if rotation in (90, 270) else img.shape
+        dst = cv2.rotate(img, _ROTATE_CODES[rotation], dst=self._buffer('orient', shape))
+        _compose_transform(info, _rotation_transform(rotation, width, height))
+        return dst
+
+    def _deskew(self, img, info):
+        angle = estimate_skew_angle(self._gray(img, None))
+        if abs(angle) < MIN_SKEW_ANGLE:
+            angle = 0.0
+        if info is not None:
+            info['skew_angle'] = angle
+        if angle == 0.0:
+            return img
+        height, width = img.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+        _compose_transform(info, np.vstack([matrix, [0.0, 0.0, 1.0]]))
+        return cv2.warpAffine(img, matrix, (width, height), dst=self._buffer('deskew', img.shape),
+                              flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    def _denoise(self, img, info):
+        ksize = (self.blur_ksize, self.blur_ksize)
+        return cv2.GaussianBlur(img, ksize, 0, dst=self._buffer('denoise', img.shape))
+
+    def _binarize(self, img, info):
+        gray = self._gray(img, None)
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                                  dst=self._buffer('binarize', gray.shape))
+        return thresh
+
+    def _record(self, name, seconds):
+        with self._lock:
+            total, count = self.timings.get(name, (0.0, 0))
+            self.timings[name] = (total + seconds, count + 1)
+
+    def apply(self, img, info=None):
+        """
+        依次执行各步骤，返回处理后的图像（可能是本线程的缓冲区，处理下一页前有效）
+
+        info 为字典时，各步骤在其中记录处理信息：orientation（顺时针旋转角度）、skew_angle（纠偏角度）、
+        transform（输入图像坐标到处理后图像坐标的3x3变换矩阵，仅在图像发生几何变换时记录）
+        """
+        for step in self.steps:
+            start = time.perf_counter()
+            img = getattr(self, '_' + step)(img, info)
+            self._record(step, time.perf_counter() - start)
+        return img
+
+    def run(self, img, info=None):
+        """
+        执行预处理链并转换为PaddleOCR期望的三通道BGR数组（新数组，可安全地跨页面保留）
+        """
+        processed = self.apply(img, info)
+        start = time.perf_counter()
+        ocr_input = to_ocr_input(processed)
+        if ocr_input is processed:
+            ocr_input = processed.copy()
+        self._record('to_bgr', time.perf_counter() - start)
+        return ocr_input
+
+    def reset_timings(self):
+        with self._lock:
+            self.timings = {}
+
+    def timing_report(self):
+        """
+        返回各步骤平均耗时的文字说明，如 "gray 1.2ms, denoise 3.4ms (共120页)"
+        """
+        with self._lock:
+            timings = dict(self.timings)
+        if not timings:
+            return "无预处理记录"
+        parts = [f"{name} {total / count * 1000:.1f}ms" for name, (total, count) in timings.items()]
+        pages = max(count for _, count in timings.values())
+        return f"{', '.join(parts)} (每页平均，共{pages}页)"
+
+
+# 默认预处理链，用于局部区域图像
+DEFAULT_PREPROCESS_CHAIN = PreprocessChain()
+
+# 整页预处理链（方向和倾斜纠正）
+PAGE_PREPROCESS_CHAIN = PreprocessChain(PAGE_PREPROCESS_STEPS)
+
+
+def reset_preprocess_timings():
+    """
+    清空整页和局部区域两个预处理链的耗时统计
+    """
+    PAGE_PREPROCESS_CHAIN.reset_timings()
+    DEFAULT_PREPROCESS_CHAIN.reset_timings()
+
+
+def preprocess_timing_report():
+    """
+    整页预处理链的耗时统计；局部区域（封面模板、目录页、自适应DPI等）有记录时一并输出
+    """
+    report = f"整页 {PAGE_PREPROCESS_CHAIN.timing_report()}"
+    if DEFAULT_PREPROCESS_CHAIN.timings:
+        report += f"；局部区域 {DEFAULT_PREPROCESS_CHAIN.timing_report()}"
+    return report
+
+
+def to_ocr_input(img):
+    """
+    将单通道图像转换为PaddleOCR期望的三通道BGR数组
+    """
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    return img
+
+
+def render_page_array(page, dpi=200, max_size=2000):
+    """
+    将PDF页面渲染为缩放后的RGB数组（独立副本，可安全地在pixmap释放后使用）
+    """
+    pix = page.get_pixmap(dpi=dpi)
+    raw = pixmap_to_array(pix)
+
+    # 缩放会生成新数组；未缩放时复制一份，避免引用pixmap内存
+    rendered, _ = resize_array_if_needed(raw, max_size=max_size)
+    if rendered is raw:
+        rendered = raw.copy()
+    del pix
+    return rendered
+
+
+def render_page_clip(page, clip, dpi=100):
+    """
+    以指定DPI只渲染页面的局部区域（clip为PDF坐标系下的矩形），返回RGB数组副本
+    """
+    pix = page.get_pixmap(dpi=dpi, clip=clip)
+    region = pixmap_to_array(pix).copy()
+    del pix
+    return region
+
+
+def prepare_ocr_input(rendered, chain=None, info=None):
+    """
+    对渲染后的页面图像进行预处理，返回可直接送入PaddleOCR的数组
+
+    chain 为预处理链（默认 DEFAULT_PREPROCESS_CHAIN），info 为可选的处理信息记录字典
+    """
+    return (chain or DEFAULT_PREPROCESS_CHAIN).run(rendered, info)
+
+
+def render_page_for_ocr(page, dpi=200, max_size=2000, info=None):
+    """
+    将PDF页面渲染并预处理为可直接送入PaddleOCR的数组，全程不落盘（整页预处理，纠正方向和倾斜）
+
+    返回 (原始渲染图像, 预处理后的OCR输入数组)
+    原始渲染图像为缩放后的副本，可安全地在pixmap释放后使用；info 记录方向和倾斜纠正信息
+    """
+    rendered = render_page_array(page, dpi=dpi, max_size=max_size)
+    return rendered, prepare_ocr_input(rendered, PAGE_PREPROCESS_CHAIN, info)
+
+
+def save_debug_image(img, image_path):
+    """
+    调试模式下将中间图像写入磁盘（RGB数组会转换为OpenCV的BGR顺序）
+    """
+    if img.ndim == 3 and img.shape[2] == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    elif img.ndim == 3 and img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+    cv2.imwrite(image_path, img)
+    return image_path
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import threading
+
+import fitz
+
+from ocr_image_utils import render_page_array, prepare_ocr_input, PAGE_PREPROCESS_CHAIN
+from ocr_cache import page_cache_key, predict_with_cache
+from ocr_result import OCRPageResult, normalize_ocr_result, apply_preprocess_info
+from text_layer_probe import probe_text_layer
+from page_thumbnail import probe_blank_page, render_page_thumbnail
+
+# 各阶段之间队列的默认容量（限制同时驻留内存的页面图像数量）
+DEFAULT_QUEUE_SIZE = 8
+
+# 渲染线程同时保持打开的PDF数量（自适应DPI需要回到之前的页面渲染局部区域）
+MAX_OPEN_DOCS = 4
+
+# 阶段结束标记
+_STOP = object()
+
+
+class _PageItem:
+    """
+    在流水线各阶段之间传递的单页数据
+
+    native 为无需识别即可得到的结果（文本层、空白页或重复页）；page_signature 为重复页索引返回的页面签名；
+    regions 不为None时表示自适应DPI的局部重新识别任务，images 为各区域的高DPI图像
+    """
+
+    __slots__ = ('pdf_path', 'page_num', 'page_rect', 'images', 'native', 'error',
+                 'inputs', 'cache_keys', 'regions', 'placements', 'info', 'page_signature')
+
+    def __init__(self, pdf_path, page_num, page_rect=None, images=None, native=None, error=None,
+                 regions=None, placements=None):
+        self.pdf_path = pdf_path
+        self.page_num = page_num
+        self.page_rect = page_rect
+        self.images = images
+        self.native = native
+        self.error = error
+        self.inputs = None
+        self.cache_keys = None
+        self.regions = regions
+        self.placements = placements
+        self.info = {}
+        self.page_signature = None
+
+
+class OCRPipeline:
+    """
+    单进程流水线OCR：渲染 -> 预处理 -> 识别 -> 写出 四个阶段并行运行
+
+    - 渲染：一个生产者线程用PyMuPDF按顺序渲染页面（PyMuPDF文档对象不是线程安全的）；
+      启用 use_text_layer 时先检查页面自带的文本层，启用 skip_blank 时用缩略图检查空白页，
+      传入 duplicate_index 时在重复页索引中查找重复页（索引启用复用时，内容完全相同的页面不再渲染和识别）
+    - 预处理：多个线程执行OpenCV预处理和缓存键计算（OpenCV运算期间释放GIL）
+    - 识别：一个线程独占PaddleOCR实例，队列中已就绪的页面按批提交识别
+    - 写出：由调用方在 run() 返回的生成器中完成，识别线程无需等待磁盘写入
+
+    各阶段之间使用有界队列连接，内存中最多只保留有限数量的页面图像。
+
+    传入 adaptive (AdaptiveDPI) 时页面以低DPI渲染；识别线程发现低置信度区域后，
+    通过反馈队列请求渲染线程以高DPI渲染这些区域，再次识别合并后才输出该页
+    """
+
+    def __init__(self, ocr, dpi=200, max_size=2000, batch_size=1, preprocess_workers=None,
+                 queue_size=DEFAULT_QUEUE_SIZE, cache=None, image_hook=None, use_text_layer=False,
+                 adaptive=None, skip_blank=False, duplicate_index=None):
+        self.ocr = ocr
+        self.dpi = dpi
+        self.max_size = max_size
+        self.batch_size = max(1, int(batch_size or 1))
+        self.preprocess_workers = max(1, preprocess_workers or min(4, (os.cpu_count() or 2) - 1))
+        self.queue_size = max(1, queue_size)
+        self.cache = cache
+        # 可选回调 image_hook(pdf_path, page_num, rendered, ocr_input)，在预处理线程中调用（如保存调试图像）
+        self.image_hook = image_hook
+        self.use_text_layer = use_text_layer
+        self.adaptive = adaptive
+        self.skip_blank = skip_blank
+        self.duplicate_index = duplicate_index
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        通知所有阶段尽快停止
+        """
+        self._cancel_event.set()
+
+    def _put(self, q, item):
+        # 带超时地放入队列，取消时不会永久阻塞
+        while not self._cancel_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._cancel_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _render_stage(self, page_tasks, render_queue, refine_queue):
+        """
+        按任务顺序渲染页面；自适应DPI模式下优先处理识别线程提交的局部重新渲染请求
+        """
+        docs = {}
+
+        def get_document(pdf_path):
+            doc = docs.get(pdf_path)
+            if doc is None:
+                if len(docs) >= MAX_OPEN_DOCS:
+                    docs.pop(next(iter(docs))).close()
+                doc = fitz.open(pdf_path)
+                docs[pdf_path] = doc
+            return doc
+
+        def render_regions(request):
+            pdf_path, page_num, regions, transform = request
+            try:
+                rendered = self.adaptive.render_regions(get_document(pdf_path)[page_num], regions, transform)
+                item = _PageItem(pdf_path, page_num, images=[image for image, _ in rendered], regions=regions,
+                                 placements=[placement for _, placement in rendered])
+            except Exception as e:
+                item = _PageItem(pdf_path, page_num, error=f"局部重新渲染失败: {str(e)}", regions=regions)
+            return self._put(render_queue, item)
+
+        def drain_refinements(block):
+            # 返回False表示识别线程已不再需要重新渲染（或已取消）
+            while True:
+                try:
+                    request = self._get(refine_queue) if block else refine_queue.get_nowait()
+                except queue.Empty:
+                    return True
+                if request is _STOP or not render_regions(request):
+                    return False
+
+        try:
+            for pdf_path, page_num in page_tasks:
+                if self._cancel_event.is_set():
+                    break
+                if self.adaptive is not None:
+                    drain_refinements(block=False)
+                try:
+                    page = get_document(pdf_path)[page_num]
+                    native = None
+                    if self.use_text_layer:
+                        native = probe_text_layer(page, dpi=self.dpi, max_size=self.max_size)
+                    page_signature = None
+                    thumbnail = None
+                    if native is None and (self.skip_blank or self.duplicate_index is not None):
+                        # 空白页检查和重复页检测共用同一张缩略图
+                        thumbnail = render_page_thumbnail(page)
+                        if self.skip_blank:
+                            native = probe_blank_page(page, thumbnail)
+                        if native is None and self.duplicate_index is not None:
+                            native, page_signature = self.duplicate_index.lookup(pdf_path, page_num, thumbnail)
+                    rendered = None
+                    if native is None:
+                        if self.adaptive is not None:
+                            rendered = self.adaptive.render_low(page)
+                        else:
+                            rendered = render_page_array(page, dpi=self.dpi, max_size=self.max_size)
+                    item = _PageItem(pdf_path, page_num, page_rect=fitz.Rect(page.rect),
+                                     images=[rendered] if rendered is not None else None, native=native)
+                    if native is None:
+                        item.page_signature = page_signature
+                except Exception as e:
+                    item = _PageItem(pdf_path, page_num, error=f"页面渲染失败: {str(e)}")
+                if not self._put(render_queue, item):
+                    break
+
+            # 所有页面渲染完后，继续处理重新渲染请求，直到识别线程通知结束
+            if self.adaptive is not None and not self._cancel_event.is_set():
+                drain_refinements(block=True)
+        finally:
+            for doc in docs.values():
+                doc.close()
+            for _ in range(self.preprocess_workers):
+                self._put(render_queue, _STOP)
+
+    def _preprocess_stage(self, render_queue, ocr_queue):
+        """
+        预处理页面图像并计算缓存键
+        """
+        try:
+            while True:
+                item = self._get(render_queue)
+                if item is _STOP:
+                    break
+                if item.error is None and item.native is None:
+                    try:
+                        if item.regions is None:
+                            # 整页图像纠正方向和倾斜，局部区域沿用整页的方向
+                            item.inputs = [prepare_ocr_input(item.images[0], PAGE_PREPROCESS_CHAIN, item.info)]
+                        else:
+                            item.inputs = [prepare_ocr_input(image) for image in item.images]
+                        item.cache_keys = [None] * len(item.images)
+                        if self.cache is not None:
+                            if item.regions is not None:
+                                item.cache_keys = [page_cache_key(image, dpi=self.adaptive.high_dpi, region='adaptive')
+                                                   for image in item.images]
+                            else:
+                                dpi = self.adaptive.low_dpi if self.adaptive is not None else self.dpi
+                                item.cache_keys = [page_cache_key(item.images[0], dpi=dpi, max_size=self.max_size)]
+                        if self.image_hook is not None and item.regions is None:
+                            self.image_hook(item.pdf_path, item.page_num, item.images[0], item.inputs[0])
+                    except Exception as e:
+                        item.error = f"图像预处理失败: {str(e)}"
+                if not self._put(ocr_queue, item):
+                    break
+        finally:
+            self._put(ocr_queue, _STOP)
+
+    def _ocr_stage(self, ocr_queue, output_queue, refine_queue, total_pages):
+        """
+        识别线程：取出已就绪的页面（最多batch_size页）一次性识别，不为凑满一批而等待
+        """
+        remaining_workers = self.preprocess_workers
+        finished = 0
+        partials = {}
+
+        def emit(page_item, result, error):
+            nonlocal finished
+            finished += 1
+            if self.adaptive is not None and finished >= total_pages:
+                refine_queue.put(_STOP)
+            # 新识别的页面加入重复页索引，供后续内容相同的页面复用
+            if error is None and page_item.page_signature is not None:
+                try:
+                    page_result = normalize_ocr_result(result)
+                    self.duplicate_index.add(page_item.pdf_path, page_item.page_num, page_item.page_signature,
+                                             page_result)
+                except Exception as e:
+                    print(f"重复页索引更新失败: {str(e)}")
+            return self._put(output_queue, (page_item.pdf_path, page_item.page_num, result, error))
+
+        if self.adaptive is not None and total_pages == 0:
+            refine_queue.put(_STOP)
+
+        try:
+            while remaining_workers > 0:
+                item = self._get(ocr_queue)
+                if item is _STOP:
+                    remaining_workers -= 1
+                    if self._cancel_event.is_set():
+                        break
+                    continue
+
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        next_item = ocr_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if next_item is _STOP:
+                        remaining_workers -= 1
+                        continue
+                    batch.append(next_item)
+
+                # 整批的所有图像（整页或局部区域）一次提交识别
+                ready = [entry for entry in batch if entry.error is None and entry.native is None]
+                outputs = {}
+                if ready:
+                    images = [image for entry in ready for image in entry.inputs]
+                    keys = [key for entry in ready for key in entry.cache_keys]
+                    try:
+                        results, _ = predict_with_cache(self.ocr, images, keys, self.cache, self.batch_size)
+                        position = 0
+                        for entry in ready:
+                            outputs[id(entry)] = results[position:position + len(entry.inputs)]
+                            position += len(entry.inputs)
+                    except Exception as e:
+                        for entry in ready:
+                            entry.error = str(e)
+
+                for entry in batch:
+                    if not self._handle_recognized(entry, outputs.get(id(entry)), partials, refine_queue, emit):
+                        return
+        finally:
+            self._put(output_queue, _STOP)
+
+    def _handle_recognized(self, entry, outputs, partials, refine_queue, emit):
+        """
+        处理一页（或一组局部区域）的识别结果：直接输出，或在自适应DPI模式下请求局部重新识别
+        """
+        key = (entry.pdf_path, entry.page_num)
+        if entry.regions is not None:
+            # 局部重新识别完成，与低DPI结果合并后输出
+            page_result, page_item = partials.pop(key)
+            if entry.error is None:
+                region_results = [OCRPageResult.from_predict(output) for output in outputs]
+                page_result = self.adaptive.merge_refined(page_result, entry.regions, region_results, entry.placements)
+            return emit(page_item, self.adaptive.finalize(page_item.page_rect, page_result, len(entry.regions)), None)
+
+        if entry.error is not None or entry.native is not None:
+            return emit(entry, entry.native, entry.error)
+
+        if self.adaptive is None:
+            return emit(entry, apply_preprocess_info(outputs[0], entry.info), None)
+
+        page_result = apply_preprocess_info(OCRPageResult.from_predict(outputs[0]), entry.info)
+        # 纠正过方向或倾斜的页面，区域按原始页面坐标裁剪，再按整页相同的角度转正后识别
+        regions = self.adaptive.find_refine_regions(page_result, entry.images[0].shape)
+        if not regions:
+            return emit(entry, self.adaptive.finalize(entry.page_rect, page_result), None)
+        partials[key] = (page_result, entry)
+        refine_queue.put((entry.pdf_path, entry.page_num, regions, page_result.meta.get('transform')))
+        return True
+
+    def run(self, page_tasks):
+        """
+        处理 (pdf_path, page_num) 任务列表，按识别完成顺序产出
+        (pdf_path, page_num, result, error)，结果的写出在调用方线程中进行
+
+        result 为 ocr.predict 的输出；直接使用文本层、空白页、重复页、纠正过方向/倾斜的页面及自适应DPI模式下为 OCRPageResult
+        """
+        page_tasks = list(page_tasks)
+        render_queue = queue.Queue(maxsize=self.queue_size)
+        ocr_queue = queue.Queue(maxsize=self.queue_size)
+        output_queue = queue.Queue(maxsize=self.queue_size)
+        # 重新渲染请求很小，使用无界队列，避免识别线程与渲染线程互相等待
+        refine_queue = queue.Queue()
+
+        threads = [threading.Thread(target=self._render_stage, args=(page_tasks, render_queue, refine_queue),
+                                    daemon=True)]
+        threads.extend(threading.Thread(target=self._preprocess_stage, args=(render_queue, ocr_queue), daemon=True)
+                       for _ in range(self.preprocess_workers))
+        threads.append(threading.Thread(target=self._ocr_stage,
+                                        args=(ocr_queue, output_queue, refine_queue, len(page_tasks)), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(output_queue)
+                if item is _STOP:
+                    break
+                yield item
+        finally:
+            # 调用方提前结束（取消或出错）时通知各阶段退出
+            self._cancel_event.set()
+            for thread in threads:
+                thread.join(timeout=5)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class OCRPageResult:
+    """
+    单页OCR结果的结构化表示
+
+    texts   - 识别出的文本列表
+    scores  - 每条文本的置信度 (float32 数组)
+    polys   - 每条文本的四点多边形坐标，形状为 (N, 4, 2) 的整数数组
+    meta    - 页面级附加信息（可序列化为JSON的字典）
+    """
+
+    def __init__(self, texts=None, scores=None, polys=None, meta=None):
+        self.texts = list(texts or [])
+        self.meta = dict(meta or {})
+        count = len(self.texts)
+
+        if scores is None or len(scores) == 0:
+            scores = np.ones(count, dtype=np.float32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+
+        # 没有坐标信息时用全零占位，并通过 has_polys 标记
+        self.has_polys = polys is not None and len(polys) > 0
+        if not self.has_polys:
+            polys = np.zeros((count, 4, 2), dtype=np.int32)
+        polys = np.asarray(polys)
+        if polys.dtype.kind not in 'iu':
+            polys = polys.astype(np.int32)
+        self.polys = polys.reshape(-1, 4, 2)
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def from_predict(cls, result):
+        """
+        直接从 ocr.predict 的输出构建结构化结果，不经过字符串转换
+
+        优先使用与 rec_texts 一一对应的 rec_polys，缺失时退回 dt_polys；
+        同时兼容旧版 ocr.ocr 的 [[框, (文本, 置信度)], ...] 列表及只有 'text' 字段的结果
+        """
+        if not result or not result[0]:
+            return cls()
+
+        page = result[0]
+        if not hasattr(page, 'keys'):
+            return cls._from_legacy(page) if isinstance(page, (list, tuple)) else cls()
+        if 'rec_texts' not in page:
+            return cls([str(page['text'])]) if 'text' in page else cls()
+
+        texts = [str(text) for text in page['rec_texts']]
+        scores = page['rec_scores'] if 'rec_scores' in page else None
+
+        polys = None
+        for key in ('rec_polys', 'dt_polys'):
+            if key in page and len(page[key]) > 0:
+                polys = page[key]
+                break
+
+        polys = _polys_to_array(polys)
+        if len(polys) and len(polys) != len(texts):
+            print(f"Warning: Text count ({len(texts)}) and Poly count ({len(polys)}) mismatch. Truncating to min length.")
+            texts = texts[:len(polys)]
+            polys = polys[:len(texts)]
+
+        count = len(texts)
+        if scores is not None:
+            scores = np.asarray(scores, dtype=np.float32)[:count]
+            if len(scores) != count:
+                scores = None
+
+        return cls(texts, scores, polys)
+
+    @classmethod
+    def _from_legacy(cls, items):
+        """
+        从旧版列表格式构建：[框, (文本, 置信度)]、[框, 文本]、{'text': 文本} 或纯字符串
+        """
+        texts = []
+        scores = []
+        polys = []
+        for item in items:
+            if isinstance(item, (list, tuple)) and len(item) > 1:
+                box, value = item[0], item[1]
+                if isinstance(value, (list, tuple)) and len(value) > 0:
+                    text = str(value[0])
+                    score = float(value[1]) if len(value) > 1 else 1.0
+                elif isinstance(value, (str, int, float)):
+                    text, score = str(value), 1.0
+                else:
+                    continue
+                texts.append(text)
+                scores.append(score)
+                polys.append(box)
+            elif hasattr(item, 'keys') and 'text' in item:
+                texts.append(str(item['text']))
+                scores.append(1.0)
+            elif isinstance(item, str):
+                texts.append(item)
+                scores.append(1.0)
+
+        # 只有部分文本带坐标时坐标无法与文本对应，全部丢弃
+        try:
+            polys = _polys_to_array(polys) if len(polys) == len(texts) else None
+        except ValueError:
+            polys = None
+        return cls(texts, np.asarray(scores, dtype=np.float32), polys)
+
+    def to_predict_result(self):
+        """
+        转换为与 ocr.predict 输出相同结构的精简结果，供沿用原始结果的代码使用
+        """
+        polys = list(self.polys) if self.has_polys else []
+        boxes = self.bounding_boxes() if self.has_polys else np.zeros((0, 4), dtype=np.int32)
+        return [{
+            'dt_polys': polys,
+            'rec_texts': list(self.texts),
+            'rec_scores': self.scores,
+            'rec_polys': polys,
+            'rec_boxes': boxes
+        }]
+
+    def to_source_coordinates(self):
+        """
+        预处理时页面被旋转（方向或倾斜纠正）的结果，将坐标换算回原始渲染图像坐标
+
+        meta 中的 transform 为原始图像坐标到识别图像坐标的变换矩阵；没有该记录时返回自身
+        """
+        transform = self.meta.get('transform')
+        if transform is None or not self.has_polys:
+            return self
+        inverse = np.linalg.inv(np.asarray(transform, dtype=np.float64))
+        points = self.polys[:len(self)].reshape(-1, 2).astype(np.float64)
+        mapped = points @ inverse[:2, :2].T + inverse[:2, 2]
+        meta = {key: value for key, value in self.meta.items() if key != 'transform'}
+        return OCRPageResult(self.texts, self.scores[:len(self)], np.round(mapped).reshape(-1, 4, 2).astype(np.int32),
+                             meta=meta)
+
+    def describe_correction(self):
+        """
+        返回预处理时方向/倾斜纠正的说明文字，未纠正时返回空字符串
+        """
+        parts = []
+        if self.meta.get('orientation'):
+            parts.append(f"顺时针旋转{self.meta['orientation']}°")
+        if self.meta.get('skew_angle'):
+            parts.append(f"纠偏{self.meta['skew_angle']:+.2f}°")
+        return "，".join(parts)
+
+    def bounding_boxes(self):
+        """
+        返回每条文本的外接矩形，形状为 (N, 4) 的数组: min_x, min_y, max_x, max_y
+        """
+        if len(self.polys) == 0:
+            return np.zeros((0, 4), dtype=np.int32)
+        mins = self.polys.min(axis=1)
+        maxs = self.polys.max(axis=1)
+        return np.concatenate([mins, maxs], axis=1)
+
+
+def normalize_ocr_result(result):
+    """
+    将任意格式的OCR结果（ocr.predict 输出、旧版列表格式或 OCRPageResult）统一转换为 OCRPageResult
+
+    每页只需转换一次，之后的文本提取、表格解析、结构化提取和输出都直接使用转换后的对象
+    """
+    if isinstance(result, OCRPageResult):
+        return result
+    return OCRPageResult.from_predict(result)
+
+
+def apply_preprocess_info(result, info):
+    """
+    将预处理信息（方向、倾斜角度、坐标变换）记录到结果的 meta 中
+
+    只有页面实际被旋转时才转换为 OCRPageResult，未纠正的页面原样返回 ocr.predict 的输出
+    """
+    if not info or not (info.get('orientation') or info.get('skew_angle')):
+        return result
+    page_result = normalize_ocr_result(result)
+    page_result.meta.update(orientation=info.get('orientation', 0), skew_angle=info.get('skew_angle', 0.0))
+    if 'transform' in info:
+        page_result.meta['transform'] = info['transform']
+    return page_result
+
+
+def scale_transform(transform, factor):
+    """
+    识别结果坐标整体缩放 factor 倍后，对应调整 transform（输入、输出两侧的坐标同时缩放）
+    """
+    scale = np.diag([factor, factor, 1.0])
+    return (scale @ np.asarray(transform, dtype=np.float64) @ np.linalg.inv(scale)).tolist()
+
+
+def _polys_to_array(polys):
+    """
+    将PaddleOCR输出的多边形列表（numpy数组或嵌套列表）转换为 (N, 4, 2) 数组
+    非四点的多边形取其外接矩形
+    """
+    if polys is None or len(polys) == 0:
+        return np.zeros((0, 4, 2), dtype=np.int32)
+
+    if isinstance(polys, np.ndarray) and polys.ndim == 3 and polys.shape[1:] == (4, 2):
+        return polys.astype(np.int32, copy=False)
+
+    converted = np.empty((len(polys), 4, 2), dtype=np.int32)
+    for i, poly in enumerate(polys):
+        points = np.asarray(poly).reshape(-1, 2)
+        if len(points) == 4:
+            converted[i] = points
+        else:
+            min_x, min_y = points.min(axis=0)
+            max_x, max_y = points.max(axis=0)
+            converted[i] = [[min_x, min_y], [max_x, min_y], [max_x, max_y], [min_x, max_y]]
+    return converted
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import struct
+
+import numpy as np
+
+from ocr_result import OCRPageResult
+
+# 每个PDF过程文件夹中的结构化OCR结果文件名（整页识别阶段）
+OCR_STORE_FILENAME = "ocr_results.bin"
+# 封面和目录识别阶段的结构化结果文件名（与整页识别阶段分开，各阶段清空结果文件时互不影响）
+TOC_STORE_FILENAME = "toc_ocr_results.bin"
+
+# 文件格式：
+#   文件头   MAGIC
+#   页面记录 (可重复追加，同一页以最后一条记录为准)
+#     记录头   b'PAGE', 页码(从0开始), 文本条数N, 文本字节数, 元数据字节数   ('<4sIIII')
+#     文本长度 uint32[N]
+#     元数据   UTF-8 JSON
+#     文本内容 UTF-8 拼接
+#     (对齐到4字节)
+#     置信度   float32[N]
+#     多边形数 uint32 (没有坐标信息时为0)
+#     多边形   int16[M, 4, 2]
+#     (对齐到4字节)
+MAGIC = b"OCRSTORE0001"  # 12字节，保证后续数组按4字节对齐
+RECORD_HEADER = struct.Struct('<4sIIII')
+RECORD_TAG = b'PAGE'
+
+
+def _padding(length):
+    return (-length) % 4
+
+
+def reset_store(store_path):
+    """
+    新建（或清空）结构化结果文件，只写入文件头
+    """
+    with open(store_path, 'wb') as f:
+        f.write(MAGIC)
+
+
+def append_page_result(store_path, page_num, page_result):
+    """
+    将单页结构化OCR结果追加写入结果文件
+
+    每页结果独立追加，处理中断时已完成的页面不会丢失
+    """
+    texts = [text.encode('utf-8') for text in page_result.texts]
+    count = len(texts)
+    text_lengths = np.array([len(text) for text in texts], dtype=np.uint32)
+    text_bytes = b''.join(texts)
+    meta_bytes = json.dumps(page_result.meta, ensure_ascii=False).encode('utf-8') if page_result.meta else b''
+
+    scores = np.asarray(page_result.scores, dtype=np.float32)[:count]
+    # 坐标范围远小于int16上限，压缩为int16以减小文件体积
+    polys = np.clip(page_result.polys[:count], -32768, 32767).astype(np.int16)
+    if not page_result.has_polys:
+        polys = np.zeros((0, 4, 2), dtype=np.int16)
+        count_polys = 0
+    else:
+        count_polys = count
+
+    head_length = len(meta_bytes) + text_lengths.nbytes + len(text_bytes)
+
+    if not os.path.exists(store_path):
+        reset_store(store_path)
+
+    with open(store_path, 'ab') as f:
+        f.write(RECORD_HEADER.pack(RECORD_TAG, page_num, count, len(text_bytes), len(meta_bytes)))
+        f.write(text_lengths.tobytes())
+        f.write(meta_bytes)
+        f.write(text_bytes)
+        f.write(b'\0' * _padding(head_length))
+        f.write(scores.tobytes())
+        f.write(struct.pack('<I', count_polys))
+        f.write(polys.tobytes())
+
+
+def load_page_results(store_path):
+    """
+    以内存映射方式读取结构化结果文件，返回 {页码: OCRPageResult}
+
+    置信度和坐标数组直接引用映射的文件内容，不做额外复制；
+    文件末尾不完整的记录（例如处理中断时写了一半）会被忽略
+    """
+    results = {}
+    if not os.path.exists(store_path) or os.path.getsize(store_path) <= len(MAGIC):
+        return results
+
+    data = np.memmap(store_path, dtype=np.uint8, mode='r')
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"不是有效的OCR结果文件: {store_path}")
+
+    total = len(data)
+    offset = len(MAGIC)
+    while offset + RECORD_HEADER.size <= total:
+        tag, page_num, count, text_length, meta_length = RECORD_HEADER.unpack(
+            bytes(data[offset:offset + RECORD_HEADER.size]))
+        if tag != RECORD_TAG:
+            break
+        offset += RECORD_HEADER.size
+
+        head_length = meta_length + count * 4 + text_length
+        scores_offset = offset + head_length + _padding(head_length)
+        polys_offset = scores_offset + count * 4 + 4
+        if polys_offset > total:
+            break
+
+        count_polys, = struct.unpack('<I', bytes(data[polys_offset - 4:polys_offset]))
+        record_end = polys_offset + count_polys * 16
+        if record_end > total:
+            break
+
+        text_lengths = np.frombuffer(data, dtype=np.uint32, count=count, offset=offset)
+        offset += count * 4
+
+        meta = {}
+        if meta_length:
+            meta = json.loads(bytes(data[offset:offset + meta_length]).decode('utf-8'))
+        offset += meta_length
+        text_bytes = bytes(data[offset:offset + text_length])
+        texts = []
+        position = 0
+        for length in text_lengths.tolist():
+            texts.append(text_bytes[position:position + length].decode('utf-8'))
+            position += length
+
+        scores = np.frombuffer(data, dtype=np.float32, count=count, offset=scores_offset)
+        polys = None
+        if count_polys:
+            polys = np.frombuffer(data, dtype=np.int16, count=count_polys * 8, offset=polys_offset).reshape(-1, 4, 2)
+
+        results[page_num] = OCRPageResult(texts, scores, polys, meta=meta)
+        offset = record_end
+
+    return results
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+
+from ocr_image_utils import render_page_for_ocr
+from ocr_engine import get_ocr_engine
+from ocr_cache import OCRResultCache, page_cache_key, predict_with_cache
+from text_layer_probe import probe_text_layer
+from page_thumbnail import probe_blank_page
+from ocr_result import apply_preprocess_info
+
+# 工作进程内的全局状态（每个进程各自一份）
+_worker_ocr = None
+_worker_cache = None
+_worker_adaptive = None
+_worker_settings = {}
+_worker_docs = {}
+
+# 每个工作进程最多同时保持打开的PDF数量
+MAX_OPEN_DOCS = 4
+
+# 跨进程传递时保留的结果字段（顺序与PaddleOCR原始输出一致，保证 str(result) 可被表格解析器解析）
+RESULT_KEYS = ('dt_polys', 'rec_texts', 'rec_scores', 'rec_polys', 'rec_boxes')
+
+
+def slim_ocr_result(result):
+    """
+    精简PaddleOCR的predict输出，只保留文本、置信度和坐标字段
+
+    原始结果中包含输入图像等大数组，跨进程传递代价很高；
+    返回值保持 [dict] 的结构，与 ocr.predict 的输出用法一致
+    """
+    if not result or not result[0]:
+        return result
+
+    page = result[0]
+    if isinstance(page, dict) or hasattr(page, 'keys'):
+        slim = {}
+        for key in RESULT_KEYS:
+            if key in page:
+                value = page[key]
+                slim[key] = list(value) if isinstance(value, (list, tuple)) else value
+        return [slim]
+
+    # 旧格式（列表）本身已足够精简
+    return [page]
+
+
+def _init_worker(lang, dpi, max_size, threads_per_worker, cache_dir, use_text_layer, adaptive=None, skip_blank=False):
+    """
+    工作进程初始化：限制推理线程数，并只加载一次PaddleOCR模型
+    """
+    global _worker_ocr, _worker_cache, _worker_adaptive
+    # 避免多个进程各自占满所有核心
+    os.environ.setdefault('OMP_NUM_THREADS', str(threads_per_worker))
+    os.environ.setdefault('MKL_NUM_THREADS', str(threads_per_worker))
+
+    _worker_ocr = get_ocr_engine(lang)
+    if cache_dir:
+        _worker_cache = OCRResultCache(cache_dir)
+    _worker_adaptive = adaptive
+    _worker_settings.update(dpi=dpi, max_size=max_size, use_text_layer=use_text_layer, skip_blank=skip_blank)
+
+
+def _get_document(pdf_path):
+    """
+    获取当前进程中已打开的PDF文档，超过上限时关闭最早打开的文档
+    """
+    doc = _worker_docs.get(pdf_path)
+    if doc is None:
+        if len(_worker_docs) >= MAX_OPEN_DOCS:
+            oldest_path = next(iter(_worker_docs))
+            _worker_docs.pop(oldest_path).close()
+        doc = fitz.open(pdf_path)
+        _worker_docs[pdf_path] = doc
+    return doc
+
+
+def _ocr_batch_task(pdf_path, page_nums):
+    """
+    在工作进程中渲染、预处理并批量识别同一PDF的若干页面
+
+    返回 [(pdf_path, page_num, 精简后的结果, 错误信息), ...]；
+    直接使用文本层、空白页、纠正过方向/倾斜的页面及自适应DPI模式下，结果为 OCRPageResult
+    """
+    try:
+        doc = _get_document(pdf_path)
+        dpi = _worker_settings['dpi']
+        max_size = _worker_settings['max_size']
+        page_results = {}
+        ocr_pages = []
+        infos = []
+        images = []
+        keys = []
+        for page_num in page_nums:
+            page = doc[page_num]
+            if _worker_settings['use_text_layer']:
+                native = probe_text_layer(page, dpi=dpi, max_size=max_size)
+                if native is not None:
+                    page_results[page_num] = native
+                    continue
+            if _worker_settings['skip_blank']:
+                blank = probe_blank_page(page)
+                if blank is not None:
+                    page_results[page_num] = blank
+                    continue
+            if _worker_adaptive is not None:
+                page_results[page_num] = _worker_adaptive.recognize_page(_worker_ocr, page, _worker_cache)
+                continue
+            info = {}
+            rendered, ocr_input = render_page_for_ocr(page, dpi=dpi, max_size=max_size, info=info)
+            ocr_pages.append(page_num)
+            infos.append(info)
+            images.append(ocr_input)
+            keys.append(page_cache_key(rendered, dpi=dpi, max_size=max_size) if _worker_cache else None)
+        if images:
+            results, _ = predict_with_cache(_worker_ocr, images, keys, _worker_cache, batch_size=len(images))
+            for page_num, result, info in zip(ocr_pages, results, infos):
+                page_results[page_num] = apply_preprocess_info(slim_ocr_result(result), info)
+        return [(pdf_path, page_num, page_results[page_num], None) for page_num in page_nums]
+    except Exception as e:
+        return [(pdf_path, page_num, None, str(e)) for page_num in page_nums]
+
+
+def group_page_tasks(page_tasks, batch_size):
+    """
+    将 (pdf_path, page_num) 任务按同一PDF的连续页面分组，每组最多batch_size页
+    """
+    batches = []
+    for pdf_path, page_num in page_tasks:
+        if batches and batches[-1][0] == pdf_path and len(batches[-1][1]) < batch_size:
+            batches[-1][1].append(page_num)
+        else:
+            batches.append((pdf_path, [page_num]))
+    return batches
+
+
+class OCRWorkerPool:
+    """
+    页面级并行OCR进程池：每个工作进程初始化一次PaddleOCR，页面任务按完成顺序返回
+    """
+
+    def __init__(self, workers=None, lang='ch', dpi=200, max_size=2000, cache_dir=None, use_text_layer=False,
+                 adaptive=None, skip_blank=False):
+        cpu_count = os.cpu_count() or 1
+        self.workers = max(1, workers or cpu_count)
+        threads_per_worker = max(1, cpu_count // self.workers)
+
+        # 使用spawn启动方式，避免在GUI线程/Paddle已初始化的进程中fork
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(lang, dpi, max_size, threads_per_worker, cache_dir, use_text_layer, adaptive, skip_blank)
+        )
+
+    def run(self, page_tasks, batch_size=1):
+        """
+        提交 (pdf_path, page_num) 任务列表，按完成顺序产出
+        (pdf_path, page_num, result, error)
+
+        batch_size 大于1时，同一PDF的连续页面在工作进程内一次性批量识别
+        """
+        batch_size = max(1, int(batch_size or 1))
+        futures = [self.executor.submit(_ocr_batch_task, pdf_path, page_nums)
+                   for pdf_path, page_nums in group_page_tasks(page_tasks, batch_size)]
+        for future in as_completed(futures):
+            for page_result in future.result():
+                yield page_result
+
+    def cancel(self):
+        """
+        取消尚未开始的页面任务
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+import queue
+import shutil
+import signal
+import asyncio
+import tempfile
+import threading
+import subprocess
+from collections import deque
+
+import fitz
+
+# 单页超时（秒）：ocrmypdf超过该时间没有任何进度输出时视为卡死并终止
+DEFAULT_PAGE_TIMEOUT = 300
+
+# 每处理该页数产出一次进度事件
+PROGRESS_STEP = 10
+
+# 处理失败时错误信息中保留的stderr末尾行数
+MAX_ERROR_LINES = 20
+
+# ocrmypdf日志中以页码开头的行（-v 1 时每页各处理步骤都会输出）
+# 总页数不从日志读取："Start processing N pages concurrently" 中的N是并行处理的页数（不超过 --jobs）
+PAGE_LINE_PATTERN = re.compile(r'^\s*(\d+)\s+\S')
+
+# 每个ocrmypdf进程默认使用的 --jobs 数（页面级并行在少量核心内收益最高，更多核心分给其他文件）
+DEFAULT_JOBS_PER_PROCESS = 2
+
+# 页数超过该值的PDF拆分为多个页面范围分别处理，完成后按页码顺序合并
+DEFAULT_SHARD_PAGES = 100
+
+
+def plan_concurrency(job_count, cpu_count=None, jobs_per_process=None, processes=None):
+    """
+    分配核心预算，返回 (同时运行的进程数, 每个进程的 --jobs)，保证两者乘积不超过核心数
+
+    指定 processes 时按进程数平分核心，否则每个进程 jobs_per_process 个核心；
+    文件数少于可同时运行的进程数时，多出的核心分给各个进程的 --jobs
+    """
+    cores = max(1, cpu_count or os.cpu_count() or 1)
+    if processes:
+        processes = min(processes, cores)
+    else:
+        processes = cores // max(1, min(jobs_per_process or DEFAULT_JOBS_PER_PROCESS, cores))
+    processes = max(1, min(job_count, processes))
+    return processes, max(1, cores // processes)
+
+
+def pdf_page_count(pdf_path):
+    """
+    返回PDF的页数，无法打开时返回None
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception:
+        return None
+
+
+def split_pdf(input_path, shard_dir, shard_pages=DEFAULT_SHARD_PAGES):
+    """
+    将PDF按页面范围拆分为多个分片文件，返回 [(分片路径, (首页, 末页)), ...]
+
+    页数不超过 shard_pages 的PDF不拆分，返回空列表；最后一个分片页数不足一半时并入前一个分片
+    """
+    with fitz.open(input_path) as doc:
+        total_pages = len(doc)
+        if total_pages <= shard_pages:
+            return []
+        starts = list(range(0, total_pages, shard_pages))
+        if len(starts) > 1 and total_pages - starts[-1] < shard_pages // 2:
+            starts.pop()
+        shards = []
+        for i, first in enumerate(starts):
+            last = starts[i + 1] - 1 if i + 1 < len(starts) else total_pages - 1
+            shard_path = os.path.join(shard_dir, f"shard_{i:03d}.pdf")
+            with fitz.open() as shard:
+                shard.insert_pdf(doc, from_page=first, to_page=last)
+                shard.save(shard_path)
+            shards.append((shard_path, (first, last)))
+    return shards
+
+
+def merge_pdfs(input_paths, output_path):
+    """
+    按顺序合并多个PDF（分片处理结果）为一个文件
+    """
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with fitz.open() as merged:
+        for path in input_paths:
+            with fitz.open(path) as part:
+                merged.insert_pdf(part)
+        merged.save(output_path, garbage=3, deflate=True)
+
+
+class OCRmyPDFJob:
+    """
+    单个ocrmypdf任务：输入、输出路径及文件大小（用于调度顺序）
+    """
+
+    __slots__ = ('input_path', 'output_path', 'size', 'returncode', 'error', 'elapsed', 'parent', 'page_range',
+                 'total_pages', 'pages_seen')
+
+    def __init__(self, input_path, output_path, parent=None, page_range=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        try:
+            self.size = os.path.getsize(input_path)
+        except OSError:
+            self.size = 0
+        self.returncode = None
+        self.error = None
+        self.elapsed = 0.0
+        # 分片任务所属的原始任务及其页面范围（从0开始，含首尾）
+        self.parent = parent
+        self.page_range = page_range
+        # 处理进度：总页数（分片为其页面范围的页数）及已开始处理的页面
+        if page_range is not None:
+            self.total_pages = page_range[1] - page_range[0] + 1
+        else:
+            self.total_pages = pdf_page_count(input_path)
+        self.pages_seen = set()
+
+    @property
+    def success(self):
+        return self.returncode == 0 and self.error is None
+
+    def record_progress(self, line):
+        """
+        解析一行ocrmypdf日志，以页码开头且该页第一次出现时记录进度并返回True
+
+        分片任务的页码同时换算为原文件页码，汇总到原任务的进度中
+        """
+        match = PAGE_LINE_PATTERN.match(line)
+        if not match or int(match.group(1)) in self.pages_seen:
+            return False
+        page = int(match.group(1))
+        self.pages_seen.add(page)
+        if self.parent is not None:
+            self.parent.pages_seen.add(self.page_range[0] + page)
+        return True
+
+
+class OCRmyPDFRunner:
+    """
+    并行运行多个ocrmypdf进程（asyncio管理子进程）
+
+    - 核心预算在进程之间分配：同时运行的进程数 × 每个进程的 --jobs ≤ 核心数
+    - 按文件大小从大到小调度，避免最后只剩一个大文件单独运行
+    - 实时读取每个进程的stderr并解析页面进度；超过 page_timeout 秒没有任何进度输出时终止该进程，
+      超时按页计算，页数多的文件不会因总耗时长而被误判
+    - cancel() 立即终止所有正在运行的ocrmypdf进程组（包括其创建的tesseract等子进程）
+    - run() 按事件发生顺序产出 ('start', job)、('progress', job)、('done', job)，由调用方线程写日志
+    """
+
+    def __init__(self, options, processes=None, jobs_per_process=None, page_timeout=DEFAULT_PAGE_TIMEOUT,
+                 command='ocrmypdf'):
+        self.options = list(options)
+        self.processes = processes
+        self.jobs_per_process = jobs_per_process
+        self.page_timeout = page_timeout
+        self.command = command
+        self._cancel_event = threading.Event()
+        self._loop = None
+        self._running = set()
+        self._shards = {}
+        self._shard_dirs = []
+        self._shard_starts = {}
+        self._shard_progress = {}
+        self.plan = None
+
+    def build_command(self, job, jobs):
+        # 需要 -v 1 的逐页日志来跟踪进度（非终端环境下ocrmypdf不显示进度条）
+        verbose = [] if '-v' in self.options or '--verbose' in self.options else ['-v', '1']
+        return [self.command, *self.options, *verbose, '--jobs', str(jobs), job.input_path, job.output_path]
+
+    def cancel(self):
+        """
+        取消处理：尚未开始的文件不再启动，正在运行的ocrmypdf进程被立即终止（可在任意线程调用）
+        """
+        self._cancel_event.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._kill_running)
+            except RuntimeError:
+                pass  # 事件循环已结束
+
+    def _kill_running(self):
+        for process in list(self._running):
+            _kill_process_group(process)
+
+    async def _watch_progress(self, job, process, events):
+        """
+        逐行读取stderr并更新进度，返回stderr末尾的若干行；超过 page_timeout 秒没有输出时终止进程
+        """
+        tail = deque(maxlen=MAX_ERROR_LINES)
+        while True:
+            try:
+                line = await asyncio.wait_for(process.stderr.readline(), timeout=self.page_timeout)
+            except asyncio.TimeoutError:
+                job.error = f"超过 {self.page_timeout} 秒没有进度（已处理 {len(job.pages_seen)} 页），已终止"
+                _kill_process_group(process)
+                break
+            if not line:
+                break
+            text = line.decode('utf-8', errors='replace').rstrip()
+            tail.append(text)
+            if job.record_progress(text) and len(job.pages_seen) % PROGRESS_STEP == 0:
+                events.put(('progress', job))
+        return list(tail)
+
+    async def _run_job(self, job, jobs, events):
+        """
+        运行单个ocrmypdf进程并记录返回码、错误信息和耗时
+        """
+        start = time.perf_counter()
+        try:
+            output_dir = os.path.dirname(job.output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            # 新建进程组，取消或超时时连同ocrmypdf创建的子进程一起终止
+            process = await asyncio.create_subprocess_exec(*self.build_command(job, jobs),
+                                                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                                           start_new_session=True)
+            self._running.add(process)
+            try:
+                tail = await self._watch_progress(job, process, events)
+                await process.wait()
+            finally:
+                self._running.discard(process)
+            job.returncode = process.returncode
+            if job.error is None and process.returncode != 0:
+                if self._cancel_event.is_set():
+                    job.error = "已取消"
+                else:
+                    job.error = "\n".join(line for line in tail if line.strip()) or f"返回码 {process.returncode}"
+        except Exception as e:
+            job.error = str(e)
+        job.elapsed = time.perf_counter() - start
+
+    async def _supervise(self, jobs, processes, jobs_per_process, events):
+        """
+        最多同时运行 processes 个ocrmypdf进程，按 jobs 的顺序依次启动
+        """
+        self._loop = asyncio.get_running_loop()
+        if self._cancel_event.is_set():
+            return
+        semaphore = asyncio.Semaphore(processes)
+
+        async def run_one(job):
+            async with semaphore:
+                if self._cancel_event.is_set():
+                    return
+                events.put(('start', job))
+                await self._run_job(job, jobs_per_process, events)
+                events.put(('done', job))
+
+        await asyncio.gather(*(run_one(job) for job in jobs))
+
+    def _supervise_thread(self, jobs, processes, jobs_per_process, events):
+        try:
+            asyncio.run(self._supervise(jobs, processes, jobs_per_process, events))
+        except Exception as e:
+            print(f"ocrmypdf进程管理出错: {str(e)}")
+        finally:
+            self._loop = None
+            events.put(None)
+
+    def shard(self, jobs, shard_pages=DEFAULT_SHARD_PAGES, work_dir=None):
+        """
+        将页数超过 shard_pages 的PDF拆分为页面范围分片，返回实际要运行的任务列表
+
+        分片作为独立任务并行处理；run() 在某个文件的所有分片完成后按页码顺序合并为原任务的输出文件，
+        并且只针对原任务产出事件（进度为所有分片已处理页数之和）
+        """
+        run_jobs = []
+        for job in jobs:
+            shards = []
+            try:
+                if job.total_pages is not None and job.total_pages > shard_pages:
+                    shard_dir = tempfile.mkdtemp(prefix="ocrmypdf_shards_", dir=work_dir)
+                    self._shard_dirs.append(shard_dir)
+                    shards = split_pdf(job.input_path, shard_dir, shard_pages)
+            except Exception as e:
+                print(f"PDF分片失败，整体处理: {os.path.basename(job.input_path)} - {str(e)}")
+            if not shards:
+                run_jobs.append(job)
+                continue
+            self._shards[job] = [OCRmyPDFJob(shard_path, os.path.join(os.path.dirname(shard_path),
+                                                                      f"ocr_{os.path.basename(shard_path)}"),
+                                             parent=job, page_range=page_range)
+                                 for shard_path, page_range in shards]
+            run_jobs.extend(self._shards[job])
+        return run_jobs
+
+    def _shard_event(self, event, job):
+        """
+        将分片任务的事件转换为原任务的事件：第一个分片开始时为 'start'，
+        所有分片合计每处理 PROGRESS_STEP 页为 'progress'，全部分片完成并合并后为 'done'，其余情况返回None
+        """
+        parent = job.parent
+        shards = self._shards[parent]
+        if event == 'progress':
+            step = len(parent.pages_seen) // PROGRESS_STEP
+            if step <= self._shard_progress.get(parent, 0):
+                return None
+            self._shard_progress[parent] = step
+            return 'progress', parent
+        if event == 'start':
+            if parent in self._shard_starts:
+                return None
+            self._shard_starts[parent] = time.perf_counter()
+            return 'start', parent
+        if any(shard.returncode is None and shard.error is None for shard in shards):
+            return None
+        # 任一分片失败则整个文件失败
+        failed = [shard for shard in shards if not shard.success]
+        if failed:
+            first, last = failed[0].page_range
+            parent.error = f"第{first + 1}-{last + 1}页分片处理失败: {failed[0].error}"
+        else:
+            try:
+                merge_pdfs([shard.output_path for shard in shards], parent.output_path)
+                parent.returncode = 0
+            except Exception as e:
+                parent.error = f"分片合并失败: {str(e)}"
+        parent.elapsed = time.perf_counter() - self._shard_starts[parent]
+        return 'done', parent
+
+    def run(self, jobs):
+        """
+        并行处理任务列表，按发生顺序产出 ('start', job) / ('progress', job) / ('done', job) 事件
+
+        jobs 中的分片任务（由 shard() 生成）只产出其原任务的 start/done 事件
+        """
+        jobs = sorted(jobs, key=lambda job: job.size, reverse=True)
+        if not jobs:
+            return
+        processes, jobs_per_process = plan_concurrency(len(jobs), jobs_per_process=self.jobs_per_process,
+                                                       processes=self.processes)
+        self.plan = (processes, jobs_per_process)
+
+        # asyncio事件循环在独立线程中运行，调用方线程只从队列中读取事件
+        events = queue.Queue()
+        thread = threading.Thread(target=self._supervise_thread, args=(jobs, processes, jobs_per_process, events),
+                                  name="ocrmypdf-supervisor", daemon=True)
+        thread.start()
+        finished = False
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    finished = True
+                    break
+                if event[1].parent is not None:
+                    event = self._shard_event(*event)
+                    if event is None:
+                        continue
+                yield event
+        finally:
+            # 调用方提前结束（取消或出错）时终止仍在运行的进程
+            if not finished:
+                self.cancel()
+            thread.join()
+            for shard_dir in self._shard_dirs:
+                shutil.rmtree(shard_dir, ignore_errors=True)
+            self._shard_dirs = []
+
+
+def _kill_process_group(process):
+    """
+    终止子进程及其所在进程组（ocrmypdf会创建tesseract、ghostscript等子进程）
+    """
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cv2
+import fitz
+import numpy as np
+
+from ocr_result import OCRPageResult
+
+# 缩略图渲染DPI（A4页面约 330x470 像素，渲染耗时只有200 DPI整页的几十分之一）
+THUMBNAIL_DPI = 40
+
+# 空白页判断阈值
+BLANK_MARGIN_RATIO = 0.05     # 忽略四周该比例的边缘（扫描阴影、装订孔）
+BLANK_INK_CONTRAST = 50       # 比页面背景（中位灰度）暗该值以上的像素视为墨迹
+BLANK_MAX_INK_RATIO = 0.001   # 墨迹像素占比低于该值视为空白页
+# 墨迹很少的页面上只要有一个文字大小的连通区域（膨胀前宽高都在该范围内，单位为缩略图像素）就不视为空白页，
+# 保留只有"以下无正文"等简短批注的页面（9-12pt汉字高约5-6像素，中值滤波后残留的扫描噪点不超过4像素）。
+# 膨胀只用于把同一行的笔画合并为一个区域，尺寸按膨胀前计算，避免3像素的噪点膨胀到5像素后被当作文字
+BLANK_TEXT_MIN_SIZE = 5
+BLANK_TEXT_MAX_SIZE = 40
+
+# 空白页在文本输出中的标记
+BLANK_PAGE_TEXT = "[空白页]"
+
+
+def render_page_thumbnail(page, dpi=THUMBNAIL_DPI):
+    """
+    以很低的DPI将页面渲染为灰度缩略图（独立副本）
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    thumbnail = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width).copy()
+    del pix
+    return thumbnail
+
+
+def _ink_mask(thumbnail):
+    """
+    缩略图的墨迹掩码（忽略页面边缘，中值滤波去除扫描噪点），页面主体为空时返回None
+    """
+    height, width = thumbnail.shape[:2]
+    margin_y = int(height * BLANK_MARGIN_RATIO)
+    margin_x = int(width * BLANK_MARGIN_RATIO)
+    body = thumbnail[margin_y:height - margin_y, margin_x:width - margin_x]
+    if body.size == 0:
+        return None
+    body = cv2.medianBlur(np.ascontiguousarray(body), 3)
+    background = float(np.median(body))
+    return body < background - BLANK_INK_CONTRAST
+
+
+def ink_ratio(thumbnail):
+    """
+    计算缩略图中墨迹像素的占比（忽略页面边缘，中值滤波去除扫描噪点）
+    """
+    mask = _ink_mask(thumbnail)
+    if mask is None:
+        return 0.0
+    return float(np.count_nonzero(mask)) / mask.size
+
+
+def text_components(thumbnail):
+    """
+    返回缩略图中文字大小的墨迹连通区域（笔画先膨胀合并为单个字或一行字），
+    每个区域为缩略图坐标下膨胀前的外接框 (x0, y0, x1, y1)；高度超过 BLANK_TEXT_MAX_SIZE 的表格框线、印章等不计入
+    """
+    mask = _ink_mask(thumbnail)
+    if mask is None or not mask.any():
+        return np.zeros((0, 4), dtype=np.int32)
+    mask = cv2.dilate(mask.astype(np.uint8), np.ones((3, 3), np.uint8))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    # 3x3膨胀使区域四周各扩大1像素，减去后为膨胀前墨迹的外接框
+    stats = stats[1:].astype(np.int64)
+    x0 = stats[:, cv2.CC_STAT_LEFT] + 1
+    y0 = stats[:, cv2.CC_STAT_TOP] + 1
+    widths = stats[:, cv2.CC_STAT_WIDTH] - 2
+    heights = stats[:, cv2.CC_STAT_HEIGHT] - 2
+    keep = (widths >= BLANK_TEXT_MIN_SIZE) & (heights >= BLANK_TEXT_MIN_SIZE) & (heights <= BLANK_TEXT_MAX_SIZE)
+
+    # 掩码不含页面边缘，换算回整张缩略图的坐标
+    height, width = thumbnail.shape[:2]
+    x0 = x0[keep] + int(width * BLANK_MARGIN_RATIO)
+    y0 = y0[keep] + int(height * BLANK_MARGIN_RATIO)
+    return np.stack([x0, y0, x0 + widths[keep], y0 + heights[keep]], axis=1).astype(np.int32)
+
+
+def has_text_component(thumbnail):
+    """
+    检查缩略图中是否有文字大小的墨迹连通区域
+    """
+    components = text_components(thumbnail)
+    return bool(np.any(components[:, 2] - components[:, 0] <= BLANK_TEXT_MAX_SIZE * 4))
+
+
+def probe_blank_page(page, thumbnail=None):
+    """
+    检查页面是否为空白页（分隔页、纸张背面等），是则返回空的 OCRPageResult，否则返回None
+
+    墨迹占比低于阈值、且没有文字大小的连通区域时才视为空白页
+
+    返回结果的 meta 为 {'source': 'blank', 'ink_ratio': 墨迹占比}
+    """
+    if thumbnail is None:
+        thumbnail = render_page_thumbnail(page)
+    ratio = ink_ratio(thumbnail)
+    if ratio >= BLANK_MAX_INK_RATIO or has_text_component(thumbnail):
+        return None
+    return OCRPageResult(meta={'source': 'blank', 'ink_ratio': round(ratio, 6)})
+
+
+def is_blank_result(result):
+    return isinstance(result, OCRPageResult) and result.meta.get('source') == 'blank'
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import datetime
+
+import fitz
+
+from text_layer_probe import page_image_scale
+
+# 文本层使用的内置中文字体（整个文档只嵌入一次，保存前裁剪为实际用到的字形）
+TEXT_LAYER_FONT = "china-s"
+# 不可见文本的渲染模式（PDF Tr 3：既不填充也不描边，只用于搜索和复制）
+INVISIBLE_RENDER_MODE = 3
+# 没有坐标信息的文本依次排在页面左上角时使用的字号和行距
+FALLBACK_FONT_SIZE = 1
+FALLBACK_LINE_HEIGHT = 12
+
+
+class TextLayerWriter:
+    """
+    向PDF页面写入不可见的OCR文本层
+
+    每页的所有文本先追加到一个 TextWriter，再一次性写成一段内容流；
+    字号按文本框换算到PDF坐标后的宽高确定，使选中/搜索高亮的范围与原图文字基本重合。
+    字体对象由同一个 TextLayerWriter 写入的所有页面共用，输出文档中只嵌入一份
+    """
+
+    def __init__(self, fontname=TEXT_LAYER_FONT):
+        self.font = fitz.Font(fontname)
+
+    def _fit_font_size(self, text, width, height):
+        """
+        文本在宽 width、高 height 的框内能使用的最大字号
+        """
+        length = self.font.text_length(text, fontsize=1)
+        if length <= 0:
+            return height
+        return min(height, width / length)
+
+    def write_page(self, page, page_result, image_scale):
+        """
+        将 OCRPageResult 写入页面的文本层，返回写入的文本条数
+
+        识别结果的坐标为渲染图像像素坐标，除以 image_scale（见 page_image_scale）换算为PDF坐标
+        """
+        writer = fitz.TextWriter(page.rect)
+        boxes = page_result.bounding_boxes().tolist() if page_result.has_polys else []
+        written = 0
+        for i, text in enumerate(page_result.texts):
+            if not text.strip():
+                continue
+            if i < len(boxes):
+                x0, y0, x1, y1 = (value / image_scale for value in boxes[i])
+                fontsize = self._fit_font_size(text, x1 - x0, y1 - y0)
+                if fontsize <= 0:
+                    continue
+                # 字形在竖直方向上居中于文本框
+                baseline = (y0 + y1) / 2 + (self.font.ascender + self.font.descender) / 2 * fontsize
+                position = (x0, baseline)
+            else:
+                # 没有坐标信息，使用默认位置
+                fontsize = FALLBACK_FONT_SIZE
+                position = (10, 10 + i * FALLBACK_LINE_HEIGHT)
+            try:
+                writer.append(position, text, font=self.font, fontsize=fontsize)
+                written += 1
+            except Exception as e:
+                print(f"    插入文本时出错: {str(e)}")
+        if written:
+            writer.write_text(page, render_mode=INVISIBLE_RENDER_MODE)
+        return written
+
+
+def copy_pdf_pages(doc):
+    """
+    将源PDF的全部页面原样复制到新文档（保留原页面内容流和原有文本层，不重新渲染）
+    """
+    output_doc = fitz.open()
+    output_doc.insert_pdf(doc)
+    return output_doc
+
+
+def save_text_layer_pdf(output_doc, output_pdf_path):
+    """
+    裁剪文本层字体为实际用到的字形后保存（裁剪失败时保存完整字体）
+    """
+    try:
+        output_doc.subset_fonts()
+    except Exception as e:
+        print(f"字体裁剪失败，保存完整字体: {str(e)}")
+    output_doc.save(output_pdf_path, garbage=3, deflate=True)
+
+
+def searchable_pdf_path(processed_folder, pdf_name):
+    """
+    返回PDF对应的可搜索PDF输出路径（与OCRmyPDF模式相同，文件末尾增加 '_ocr_YYYYMMDD'）
+    """
+    date_suffix = datetime.now().strftime("%Y%m%d")
+    return os.path.join(processed_folder, f"{pdf_name}_ocr_{date_suffix}.pdf")
+
+
+class SearchablePDFWriter:
+    """
+    与MD文件共用同一次识别结果生成可搜索PDF
+
+    创建时复制源PDF的全部页面，页面识别完成后立即写入该页的文本层（页面可以乱序到达），
+    所有页面完成后调用 save 保存。识别坐标为 dpi/max_size 渲染图像的坐标，与识别时的渲染参数一致
+    """
+
+    def __init__(self, pdf_path, output_path, dpi=200, max_size=2000):
+        self.output_path = output_path
+        self.dpi = dpi
+        self.max_size = max_size
+        with fitz.open(pdf_path) as doc:
+            self._doc = copy_pdf_pages(doc)
+        self._text_layer = TextLayerWriter()
+
+    def add_page(self, page_num, page_result):
+        """
+        写入一页的文本层；自带文本层的页面（复制时已保留原文本层）和空白页不写入
+        """
+        if page_result is None or not len(page_result):
+            return 0
+        if page_result.meta.get('source') in ('text_layer', 'blank'):
+            return 0
+        page = self._doc[page_num]
+        return self._text_layer.write_page(page, page_result.to_source_coordinates(),
+                                           page_image_scale(page, dpi=self.dpi, max_size=self.max_size))
+
+    def save(self):
+        """
+        保存可搜索PDF并关闭，返回输出路径
+        """
+        try:
+            save_text_layer_pdf(self._doc, self.output_path)
+        finally:
+            self.close()
+        return self.output_path
+
+    def close(self):
+        """
+        关闭文档；未调用 save 时（处理被取消或出错）不生成输出文件
+        """
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
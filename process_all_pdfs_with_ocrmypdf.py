@@ -2,42 +2,42 @@
 # -*- coding: utf-8 -*-
 
 import os
-import subprocess
 from dotenv import load_dotenv
+from ocrmypdf_runner import OCRmyPDFRunner, OCRmyPDFJob, plan_concurrency, DEFAULT_SHARD_PAGES
 
 # 加载环境变量
 load_dotenv()
 
+# OCRmyPDF参数（并行处理时 --jobs 由调度器按核心预算添加）
+OCRMYPDF_OPTIONS = [
+    '-l', 'chi_sim+eng',
+    '--optimize', '3',
+    '--skip-text',  # 跳过已有文本的页面
+    '--clean',      # 清理优化
+    '--output-type', 'pdf',
+]
+
 def ocrmypdf_process(input_path, output_path):
     """
     使用OCRmyPDF处理PDF文件
+
+    实时读取ocrmypdf的进度输出，长时间没有进度时终止（按页超时，不限制文件总耗时）
     """
     try:
-        # 构建OCRmyPDF命令
-        command = [
-            'ocrmypdf',
-            '-l', 'chi_sim+eng',
-            '--optimize', '3',
-            '--skip-text',  # 跳过已有文本的页面
-            '--clean',      # 清理优化
-            '--output-type', 'pdf',
-            input_path,
-            output_path
-        ]
-        
         print(f"使用OCRmyPDF处理: {os.path.basename(input_path)}")
-        result = subprocess.run(command, capture_output=True, text=True, timeout=1800)  # 30分钟超时
+        job = OCRmyPDFJob(input_path, output_path)
+        for event, job in OCRmyPDFRunner(OCRMYPDF_OPTIONS, processes=1).run([job]):
+            if event == 'progress':
+                total = f"/{job.total_pages}" if job.total_pages else ""
+                print(f"  已处理 {len(job.pages_seen)}{total} 页")
         
-        if result.returncode == 0:
+        if job.success:
             print(f"OCRmyPDF处理成功: {os.path.basename(input_path)}")
             return True
         else:
             print(f"OCRmyPDF处理失败: {os.path.basename(input_path)}")
-            print(f"错误信息: {result.stderr}")
+            print(f"错误信息: {job.error}")
             return False
-    except subprocess.TimeoutExpired:
-        print(f"OCRmyPDF处理超时: {os.path.basename(input_path)}")
-        return False
     except Exception as e:
         print(f"OCRmyPDF处理出错: {os.path.basename(input_path)} - {str(e)}")
         return False
@@ -83,29 +83,46 @@ def process_all_pdfs():
     for i, pdf_file in enumerate(pdf_files, 1):
         print(f"  {i}. {pdf_file}")
     
-    # 处理每个PDF文件
+    # 生成任务：输出文件路径相对于输入文件夹
+    jobs = []
+    for pdf_file in pdf_files:
+        relative_path = os.path.relpath(pdf_file, input_folder)
+        output_path = os.path.join(output_folder, f"OCRmyPDF_{relative_path}")
+        jobs.append(OCRmyPDFJob(pdf_file, output_path))
+    
+    # 多个ocrmypdf进程并行处理，核心预算在进程之间分配，大文件优先
+    processes = int(os.getenv('OCRMYPDF_PROCESSES', '0')) or None
+    runner = OCRmyPDFRunner(OCRMYPDF_OPTIONS, processes=processes)
+    
+    # 超过分片页数的大文件拆分为页面范围分片并行处理（SHARD_PAGES=0 关闭分片）
+    run_jobs = jobs
+    shard_pages = int(os.getenv('SHARD_PAGES', str(DEFAULT_SHARD_PAGES)))
+    if shard_pages > 0:
+        run_jobs = runner.shard(jobs, shard_pages=shard_pages)
+        if len(run_jobs) > len(jobs):
+            print(f"\n超过 {shard_pages} 页的文件已拆分为页面范围分片，共 {len(run_jobs)} 个任务")
+    processes, jobs_per_process = plan_concurrency(len(run_jobs), processes=processes)
+    print(f"\n同时运行 {processes} 个ocrmypdf进程，每个进程 --jobs {jobs_per_process}")
     successful_count = 0
     failed_count = 0
     
-    for pdf_file in pdf_files:
-        # 生成相对于输入文件夹的路径
-        relative_path = os.path.relpath(pdf_file, input_folder)
-        # 生成输出文件路径
-        output_file = f"OCRmyPDF_{relative_path}"
-        output_path = os.path.join(output_folder, output_file)
-        
-        # 确保输出文件的目录存在
-        output_dir = os.path.dirname(output_path)
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-        
-        print(f"\n开始处理: {relative_path}")
-        success = ocrmypdf_process(pdf_file, output_path)
-        
-        if success:
+    for event, job in runner.run(run_jobs):
+        relative_path = os.path.relpath(job.input_path, input_folder)
+        if event == 'start':
+            print(f"\n开始处理: {relative_path}")
+            continue
+        if event == 'progress':
+            total = f"/{job.total_pages}" if job.total_pages else ""
+            print(f"  {relative_path}: 已处理 {len(job.pages_seen)}{total} 页")
+            continue
+        if job.success:
             successful_count += 1
+            print(f"OCRmyPDF处理成功: {relative_path}（耗时 {job.elapsed:.1f} 秒）")
         else:
             failed_count += 1
+            print(f"OCRmyPDF处理失败: {relative_path}")
+            print(f"错误信息: {job.error}")
+        print(f"进度: {successful_count + failed_count}/{len(jobs)}")
     
     # 显示处理结果统计
     print(f"\n=== 处理完成 ===")
@@ -3,7 +3,7 @@
 
 import os
 import fitz  # PyMuPDF
-from paddleocr import PaddleOCR
+from ocr_engine import get_ocr_engine
 import numpy as np
 import cv2
 from pathlib import Path
@@ -23,8 +23,8 @@ def process_pdf_with_paddleocr(input_pdf, output_pdf):
         # 创建新的PDF用于保存结果
         new_doc = fitz.open()
         
-        # 初始化PaddleOCR
-        ocr = PaddleOCR(lang='ch', use_gpu=False)  # 使用CPU进行OCR，避免GPU内存不足
+        # 获取共享的PaddleOCR实例（同一进程内只加载一次模型）
+        ocr = get_ocr_engine('ch', use_gpu=False)  # 使用CPU进行OCR，避免GPU内存不足
         
         for page_num in range(len(doc)):
             # 获取页面
@@ -2,86 +2,50 @@
 # -*- coding: utf-8 -*-
 
 import fitz
-from paddleocr import PaddleOCR
 import os
-import sys
 from dotenv import load_dotenv
-from PIL import Image
-import cv2
-import numpy as np
+from ocr_image_utils import render_page_for_ocr, preprocess_timing_report
+from ocr_engine import get_ocr_engine, get_engine_metrics, DEFAULT_BATCH_SIZE
+from ocr_cache import OCRResultCache, page_cache_key, predict_with_cache
+from ocr_result import normalize_ocr_result, apply_preprocess_info
+from text_layer_probe import probe_text_layer, page_image_scale
+from pdf_text_layer import TextLayerWriter, copy_pdf_pages, save_text_layer_pdf
+from page_thumbnail import probe_blank_page, render_page_thumbnail, BLANK_PAGE_TEXT
+from duplicate_pages import DuplicatePageIndex, DUPLICATE_REPORT_FILENAME
+from adaptive_ocr import AdaptiveDPI
+from ocr_result_store import OCR_STORE_FILENAME, reset_store, append_page_result, load_page_results
+from job_manifest import JobManifest, MANIFEST_FILENAME
 
 # 加载环境变量
 load_dotenv()
 
-def preprocess_image_for_ocr(image_path):
+def paddleocr_process_pdf_to_pdf(pdf_path, output_pdf_path, batch_size=DEFAULT_BATCH_SIZE, cache=None, manifest=None,
+                                 use_text_layer=True, adaptive=None, skip_blank=True, duplicate_index=None,
+                                 save_page_files=False):
     """
-    对图像进行预处理以提高OCR识别效果
-    """
-    try:
-        # 读取图像
-        img = cv2.imread(image_path)
-        
-        # 转换为灰度图
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # 应用高斯模糊以减少噪声
-        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-        
-        # 应用阈值处理以增强对比度
-        _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # 保存预处理后的图像
-        processed_path = image_path.replace('.png', '_processed.png')
-        cv2.imwrite(processed_path, thresh)
-        
-        print(f"图像预处理完成，保存到: {processed_path}")
-        return processed_path
-    except Exception as e:
-        print(f"图像预处理失败: {str(e)}")
-        return image_path
+    使用PaddleOCR处理PDF文件，并生成带文本层的PDF文件
+    batch_size 为每次提交识别的页面数，cache 为可选的OCR结果缓存
 
-def resize_image_if_needed(image_path, max_size=2000):
-    """
-    如果图片尺寸超过指定大小，则调整图片尺寸
-    将最大尺寸减小到2000以避免内存问题
-    """
-    try:
-        # 打开图片
-        img = Image.open(image_path)
-        width, height = img.size
-        
-        # 检查是否需要调整尺寸
-        if width > max_size or height > max_size:
-            # 计算缩放比例
-            ratio = min(max_size/width, max_size/height)
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            
-            # 调整图片尺寸
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 保存调整后的图片
-            img.save(image_path)
-            print(f"  图片尺寸已从 {width}x{height} 调整为 {new_width}x{new_height}")
-        
-        return image_path
-    except Exception as e:
-        print(f"调整图片尺寸时出错: {str(e)}")
-        return image_path
+    use_text_layer 为True时，已有合格文本层的页面不再OCR，直接沿用原有文本层
 
-def paddleocr_process_pdf_to_pdf(pdf_path, output_pdf_path):
-    """
-    使用PaddleOCR处理PDF文件，并生成带文本层的PDF文件
+    传入 adaptive (AdaptiveDPI) 时逐页先以低DPI识别，只对低置信度区域提高DPI重新识别
+
+    skip_blank 为True时先用缩略图检查空白页（分隔页、纸张背面），空白页不识别也不插入文本层
+
+    传入 duplicate_index (DuplicatePageIndex) 时检测重复页，索引启用复用时内容完全相同的页面直接复用其识别结果
+
+    传入任务清单 manifest 时，每页识别结果追加保存到输出PDF旁的结构化结果文件，
+    中断后再次运行只识别未完成的页面，已完成页面直接使用保存的结果生成文本层
+
+    save_page_files 为True时额外在当前目录保存逐页的识别文本（ocr_result_*_page_N.txt）
     """
     try:
         # 确保输出目录存在
         os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
         
-        # 初始化PaddleOCR，使用中文模型 (根据测试代码中的配置)
-        print("初始化PaddleOCR...")
-        # 根据测试结果选择最佳配置
-        ocr = PaddleOCR(lang='ch')  # 使用与测试代码相同的配置
-        print("PaddleOCR初始化成功!")
+        # 获取共享的PaddleOCR实例，使用中文模型 (根据测试代码中的配置)
+        # 模型在整个批处理过程中只加载一次，后续文件直接复用
+        ocr = get_ocr_engine('ch')
         
         # 打开PDF文件
         if not os.path.exists(pdf_path):
@@ -99,71 +63,151 @@ def paddleocr_process_pdf_to_pdf(pdf_path, output_pdf_path):
         # 清理文件名中的特殊字符
         ocr_result_prefix = "".join(c for c in ocr_result_prefix if c.isalnum() or c in (' ', '-', '_')).rstrip()
         
-        # 创建新的PDF文档用于保存结果
-        output_doc = fitz.open()
-        
-        # 处理每一页
-        for page_num in range(total_pages):
-            print(f"正在处理第 {page_num + 1}/{total_pages} 页...")
-            
-            # 获取原始页面
-            page = doc[page_num]
-            
-            # 将页面转换为图像 (提高DPI以改善OCR效果，但仍控制在合理范围内)
-            pix = page.get_pixmap(dpi=200)  # 修改为200 DPI以提高OCR质量
-            
-            # 保存临时图像文件
-            temp_image_path = f"temp_page_{page_num}.png"
-            pix.save(temp_image_path)
-            
-            # 调整图片尺寸如果需要的话
-            temp_image_path = resize_image_if_needed(temp_image_path, max_size=2000)
-            
-            # 预处理图像以提高OCR效果
-            processed_image_path = preprocess_image_for_ocr(temp_image_path)
-            
-            # 调整处理后图像的尺寸
-            processed_image_path = resize_image_if_needed(processed_image_path, max_size=2000)
+        # 断点续跑：读取上次运行已完成页面的识别结果
+        store_path = f"{os.path.splitext(output_pdf_path)[0]}_{OCR_STORE_FILENAME}"
+        stored_results = {}
+        if manifest is not None:
+            done_pages = manifest.completed_pages(pdf_path, 'ocr')
+            if done_pages and os.path.exists(store_path):
+                stored_results = {page_num: page_result for page_num, page_result in load_page_results(store_path).items()
+                                  if page_num in done_pages}
+                print(f"断点续跑: 已完成 {len(stored_results)}/{total_pages} 页")
+            else:
+                reset_store(store_path)
+        
+        # 原样复制全部页面到新文档，之后只在各页上追加文本层
+        output_doc = copy_pdf_pages(doc)
+        text_layer = TextLayerWriter()
+        
+        # 自带文本层的页面（复制页面时原文本层会保留，无需再插入OCR文本）
+        native_pages = set()
+        
+        # 空白页（页码 -> 墨迹占比）
+        blank_pages = {}
+        
+        # 识别前纠正过方向/倾斜的页面及其说明（识别结果已换算回原始页面坐标，用于插入文本层）
+        corrections = {}
+        
+        # 复用其他页面识别结果的重复页（页码 -> 被重复的页面）
+        duplicate_pages = {}
+        
+        # 按批次处理页面：每批在内存中渲染N页后一次性提交识别
+        for batch_start in range(0, total_pages, batch_size):
+            batch_pages = range(batch_start, min(batch_start + batch_size, total_pages))
+            page_results = {}
+            pending_pages = []
+            batch_inputs = []
+            batch_keys = []
+            batch_infos = []
+            page_signatures = {}
+            for page_num in batch_pages:
+                if use_text_layer:
+                    native = probe_text_layer(doc[page_num], dpi=200, max_size=2000)
+                    if native is not None:
+                        print(f"第 {page_num + 1}/{total_pages} 页已有文本层，跳过OCR")
+                        page_results[page_num] = native
+                        native_pages.add(page_num)
+                        continue
+                # 空白页检查和重复页检测共用同一张缩略图
+                thumbnail = None
+                if skip_blank or duplicate_index is not None:
+                    thumbnail = render_page_thumbnail(doc[page_num])
+                if skip_blank:
+                    blank = probe_blank_page(doc[page_num], thumbnail)
+                    if blank is not None:
+                        print(f"第 {page_num + 1}/{total_pages} 页为空白页，跳过OCR")
+                        page_results[page_num] = None
+                        blank_pages[page_num] = blank.meta['ink_ratio']
+                        continue
+                if page_num in stored_results:
+                    page_results[page_num] = stored_results[page_num].to_source_coordinates()
+                    if stored_results[page_num].describe_correction():
+                        corrections[page_num] = stored_results[page_num].describe_correction()
+                    continue
+                if duplicate_index is not None:
+                    duplicate, page_signature = duplicate_index.lookup(pdf_path, page_num, thumbnail)
+                    if duplicate is not None:
+                        duplicate_pages[page_num] = duplicate.meta['duplicate_of']
+                        print(f"第 {page_num + 1}/{total_pages} 页与 {os.path.basename(duplicate_pages[page_num]['pdf'])} "
+                              f"第 {duplicate_pages[page_num]['page'] + 1} 页重复，复用识别结果")
+                        if duplicate.describe_correction():
+                            corrections[page_num] = duplicate.describe_correction()
+                        page_results[page_num] = duplicate.to_source_coordinates()
+                        if manifest is not None:
+                            append_page_result(store_path, page_num, duplicate)
+                            manifest.mark_page_done(pdf_path, 'ocr', page_num)
+                        continue
+                    if page_signature is not None:
+                        page_signatures[page_num] = page_signature
+                    
+                print(f"正在处理第 {page_num + 1}/{total_pages} 页...")
+                if adaptive is not None:
+                    page_result = adaptive.recognize_page(ocr, doc[page_num], cache)
+                    if page_num in page_signatures:
+                        duplicate_index.add(pdf_path, page_num, page_signatures[page_num], page_result)
+                    page_result = page_result.to_source_coordinates()
+                    if page_result.describe_correction():
+                        corrections[page_num] = page_result.describe_correction()
+                        print(f"  页面校正: {corrections[page_num]}")
+                    if page_result.meta.get('refined_regions'):
+                        print(f"  {page_result.meta['refined_regions']} 个低置信度区域以 {adaptive.high_dpi} DPI 重新识别")
+                    page_results[page_num] = page_result
+                    if manifest is not None:
+                        append_page_result(store_path, page_num, page_result)
+                        manifest.mark_page_done(pdf_path, 'ocr', page_num)
+                    continue
+                pending_pages.append(page_num)
+                # 将页面渲染为图像并预处理 (200 DPI，全程在内存中完成)
+                info = {}
+                rendered, ocr_input = render_page_for_ocr(doc[page_num], dpi=200, max_size=2000, info=info)
+                batch_infos.append(info)
+                batch_inputs.append(ocr_input)
+                batch_keys.append(page_cache_key(rendered, dpi=200, max_size=2000) if cache is not None else None)
             
-            # 对图像进行OCR
-            print(f"  正在对第 {page_num + 1} 页进行OCR识别...")
-            result = ocr.predict(processed_image_path)
+            # 对本批图像进行OCR（已缓存的页面跳过识别）
+            if pending_pages:
+                print(f"  正在对第 {pending_pages[0] + 1}-{pending_pages[-1] + 1} 页进行OCR识别...")
+                batch_results, cache_hits = predict_with_cache(ocr, batch_inputs, batch_keys, cache, batch_size)
+                if cache_hits:
+                    print(f"  {cache_hits} 页命中OCR结果缓存，跳过识别")
+                for page_num, result, info in zip(pending_pages, batch_results, batch_infos):
+                    # 每页只转换一次为 OCRPageResult，之后的结果文件、文本层插入都直接使用
+                    page_result = normalize_ocr_result(apply_preprocess_info(result, info))
+                    if page_num in page_signatures:
+                        # 新识别的页面加入重复页索引（保存识别图像坐标及变换矩阵，与流水线模式一致）
+                        duplicate_index.add(pdf_path, page_num, page_signatures[page_num], page_result)
+                    if page_result.describe_correction():
+                        # 纠正过方向/倾斜的页面，坐标换算回原始页面后再插入文本层
+                        corrections[page_num] = page_result.describe_correction()
+                        print(f"  第 {page_num + 1} 页校正: {corrections[page_num]}")
+                        page_result = page_result.to_source_coordinates()
+                    page_results[page_num] = page_result
+                    if manifest is not None:
+                        append_page_result(store_path, page_num, page_result)
+                        manifest.mark_page_done(pdf_path, 'ocr', page_num)
             
-            # 中间存储OCR结果并输出到终端（使用唯一文件名避免覆盖）
-            ocr_result_file = f"ocr_result_{ocr_result_prefix}_page_{page_num + 1}.txt"
-            with open(ocr_result_file, 'w', encoding='utf-8') as f:
-                f.write(f"OCR结果 - 第 {page_num + 1} 页\n")
-                f.write("=" * 50 + "\n")
-                f.write(f"处理的图像: {processed_image_path}\n")
-                f.write(f"原始PDF页面: {page_num + 1}\n\n")
+            for page_num in batch_pages:
+                page_result = page_results[page_num]
+                # 获取原始页面
+                page = doc[page_num]
                 
-                if result and result[0]:
-                    f.write("详细结果:\n")
-                    f.write(str(result) + "\n\n")
-                    
-                    # 解析并格式化结果
-                    texts = []
-                    if isinstance(result[0], dict):
-                        if 'rec_texts' in result[0]:
-                            texts = result[0]['rec_texts']
-                        elif 'text' in result[0]:
-                            texts = [result[0]['text']]
-                    elif isinstance(result[0], list):
-                        for item in result[0]:
-                            if isinstance(item, list) and len(item) > 1:
-                                if isinstance(item[1], list) and len(item[1]) > 0:
-                                    texts.append(str(item[1][0]))
-                                elif isinstance(item[1], (str, int, float)):
-                                    texts.append(str(item[1]))
-                            elif isinstance(item, dict) and 'text' in item:
-                                texts.append(item['text'])
-                            elif isinstance(item, str):
-                                texts.append(item)
-                    
-                    # 写入解析后的文本
-                    f.write("解析后的文本:\n")
-                    for i, text in enumerate(texts):
-                        f.write(f"{i+1}. {text}\n")
+                # 在终端输出OCR结果摘要；save_page_files 为True时另存逐页过程文件（使用唯一文件名避免覆盖）
+                lines = [f"OCR结果 - 第 {page_num + 1} 页", "=" * 50,
+                         f"处理的图像: 第 {page_num + 1} 页内存图像", f"原始PDF页面: {page_num + 1}", ""]
+                if page_num in corrections:
+                    lines += [f"页面校正: {corrections[page_num]}", ""]
+                if page_num in blank_pages:
+                    lines += [f"页面分类: 空白页（墨迹占比 {blank_pages[page_num]:.3%}），跳过识别", BLANK_PAGE_TEXT]
+                if page_num in duplicate_pages:
+                    lines += [f"页面分类: 与 {duplicate_pages[page_num]['pdf']} 第 {duplicate_pages[page_num]['page'] + 1} 页重复，"
+                              f"复用识别结果", ""]
+                
+                if page_result is not None and len(page_result):
+                    texts = page_result.texts
+                    # 写入解析后的文本及置信度
+                    lines.append("解析后的文本:")
+                    for i, (text, score) in enumerate(zip(texts, page_result.scores.tolist())):
+                        lines.append(f"{i+1}. {text}（置信度 {score:.3f}）")
                     
                     # 在终端输出结果摘要
                     print(f"    OCR结果摘要 - 第 {page_num + 1} 页:")
@@ -176,111 +220,33 @@ def paddleocr_process_pdf_to_pdf(pdf_path, output_pdf_path):
                             print(f"        ... 还有 {len(filtered_texts) - 5} 条文本")
                     else:
                         print("      未识别到有效文本")
-                else:
-                    f.write("未识别到任何文本\n")
+                elif page_num not in blank_pages:
+                    lines.append("未识别到任何文本")
                     print("    未识别到任何文本")
-            
-            print(f"    OCR结果已保存到: {ocr_result_file}")
-            
-            # 创建新页面并复制原始页面内容
-            new_page = output_doc.new_page(width=page.rect.width, height=page.rect.height)
-            new_page.show_pdf_page(new_page.rect, doc, page_num)
-            
-            # 将OCR结果添加为文本层
-            if result and result[0]:
-                # 检查返回结果的格式
-                texts = []
-                boxes = []
                 
-                # 解析不同格式的OCR结果
-                if isinstance(result[0], dict):
-                    # 新格式
-                    if 'rec_texts' in result[0]:
-                        texts = result[0]['rec_texts']
-                        boxes = result[0].get('rec_boxes', [])
-                    elif 'text' in result[0]:
-                        texts = [result[0]['text']]
-                elif isinstance(result[0], list):
-                    # 旧格式或其他格式，尝试解析
-                    for item in result[0]:
-                        if isinstance(item, dict) and 'text' in item:
-                            texts.append(item['text'])
-                            if 'box' in item:
-                                boxes.append(item['box'])
-                        elif isinstance(item, list) and len(item) >= 2:
-                            # 格式: [box, (text, confidence)]
-                            if isinstance(item[1], list) and len(item[1]) >= 2:
-                                texts.append(str(item[1][0]))
-                            elif isinstance(item[1], (str, int, float)):
-                                texts.append(str(item[1]))
-                            
-                            # 如果第一个元素是坐标框
-                            if len(item) > 0 and isinstance(item[0], (list, tuple)):
-                                boxes.append(item[0])
+                if save_page_files:
+                    ocr_result_file = f"ocr_result_{ocr_result_prefix}_page_{page_num + 1}.txt"
+                    with open(ocr_result_file, 'w', encoding='utf-8') as f:
+                        f.write("\n".join(lines) + "\n")
+                    print(f"    OCR结果已保存到: {ocr_result_file}")
                 
-                # 在页面上添加透明文本
-                for i, text in enumerate(texts):
-                    if text.strip():
-                        try:
-                            # 尝试使用坐标框放置文本（如果可用）
-                            if i < len(boxes) and boxes[i] is not None:
-                                # 验证boxes[i]的结构
-                                box = boxes[i]
-                                if isinstance(box, (list, tuple)) and len(box) >= 4:
-                                    # 计算文本框坐标
-                                    x_coords = [point[0] for point in box] if isinstance(box[0], (list, tuple)) else box[::2]
-                                    y_coords = [point[1] for point in box] if isinstance(box[0], (list, tuple)) else box[1::2]
-                                    
-                                    x0, y0 = min(x_coords), min(y_coords)
-                                    x1, y1 = max(x_coords), max(y_coords)
-                                    
-                                    # 创建文本矩形区域
-                                    rect = fitz.Rect(x0, y0, x1, y1)
-                                    
-                                    # 插入文本
-                                    new_page.insert_textbox(
-                                        rect, 
-                                        text,
-                                        fontsize=1,
-                                        color=(0, 0, 0),
-                                        overlay=True
-                                    )
-                                else:
-                                    # 如果坐标框格式不正确，使用默认位置
-                                    new_page.insert_text(
-                                        (10, 10 + i*12),
-                                        text,
-                                        fontsize=1,
-                                        color=(0, 0, 0),
-                                        overlay=True
-                                    )
-                            else:
-                                # 没有坐标信息，使用默认位置
-                                new_page.insert_text(
-                                    (10, 10 + i*12),
-                                    text,
-                                    fontsize=1,
-                                    color=(0, 0, 0),
-                                    overlay=True
-                                )
-                        except Exception as e:
-                            # 如果插入文本失败，跳过该项
-                            print(f"    插入文本时出错: {str(e)}")
-                            pass
-            
-            # 删除临时图像文件
-            if os.path.exists(temp_image_path):
-                os.remove(temp_image_path)
-            if os.path.exists(processed_image_path) and processed_image_path != temp_image_path:
-                os.remove(processed_image_path)
-            print(f"  第 {page_num + 1} 页处理完成")
+                # 将OCR结果添加为不可见文本层（每页一次写入，自带文本层的页面保留原文本层）
+                if page_result is not None and len(page_result) and page_num not in native_pages:
+                    text_layer.write_page(output_doc[page_num], page_result,
+                                          page_image_scale(page, dpi=200, max_size=2000))
+                
+                print(f"  第 {page_num + 1} 页处理完成")
         
         # 保存处理后的PDF
-        output_doc.save(output_pdf_path)
+        save_text_layer_pdf(output_doc, output_pdf_path)
         output_doc.close()
         doc.close()
         
         print(f"PDF处理完成，结果已保存到: {output_pdf_path}")
+        if blank_pages:
+            print(f"空白页 {len(blank_pages)}/{total_pages} 页，已跳过识别")
+        if duplicate_pages:
+            print(f"重复页 {len(duplicate_pages)}/{total_pages} 页，已复用识别结果")
         return True
         
     except Exception as e:
@@ -358,20 +324,34 @@ def is_toc_page(text):
         return "目录" in first_line
     return False
 
-def process_single_pdf(pdf_path, ocr_output_base_dir, extract_output_base_dir):
+def process_single_pdf(pdf_path, ocr_output_base_dir, extract_output_base_dir, cache=None, manifest=None, adaptive=None,
+                       duplicate_index=None, save_page_files=False):
     """
     处理单个PDF文件
+
+    传入任务清单 manifest 时，已完成的阶段（OCR、内容提取）会被跳过
     """
     try:
+        if manifest is not None and manifest.is_stage_complete(pdf_path, 'extract'):
+            print(f"输出已是最新，跳过: {pdf_path}")
+            return True
+        
         # 创建OCR处理后的PDF保存路径
         relative_path = os.path.relpath(pdf_path, "/Volumes/TU260Pro/北海案件资料_处理中/原始卷")
         ocr_pdf_path = os.path.join(ocr_output_base_dir, relative_path)
         
         # 先进行OCR预处理
-        print(f"正在进行PaddleOCR预处理: {pdf_path}")
-        if not paddleocr_process_pdf_to_pdf(pdf_path, ocr_pdf_path):
-            print(f"PaddleOCR预处理失败，跳过文件: {pdf_path}")
-            return False
+        if manifest is not None and manifest.is_stage_complete(pdf_path, 'ocr'):
+            print(f"OCR结果已是最新，跳过PaddleOCR预处理: {ocr_pdf_path}")
+        else:
+            print(f"正在进行PaddleOCR预处理: {pdf_path}")
+            if not paddleocr_process_pdf_to_pdf(pdf_path, ocr_pdf_path, cache=cache, manifest=manifest,
+                                                adaptive=adaptive, duplicate_index=duplicate_index,
+                                                save_page_files=save_page_files):
+                print(f"PaddleOCR预处理失败，跳过文件: {pdf_path}")
+                return False
+            if manifest is not None:
+                manifest.mark_stage_complete(pdf_path, 'ocr', {'pdf': ocr_pdf_path})
         
         # 创建提取内容的输出目录
         extract_output_dir = os.path.join(extract_output_base_dir, os.path.splitext(relative_path)[0])
@@ -425,6 +405,8 @@ def process_single_pdf(pdf_path, ocr_output_base_dir, extract_output_base_dir):
                     f.write(toc_text[:500] + "..." if len(toc_text) > 500 else toc_text)
         
         pdf_document.close()
+        if manifest is not None:
+            manifest.mark_stage_complete(pdf_path, 'extract', {'pdf': ocr_pdf_path, 'summary': summary_file})
         print(f"完成处理: {pdf_path}\n")
         return True
         
@@ -466,25 +448,63 @@ def main():
     
     print(f"\n找到 {len(pdf_files)} 个PDF文件")
     
+    # OCR结果缓存：重复运行时跳过已识别过的页面
+    cache = OCRResultCache()
+    
+    # 任务清单：中断后再次运行时从第一个未完成文件的第一个未完成页面继续
+    manifest = JobManifest(os.path.join(ocr_output_folder, MANIFEST_FILENAME))
+    print(f"任务清单: {manifest.manifest_path}")
+    
+    # 自适应DPI（ADAPTIVE_DPI=1 启用）：先低DPI识别，只对低置信度区域提高DPI重新识别
+    adaptive = AdaptiveDPI() if os.getenv('ADAPTIVE_DPI', '0') == '1' else None
+    if adaptive is not None:
+        print(f"自适应DPI: {adaptive.low_dpi} DPI 识别，低置信度区域 {adaptive.high_dpi} DPI 重新识别")
+    
+    # 跨卷重复页检测（DETECT_DUPLICATE_PAGES=0 关闭）：生成重复页报告；
+    # REUSE_DUPLICATE_PAGES=1 时内容完全相同的页面只识别一次，其余页面直接复用识别结果
+    reuse_duplicates = os.getenv('REUSE_DUPLICATE_PAGES', '0') == '1'
+    duplicate_index = None
+    if reuse_duplicates or os.getenv('DETECT_DUPLICATE_PAGES', '1') == '1':
+        duplicate_index = DuplicatePageIndex(reuse=reuse_duplicates)
+        print(f"重复页索引: {duplicate_index.index_dir}（已记录 {len(duplicate_index)} 页，"
+              f"{'复用' if reuse_duplicates else '不复用'}重复页识别结果）")
+    
+    # 逐页过程文件（SAVE_PAGE_FILES=1 启用）：在当前目录保存每页的识别文本
+    save_page_files = os.getenv('SAVE_PAGE_FILES', '0') == '1'
+    
     # 处理每个PDF文件
     success_count = 0
     for i, pdf_file in enumerate(pdf_files):
         print(f"\n进度: {i+1}/{len(pdf_files)}")
         print(f"开始处理: {pdf_file}")
         
-        success = process_single_pdf(pdf_file, ocr_output_folder, extract_output_folder)
+        success = process_single_pdf(pdf_file, ocr_output_folder, extract_output_folder, cache=cache, manifest=manifest,
+                                     adaptive=adaptive, duplicate_index=duplicate_index, save_page_files=save_page_files)
         
         if success:
             success_count += 1
             print(f"成功处理: {pdf_file}")
         else:
             print(f"处理失败: {pdf_file}")
+    manifest.save()
+    report_path = None
+    if duplicate_index is not None:
+        report_path = duplicate_index.write_report(os.path.join(ocr_output_folder, DUPLICATE_REPORT_FILENAME))
+        duplicate_index.close()
     
     print(f"\n处理完成!")
     print(f"总文件数: {len(pdf_files)}")
     print(f"成功处理: {success_count} 个文件")
     print(f"PaddleOCR处理后文件目录: {ocr_output_folder}")
     print(f"内容提取输出目录: {extract_output_folder}")
+    if report_path:
+        print(f"重复页面: {len(duplicate_index.duplicates)} 页，报告: {report_path}")
+    
+    # 输出模型加载统计
+    metrics = get_engine_metrics()
+    print(f"PaddleOCR模型加载次数: {metrics['load_count']}，加载耗时: {metrics['load_seconds']:.2f}秒，复用次数: {metrics['reuse_count']}")
+    print(f"OCR结果缓存命中: {cache.hits} 页，未命中: {cache.misses} 页")
+    print(f"预处理耗时: {preprocess_timing_report()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import fitz
+import numpy as np
+
+from cover_templates import CoverTemplateMatcher, DEFAULT_COVER_TEMPLATES, count_anchor_hits
+from ocr_result import OCRPageResult
+from page_thumbnail import render_page_thumbnail
+from text_layer_probe import page_image_scale
+
+CASE_TEMPLATE = next(template for template in DEFAULT_COVER_TEMPLATES if template['name'] == '案件卷宗封面')
+
+
+def make_cover(note=None):
+    """
+    生成案件卷宗封面；note 不为None时在模板区域之外（页面底部）加一行备注
+    """
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.draw_rect(fitz.Rect(30, 30, 565, 812), width=1.5)
+    page.insert_text((100, 150), "某某市监察委员会", fontname="china-s", fontsize=22)
+    page.insert_text((100, 250), "关于张某涉嫌受贿案件卷宗", fontname="china-s", fontsize=18)
+    page.insert_text((150, 600), "第十二审查调查室", fontname="china-s", fontsize=14)
+    page.insert_text((150, 640), "二〇二三年五月", fontname="china-s", fontsize=14)
+    if note:
+        page.insert_text((100, 785), note, fontname="china-s", fontsize=12)
+    return doc
+
+
+def region_result(page, keep):
+    """
+    用页面文本行代替区域识别结果，只保留 keep(行顶部相对页面高度) 为True的行，返回 (结果, 整页图像尺寸)
+    """
+    scale = page_image_scale(page, dpi=200, max_size=2000)
+    texts = []
+    polys = []
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            x0, y0, x1, y1 = line["bbox"]
+            if keep(y0 / page.rect.height):
+                texts.append("".join(span["text"] for span in line["spans"]))
+                polys.append([[x0 * scale, y0 * scale], [x1 * scale, y0 * scale],
+                              [x1 * scale, y1 * scale], [x0 * scale, y1 * scale]])
+    size = (int(page.rect.width * scale), int(page.rect.height * scale))
+    return OCRPageResult(texts, np.ones(len(texts)), np.array(polys, dtype=np.int32)), size
+
+
+def active_matcher():
+    matcher = CoverTemplateMatcher(templates=DEFAULT_COVER_TEMPLATES)
+    matcher.active = CASE_TEMPLATE
+    return matcher
+
+
+def test_generic_anchor_not_enough():
+    # 单个"卷"字不再是关键词
+    assert count_anchor_hits(CASE_TEMPLATE, ["第三卷", "卷内目录"]) == 0
+    assert count_anchor_hits(CASE_TEMPLATE, ["某某市监察委员会", "案件卷宗"]) == 2
+
+
+def test_verify_full_regions():
+    page = make_cover()[0]
+    result, size = region_result(page, lambda y: y < 0.9)
+    assert active_matcher().verify(result, size, render_page_thumbnail(page))
+
+
+def test_verify_text_outside_regions():
+    page = make_cover("备注：本卷另附证据材料三册，共计一百二十页")[0]
+    result, size = region_result(page, lambda y: y < 0.9)
+    assert not active_matcher().verify(result, size, render_page_thumbnail(page))
+
+
+def test_verify_missed_line():
+    page = make_cover()[0]
+    result, size = region_result(page, lambda y: not 0.72 < y < 0.76)
+    assert not active_matcher().verify(result, size, render_page_thumbnail(page))
+
+
+def main():
+    for test in (test_generic_anchor_not_enough, test_verify_full_regions, test_verify_text_outside_regions,
+                 test_verify_missed_line):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+import fitz
+import numpy as np
+
+from duplicate_pages import DuplicatePageIndex, page_content_digest
+from ocr_result import OCRPageResult
+from page_thumbnail import render_page_thumbnail
+
+
+def make_form_page(doc, name, date, reverse=False):
+    """
+    生成一页表格样式的笔录，只有姓名和日期不同；reverse 为True时以相反顺序写入同样的内容（内容流不同、外观相同）
+    """
+    page = doc.new_page(width=595, height=842)
+    lines = [((230, 60), "询 问 笔 录", 20),
+             ((50, 100), f"时间：{date}      地点：北海市公安局", 12),
+             ((50, 125), f"被询问人：{name}      性别：男", 12)]
+    lines += [((50, 160 + i * 20), "问：你把当天的经过详细讲一下。答：当天上午我在单位上班。", 12) for i in range(20)]
+    for position, text, size in (reversed(lines) if reverse else lines):
+        page.insert_text(position, text, fontname="china-s", fontsize=size)
+    page.draw_rect(fitz.Rect(40, 40, 555, 800), width=1)
+    return page
+
+
+def text_result(page):
+    """
+    用页面文本代替OCR识别结果
+    """
+    texts = [line for line in page.get_text(sort=True).splitlines() if line.strip()]
+    return OCRPageResult(texts, np.ones(len(texts)), np.zeros((len(texts), 4, 2), dtype=np.int32))
+
+
+def build_index(folder, reuse):
+    """
+    生成两份PDF并依次查找、加入索引，返回 (索引, 第二份PDF各页的查找结果)
+    """
+    first = fitz.open()
+    make_form_page(first, "张三", "2023年5月1日")
+    make_form_page(first, "李四", "2023年6月2日")
+    first_path = os.path.join(folder, "first.pdf")
+    first.save(first_path)
+
+    second = fitz.open()
+    make_form_page(second, "王五", "2023年5月7日")               # 版式相同、姓名日期不同
+    second.insert_pdf(fitz.open(first_path), from_page=1, to_page=1)  # 与第一份第2页完全相同
+    make_form_page(second, "张三", "2023年5月1日", reverse=True)     # 外观与第一份第1页相同、内容流不同
+    second_path = os.path.join(folder, "second.pdf")
+    second.save(second_path)
+
+    index = DuplicatePageIndex(os.path.join(folder, "index"), reuse=reuse)
+    found = []
+    for pdf_path in (first_path, second_path):
+        with fitz.open(pdf_path) as doc:
+            for page_num, page in enumerate(doc):
+                result, signature = index.lookup(pdf_path, page_num, render_page_thumbnail(page))
+                if pdf_path == second_path:
+                    found.append(result)
+                if result is None:
+                    index.add(pdf_path, page_num, signature, text_result(page))
+    return index, found
+
+
+def test_content_digest():
+    doc = fitz.open()
+    make_form_page(doc, "张三", "2023年5月1日")
+    make_form_page(doc, "李四", "2023年5月1日")
+    make_form_page(doc, "张三", "2023年5月1日")
+    digests = [page_content_digest(page) for page in doc]
+    assert digests[0] == digests[2]
+    assert digests[0] != digests[1]
+
+
+def test_reuse_only_identical_pages():
+    with tempfile.TemporaryDirectory() as folder:
+        index, found = build_index(folder, reuse=True)
+        matches = {(item['page'], item['match']) for item in index.duplicates}
+        index.close()
+    # 只改了姓名和日期的页面不能复用其他页面的识别结果
+    assert found[0] is None
+    assert found[1] is not None and found[1].meta['source'] == 'duplicate'
+    assert "李四" in "".join(found[1].texts)
+    # 外观相同、内容流不同的页面重新识别，文本一致时记入报告
+    assert found[2] is None
+    assert matches == {(1, 'reused'), (2, 'same_text')}
+
+
+def test_report_without_reuse():
+    with tempfile.TemporaryDirectory() as folder:
+        index, found = build_index(folder, reuse=False)
+        report_path = index.write_report(os.path.join(folder, "report.md"))
+        matches = {(item['page'], item['match']) for item in index.duplicates}
+        index.close()
+        assert report_path is not None and os.path.exists(report_path)
+    assert all(result is None for result in found)
+    assert matches == {(1, 'identical'), (2, 'same_text')}
+
+
+def main():
+    for test in (test_content_digest, test_reuse_only_identical_pages, test_report_without_reuse):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
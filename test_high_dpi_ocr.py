@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import fitz
-from paddleocr import PaddleOCR
+from ocr_engine import get_ocr_engine
 import os
 from PIL import Image
 
@@ -69,9 +69,8 @@ def test_cover_ocr_high_dpi(pdf_path):
             # 调整图像尺寸以避免过大
             image_path = resize_image_if_needed(image_path, max_size=2000)
             
-            # 初始化PaddleOCR
-            print("初始化PaddleOCR...")
-            ocr = PaddleOCR(lang='ch')
+            # 获取共享的PaddleOCR实例（只在第一个DPI设置时加载模型）
+            ocr = get_ocr_engine('ch')
             
             # 进行OCR识别
             print("正在进行OCR识别...")
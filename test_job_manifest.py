@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import tempfile
+
+from job_manifest import JobManifest
+
+
+def write_file(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_resume_pages():
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = os.path.join(folder, "a.pdf")
+        manifest_path = os.path.join(folder, "manifest.json")
+        write_file(pdf_path, "第一版内容")
+
+        manifest = JobManifest(manifest_path)
+        for page_num in (0, 1, 3):
+            manifest.mark_page_done(pdf_path, 'paddleocr', page_num)
+        manifest.save()
+
+        # 重新读取清单（模拟中断后再次运行）
+        resumed = JobManifest(manifest_path)
+        assert resumed.completed_pages(pdf_path, 'paddleocr') == {0, 1, 3}
+        assert resumed.completed_pages(pdf_path, 'toc') == set()
+        assert not resumed.is_stage_complete(pdf_path, 'paddleocr')
+
+        resumed.reset_stage(pdf_path, 'paddleocr')
+        assert resumed.completed_pages(pdf_path, 'paddleocr') == set()
+
+
+def test_changed_input_clears_progress():
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = os.path.join(folder, "a.pdf")
+        manifest_path = os.path.join(folder, "manifest.json")
+        write_file(pdf_path, "第一版内容")
+        manifest = JobManifest(manifest_path)
+        manifest.mark_page_done(pdf_path, 'paddleocr', 0)
+        manifest.save()
+
+        # 内容变化（修改时间也变化）后进度清空
+        time.sleep(0.01)
+        write_file(pdf_path, "第二版内容，长度不同")
+        resumed = JobManifest(manifest_path)
+        assert resumed.completed_pages(pdf_path, 'paddleocr') == set()
+
+
+def test_stage_complete_requires_outputs():
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = os.path.join(folder, "a.pdf")
+        output_path = os.path.join(folder, "a.md")
+        write_file(pdf_path, "内容")
+        write_file(output_path, "结果")
+
+        manifest = JobManifest(os.path.join(folder, "manifest.json"))
+        manifest.mark_stage_complete(pdf_path, 'paddleocr', {'markdown': output_path})
+        assert JobManifest(manifest.manifest_path).is_stage_complete(pdf_path, 'paddleocr')
+
+        # 输出文件被删除后需要重新处理
+        os.remove(output_path)
+        assert not JobManifest(manifest.manifest_path).is_stage_complete(pdf_path, 'paddleocr')
+
+
+def main():
+    for test in (test_resume_pages, test_changed_input_clears_progress, test_stage_complete_requires_outputs):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+from ocr_cache import OCRResultCache, page_cache_key, BUCKET_COUNT
+from ocr_result import OCRPageResult
+
+# 每个子目录约容纳3条测试缓存
+ENTRY_TEXT = "测试缓存条目" * 10
+MAX_BYTES = BUCKET_COUNT * 1200
+
+
+def sample_result(text=ENTRY_TEXT):
+    return OCRPageResult([text], np.array([0.9]), np.array([[[0, 0], [10, 0], [10, 10], [0, 10]]], dtype=np.int32))
+
+
+def fill_cache(cache_dir, prefix, count):
+    """
+    在（独立进程中）向共用的缓存目录写入 count 条缓存
+    """
+    cache = OCRResultCache(cache_dir, max_bytes=MAX_BYTES)
+    for i in range(count):
+        cache.put(page_cache_key(np.zeros((4, 4), dtype=np.uint8), worker=prefix, index=i), sample_result())
+    return cache.total_bytes()
+
+
+def test_cache_key():
+    image = np.zeros((20, 30), dtype=np.uint8)
+    key = page_cache_key(image, dpi=200, max_size=2000)
+    assert key == page_cache_key(image.copy(), dpi=200, max_size=2000)
+    assert key != page_cache_key(image, dpi=300, max_size=2000)
+    assert key != page_cache_key(image, dpi=200, max_size=2000, preprocess='other')
+    changed = image.copy()
+    changed[5, 5] = 1
+    assert key != page_cache_key(changed, dpi=200, max_size=2000)
+    assert key != page_cache_key(image.reshape(30, 20), dpi=200, max_size=2000)
+
+
+def test_round_trip_and_overwrite():
+    with tempfile.TemporaryDirectory() as folder:
+        cache = OCRResultCache(folder, max_bytes=MAX_BYTES)
+        key = page_cache_key(np.zeros((4, 4), dtype=np.uint8))
+        assert cache.get(key) is None
+        cache.put(key, sample_result())
+        size = cache.total_bytes()
+        # 覆盖同一键不重复计算大小
+        cache.put(key, sample_result())
+        assert cache.total_bytes() == size
+        assert cache.get(key).texts == [ENTRY_TEXT]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as folder:
+        cache = OCRResultCache(folder, max_bytes=MAX_BYTES)
+        keys = [f"ab{i:038x}" for i in range(6)]
+        now = time.time()
+        for i, key in enumerate(keys[:3]):
+            cache.put(key, sample_result())
+            os.utime(cache._entry_path(key), (now - 100 + i, now - 100 + i))
+        # 最早写入的条目刚被读取过，不应被淘汰
+        assert cache.get(keys[0]) is not None
+        for key in keys[3:]:
+            cache.put(key, sample_result())
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.total_bytes() <= MAX_BYTES / BUCKET_COUNT
+
+
+def test_shared_limit_across_processes():
+    with tempfile.TemporaryDirectory() as folder:
+        with multiprocessing.get_context('spawn').Pool(3) as pool:
+            pool.starmap(fill_cache, [(folder, f"worker{i}", 600) for i in range(3)])
+        total = OCRResultCache(folder, max_bytes=MAX_BYTES).total_bytes()
+        assert total <= MAX_BYTES, (total, MAX_BYTES)
+
+
+def main():
+    for test in (test_cache_key, test_round_trip_and_overwrite, test_lru_eviction, test_shared_limit_across_processes):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
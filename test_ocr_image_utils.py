@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cv2
+import fitz
+import numpy as np
+
+from ocr_image_utils import estimate_orientation, render_page_for_ocr
+
+_ROTATIONS = {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_CLOCKWISE}
+
+
+def prose_page(seed):
+    """
+    模拟横排正文页：以黑色方块代替文字，段落首行缩进、末行较短
+    """
+    rng = np.random.default_rng(seed)
+    page = np.full((2000, 1400), 255, np.uint8)
+    y = 120
+    while y < 1850:
+        line_count = rng.integers(2, 6)
+        for line in range(line_count):
+            x0 = 160 if line == 0 else 100
+            x1 = 1300 if line < line_count - 1 else 100 + rng.integers(150, 1000)
+            for x in range(x0, x1, 30):
+                cv2.rectangle(page, (x, y), (x + 24, y + 24), 0, -1)
+            y += 42
+        y += 20
+    return page
+
+
+def test_rotated_prose():
+    for seed in range(3):
+        page = prose_page(seed)
+        assert estimate_orientation(page) == 0
+        for rotation, code in _ROTATIONS.items():
+            # 页面按逆时针旋转 rotation 度，需顺时针旋转 rotation 度纠正
+            assert estimate_orientation(cv2.rotate(page, code)) == rotation, (seed, rotation)
+
+
+def test_few_lines_not_rotated():
+    # 只有一两行字时行投影几乎没有起伏，不能因列投影起伏大就判断为旋转了90°
+    for text, line_count in (("hello world " * 5, 1), ("hello world " * 5, 2), ("本页为空白页，特此说明。" * 2, 1)):
+        doc = fitz.open()
+        page = doc.new_page()
+        for line in range(line_count):
+            page.insert_text((72, 100 + line * 20), text, fontname="china-s", fontsize=12)
+        info = {}
+        render_page_for_ocr(page, info=info)
+        assert info['orientation'] == 0, (text, line_count)
+
+
+def main():
+    for test in (test_rotated_prose, test_few_lines_not_rotated):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+import numpy as np
+
+from ocr_result import OCRPageResult
+from ocr_result_store import OCR_STORE_FILENAME, reset_store, append_page_result, load_page_results
+
+
+def sample_result(texts, meta=None):
+    polys = np.array([[[0, i * 30], [100, i * 30], [100, i * 30 + 20], [0, i * 30 + 20]] for i in range(len(texts))],
+                     dtype=np.int32)
+    return OCRPageResult(texts, np.linspace(0.5, 0.9, len(texts)), polys, meta=meta)
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as folder:
+        store_path = os.path.join(folder, OCR_STORE_FILENAME)
+        reset_store(store_path)
+        assert load_page_results(store_path) == {}
+
+        first = sample_result(["目录", "1. 讯问笔录", "abc"], meta={'source': 'text_layer'})
+        append_page_result(store_path, 0, first)
+        append_page_result(store_path, 2, OCRPageResult(["无坐标"], [0.8]))
+        append_page_result(store_path, 5, OCRPageResult())
+
+        results = load_page_results(store_path)
+        assert sorted(results) == [0, 2, 5]
+        assert results[0].texts == first.texts
+        assert np.allclose(results[0].scores, first.scores)
+        assert np.array_equal(results[0].polys, first.polys)
+        assert results[0].meta == {'source': 'text_layer'}
+        assert results[2].texts == ["无坐标"] and not results[2].has_polys
+        assert len(results[5]) == 0
+
+
+def test_last_record_wins():
+    with tempfile.TemporaryDirectory() as folder:
+        store_path = os.path.join(folder, OCR_STORE_FILENAME)
+        append_page_result(store_path, 1, sample_result(["旧结果"]))
+        append_page_result(store_path, 1, sample_result(["新结果", "第二行"]))
+        assert load_page_results(store_path)[1].texts == ["新结果", "第二行"]
+
+
+def test_truncated_tail_ignored():
+    with tempfile.TemporaryDirectory() as folder:
+        store_path = os.path.join(folder, OCR_STORE_FILENAME)
+        append_page_result(store_path, 0, sample_result(["第一页"]))
+        complete_size = os.path.getsize(store_path)
+        append_page_result(store_path, 1, sample_result(["第二页", "写了一半"]))
+        with open(store_path, 'rb') as f:
+            data = f.read()
+        # 模拟处理中断：最后一条记录只写了一部分
+        for size in range(complete_size + 1, len(data)):
+            with open(store_path, 'wb') as f:
+                f.write(data[:size])
+            results = load_page_results(store_path)
+            assert sorted(results) == [0] and results[0].texts == ["第一页"], size
+
+
+def main():
+    for test in (test_round_trip, test_last_record_wins, test_truncated_tail_ignored):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
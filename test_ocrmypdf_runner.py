@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+import fitz
+
+from ocrmypdf_runner import OCRmyPDFJob, OCRmyPDFRunner, plan_concurrency
+
+# 模拟ocrmypdf：按 -v 1 的格式输出逐页日志（"Start processing N pages concurrently" 中N为并行页数），
+# 然后原样复制输入文件到输出路径
+FAKE_OCRMYPDF = """
+import shutil, sys
+args = sys.argv[1:]
+jobs = int(args[args.index('--jobs') + 1])
+input_path, output_path = args[-2:]
+import fitz
+with fitz.open(input_path) as doc:
+    pages = doc.page_count
+print(f"Start processing {min(jobs, pages)} pages concurrently", file=sys.stderr)
+for page in range(1, pages + 1):
+    print(f"   {page} page is facing ⇧, dpi 200.0 x 200.0", file=sys.stderr)
+    print(f"   {page} Rasterize with png16m, rotation 0", file=sys.stderr)
+shutil.copyfile(input_path, output_path)
+"""
+
+
+def make_pdf(path, pages):
+    with fitz.open() as doc:
+        for page_num in range(pages):
+            doc.new_page().insert_text((72, 72), f"page {page_num + 1}")
+        doc.save(path)
+
+
+def run_fake(folder, jobs, shard_pages=None):
+    script = os.path.join(folder, "fake_ocrmypdf.py")
+    with open(script, 'w', encoding='utf-8') as f:
+        f.write(FAKE_OCRMYPDF)
+    runner = OCRmyPDFRunner([script], processes=2, jobs_per_process=2, command=sys.executable)
+    if shard_pages:
+        jobs = runner.shard(jobs, shard_pages=shard_pages, work_dir=folder)
+    return list(runner.run(jobs))
+
+
+def test_plan_concurrency():
+    assert plan_concurrency(10, cpu_count=8, jobs_per_process=2) == (4, 2)
+    assert plan_concurrency(1, cpu_count=8) == (1, 8)
+    processes, jobs = plan_concurrency(3, cpu_count=8, processes=16)
+    assert processes == 3 and processes * jobs <= 8
+
+
+def test_total_pages_from_pdf():
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = os.path.join(folder, "a.pdf")
+        make_pdf(pdf_path, 7)
+        job = OCRmyPDFJob(pdf_path, os.path.join(folder, "out.pdf"))
+        assert job.total_pages == 7
+        # 日志中的并行页数不影响总页数
+        assert not job.record_progress("Start processing 2 pages concurrently")
+        assert job.record_progress("   3 page is facing ⇧, dpi 200.0 x 200.0")
+        assert not job.record_progress("   3 Rasterize with png16m, rotation 0")
+        assert job.total_pages == 7 and job.pages_seen == {3}
+
+
+def test_run_progress():
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = os.path.join(folder, "a.pdf")
+        make_pdf(pdf_path, 25)
+        job = OCRmyPDFJob(pdf_path, os.path.join(folder, "out", "a.pdf"))
+        events = run_fake(folder, [job])
+        assert [event for event, _ in events] == ['start', 'progress', 'progress', 'done']
+        assert job.success, job.error
+        assert job.total_pages == 25 and len(job.pages_seen) == 25
+        assert os.path.exists(job.output_path)
+
+
+def test_sharded_progress():
+    with tempfile.TemporaryDirectory() as folder:
+        pdf_path = os.path.join(folder, "big.pdf")
+        make_pdf(pdf_path, 45)
+        job = OCRmyPDFJob(pdf_path, os.path.join(folder, "out", "big.pdf"))
+        events = run_fake(folder, [job], shard_pages=20)
+        # 只产出原任务的事件，进度为所有分片合计的页数
+        assert all(event_job is job for _, event_job in events)
+        assert [event for event, _ in events].count('progress') == 4
+        assert job.success, job.error
+        assert job.total_pages == 45 and job.pages_seen == set(range(1, 46))
+        with fitz.open(job.output_path) as merged:
+            assert merged.page_count == 45
+
+
+def main():
+    for test in (test_plan_concurrency, test_total_pages_from_pdf, test_run_progress, test_sharded_progress):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import fitz
+import numpy as np
+
+from page_thumbnail import probe_blank_page, render_page_thumbnail, text_components
+
+
+def text_page(text, position=(250, 400), fontsize=10.5):
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    if text:
+        page.insert_text(position, text, fontname="china-s", fontsize=fontsize)
+    return doc
+
+
+def scanned_back(specks, seed=0):
+    """
+    模拟扫描的空白背面：40 DPI A4缩略图，纸张底色带轻微噪声，另有若干深色灰尘斑点 (行, 列, 边长)
+    """
+    rng = np.random.default_rng(seed)
+    thumbnail = np.clip(rng.normal(232, 4, (468, 331)), 0, 255).astype(np.uint8)
+    for row, col, size in specks:
+        thumbnail[row:row + size, col:col + size] = 40
+    return thumbnail
+
+
+def is_blank(doc, thumbnail=None):
+    return probe_blank_page(doc[0], thumbnail) is not None
+
+
+def test_empty_and_margin_only_pages():
+    assert is_blank(text_page(""))
+    # 只有页边的页码（位于忽略的边缘内）
+    assert is_blank(text_page("- 12 -", position=(290, 825)))
+
+
+def test_short_note_is_not_blank():
+    for fontsize in (9, 10.5, 12):
+        assert not is_blank(text_page("以下无正文", fontsize=fontsize)), fontsize
+    assert not is_blank(text_page("本页无正文", position=(80, 120)))
+
+
+def test_dust_specks_are_blank():
+    doc = text_page("")
+    # 单个3x3斑点膨胀后为5x5，不能被当作文字
+    assert is_blank(doc, scanned_back([(200, 150, 3)]))
+    assert is_blank(doc, scanned_back([(100, 60, 3), (250, 200, 4), (380, 90, 3), (300, 280, 2)], seed=1))
+    assert len(text_components(scanned_back([(200, 150, 3)]))) == 0
+
+
+def test_text_components_are_undilated_boxes():
+    components = text_components(render_page_thumbnail(text_page("以下无正文", fontsize=12)[0]))
+    assert len(components)
+    heights = components[:, 3] - components[:, 1]
+    assert heights.max() <= 8
+
+
+def main():
+    for test in (test_empty_and_margin_only_pages, test_short_note_is_not_blank, test_dust_specks_are_blank,
+                 test_text_components_are_undilated_boxes):
+        test()
+        print(f"{test.__name__}: 通过")
+
+
+if __name__ == "__main__":
+    main()
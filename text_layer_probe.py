@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unicodedata
+
+import numpy as np
+
+from ocr_result import OCRPageResult
+
+# 文本层质量判断阈值
+MIN_TEXT_CHARS = 10            # 有效字符数少于该值视为没有文本层
+MIN_SCANNED_TEXT_CHARS = 30    # 页面以图像为主（扫描件）时要求的最少字符数
+MAX_GARBAGE_RATIO = 0.1        # 乱码字符（替换符、私用区、控制字符）比例上限
+IMAGE_COVERAGE_RATIO = 0.5     # 图像覆盖页面面积超过该比例视为扫描页
+MIN_SCANNED_TEXT_COVERAGE = 0.05  # 扫描页的文本片段总面积至少占图像面积的比例（只有页眉、印章、编号时远低于该值）
+MIN_SCANNED_TEXT_LINES = 3     # 扫描页的文本层至少包含的文本行数
+
+
+def page_image_scale(page, dpi=200, max_size=2000):
+    """
+    计算PDF坐标（点）到渲染图像像素坐标的缩放系数，与 render_page_array 的缩放规则一致
+    """
+    return rect_image_scale(page.rect, dpi=dpi, max_size=max_size)
+
+
+def rect_image_scale(rect, dpi=200, max_size=2000):
+    """
+    按页面矩形计算缩放系数（不需要访问页面对象，可在非渲染线程中使用）
+    """
+    scale = dpi / 72
+    width = rect.width * scale
+    height = rect.height * scale
+    if width > max_size or height > max_size:
+        scale *= min(max_size / int(width), max_size / int(height))
+    return scale
+
+
+def _is_garbage_char(ch):
+    if ch == '\ufffd':
+        return True
+    category = unicodedata.category(ch)
+    return category in ('Co', 'Cs') or (category == 'Cc' and ch not in '\t\n\r')
+
+
+def probe_text_layer(page, dpi=200, max_size=2000):
+    """
+    检查页面自带的文本层，质量合格时直接转换为 OCRPageResult，否则返回None
+
+    每个文本片段 (span) 作为一条结果，坐标按渲染图像的像素坐标给出，
+    可直接交给 OCRTableParser 等按OCR坐标工作的代码使用
+
+    扫描页（图像覆盖大部分页面）除字符数外还要求文本层覆盖足够的面积和行数，
+    只带页眉、印章文字或卷宗编号文本层的扫描页仍然需要OCR
+    """
+    page_dict = page.get_text("dict")
+    page_area = max(page.rect.width * page.rect.height, 1.0)
+
+    texts = []
+    bboxes = []
+    line_count = 0
+    image_area = 0.0
+    for block in page_dict.get('blocks', []):
+        if block.get('type') == 1:
+            x0, y0, x1, y1 = block['bbox']
+            image_area += max(x1 - x0, 0) * max(y1 - y0, 0)
+            continue
+        for line in block.get('lines', []):
+            line_texts = len(texts)
+            for span in line.get('spans', []):
+                text = span.get('text', '').strip()
+                if text:
+                    texts.append(text)
+                    bboxes.append(span['bbox'])
+            if len(texts) > line_texts:
+                line_count += 1
+
+    chars = [ch for text in texts for ch in text if not ch.isspace()]
+    if len(chars) < MIN_TEXT_CHARS:
+        return None
+    if sum(1 for ch in chars if _is_garbage_char(ch)) > len(chars) * MAX_GARBAGE_RATIO:
+        return None
+    if image_area / page_area > IMAGE_COVERAGE_RATIO:
+        if len(chars) < MIN_SCANNED_TEXT_CHARS or line_count < MIN_SCANNED_TEXT_LINES:
+            return None
+        text_area = sum(max(x1 - x0, 0) * max(y1 - y0, 0) for x0, y0, x1, y1 in bboxes)
+        if text_area / min(image_area, page_area) < MIN_SCANNED_TEXT_COVERAGE:
+            return None
+
+    scale = page_image_scale(page, dpi=dpi, max_size=max_size)
+    boxes = np.round(np.asarray(bboxes, dtype=np.float64) * scale).astype(np.int32)
+    x0, y0, x1, y1 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    polys = np.stack([np.stack([x0, y0], axis=1), np.stack([x1, y0], axis=1),
+                      np.stack([x1, y1], axis=1), np.stack([x0, y1], axis=1)], axis=1)
+    return OCRPageResult(texts, None, polys, meta={'source': 'text_layer', 'chars': len(chars)})